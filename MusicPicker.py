@@ -2,46 +2,124 @@
 MusicPicker v1.2 - 歌曲筛选复制工具
 主程序入口，包含新的播放列表生成器和比较器功能
 """
+import logging
+import multiprocessing
 from translator import Translator, detect_system_language
-from music_processor import MusicProcessor
-from metadata_processor import MetadataProcessor
-from playlist_generator import PlaylistGenerator
-from playlist_comparator import PlaylistComparator
 from gui import MusicPickerGUI
 from utils import setup_logging
+from config import (METADATA_CACHE_FILE, LIBRARY_SNAPSHOT_FILE,
+                    LIBRARY_WATCH_ROOTS, METRICS_TEXTFILE)
 
 
-def main():
-    """主函数"""    # 设置日志
-    setup_logging()
-    # 初始化翻译器
-    translator = Translator()
-    translator.set_language(detect_system_language())
+def create_backends(app, translator):
+    """
+    创建处理模块并绑定到界面
 
-    # 创建GUI应用
-    app = MusicPickerGUI(translator, None)
+    处理模块（mutagen、正则标准化、进程池等）较大，在窗口第一次绘制后才导入；
+    歌单比较器由界面在第一次使用时创建。
+
+    Args:
+        app: 界面实例
+        translator: 翻译器实例
+
+    Returns:
+        退出时需要关闭的资源 (元数据缓存, 音乐库快照, 音乐库监视器)
+    """
+    from music_processor import MusicProcessor
+    from metadata_processor import MetadataProcessor
+    from metadata_cache import MetadataCache
+    from library_snapshot import LibrarySnapshot
+    from playlist_generator import PlaylistGenerator
+
+    logger = logging.getLogger(__name__)
     # 创建音乐处理器
     music_processor = MusicProcessor(translator, app.log_message)
+    # 创建元数据缓存（不可用时退化为无缓存）
+    try:
+        metadata_cache = MetadataCache(METADATA_CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"元数据缓存不可用: {e}")
+        metadata_cache = None
+    # 创建音乐库快照（不可用时每次完整扫描）
+    try:
+        library_snapshot = LibrarySnapshot(LIBRARY_SNAPSHOT_FILE)
+    except Exception as e:
+        logger.warning(f"音乐库快照不可用: {e}")
+        library_snapshot = None
     # 创建元数据处理器
-    metadata_processor = MetadataProcessor(translator, app.log_message)
+    metadata_processor = MetadataProcessor(
+        translator, app.record_message, metadata_cache)
 
     # 创建 v1.2 新功能模块
-    playlist_generator = PlaylistGenerator(translator, app.log_message)
-    playlist_comparator = PlaylistComparator(translator, app.log_message)
+    playlist_generator = PlaylistGenerator(
+        metadata_processor, translator, app.record_message)
 
     # 将处理器绑定到应用
     app.music_processor = music_processor
     app.metadata_processor = metadata_processor
     app.playlist_generator = playlist_generator
-    app.playlist_comparator = playlist_comparator
 
-    # 将元数据处理器绑定到音乐处理器
+    # 将元数据处理器和音乐库快照绑定到处理器
     music_processor.set_metadata_processor(metadata_processor)
-    # 创建并运行窗口
+    music_processor.set_library_snapshot(library_snapshot)
+    playlist_generator.set_library_snapshot(library_snapshot)
+
+    # 监视配置的音乐库根目录（可选）
+    library_watcher = None
+    if LIBRARY_WATCH_ROOTS:
+        from library_watcher import LibraryWatcher
+        library_watcher = LibraryWatcher(LIBRARY_WATCH_ROOTS, metadata_cache)
+        try:
+            library_watcher.start()
+            music_processor.set_library_watcher(library_watcher)
+        except OSError as e:
+            logger.warning(f"音乐库监视不可用: {e}")
+            library_watcher = None
+
+    # Prometheus 文本文件指标（可选）
+    if METRICS_TEXTFILE:
+        from metrics_exporter import register_textfile
+        register_textfile(METRICS_TEXTFILE)
+
+    # 窗口上已选择的选项同步到处理器
+    app.apply_processing_options()
+    return metadata_cache, library_snapshot, library_watcher
+
+
+def main():
+    """主函数"""    # 设置日志
+    setup_logging()
+    # 初始化翻译器
+    translator = Translator()
+    translator.set_language(detect_system_language())
+
+    # 创建GUI应用，先显示窗口再加载处理模块
+    app = MusicPickerGUI(translator, None)
     app.create_window()
     app.update_ui_language()
+    app.root.update_idletasks()
+
+    resources = []
+    app.root.after(
+        0, lambda: resources.extend(create_backends(app, translator)))
     app.show()
 
+    # 窗口关闭后等待后台任务结束，再关闭它们使用的缓存和快照
+    app.shutdown_tasks()
+
+    # 退出时停止监视，清理并关闭元数据缓存和音乐库快照
+    metadata_cache, library_snapshot, library_watcher = (
+        resources or (None, None, None))
+    if library_watcher:
+        library_watcher.stop()
+    if metadata_cache:
+        metadata_cache.vacuum()
+        metadata_cache.close()
+    if library_snapshot:
+        library_snapshot.close()
+
 
 if __name__ == "__main__":
+    # 打包后的程序需要此调用才能正确启动元数据解析子进程
+    multiprocessing.freeze_support()
     main()
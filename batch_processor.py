@@ -0,0 +1,397 @@
+"""
+批量处理模块
+多个歌单共用一次音乐库扫描：音乐库只扫描和索引一次，每个文件只检查一次，
+多个歌单需要同一个文件时源文件只读取一次
+"""
+import os
+import time
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import run_report
+from library_index import LibraryIndex
+from library_scanner import ScanStats
+from copy_pipeline import CopyJob, CopyPipeline
+from sync_manifest import SyncManifest
+from progress_tracker import ProgressTracker
+from song_list_reader import SongEntry
+from music_processor import MusicProcessor
+
+
+def _output_key(path: str) -> str:
+    """输出目录的比较键（与目标路径 dirname 的结果一致）"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class BatchListResult(NamedTuple):
+    """单个歌单的处理结果"""
+    list_file: str
+    output_path: str
+    songs_total: int
+    songs_found: int
+    files_copied: int
+    unfound: List[str]       # 未找到的歌单原始行
+
+
+class _BatchList:
+    """批量处理中单个歌单的状态"""
+
+    def __init__(self, list_file: str, output_path: str, songs_to_find: List):
+        self.list_file = list_file
+        self.output_path = output_path
+        self.songs_to_find = songs_to_find
+        self.song_status = {song_info.original_line: False
+                            for song_info in songs_to_find}
+        self.best_quality = {}
+        self.claimed_destinations = set()
+        self.sync_manifest: Optional[SyncManifest] = None
+        # 合并歌曲编号 -> 本歌单中的歌曲序号列表
+        self.song_indices: Dict[int, List[int]] = {}
+
+    @property
+    def output_key(self) -> str:
+        return _output_key(self.output_path)
+
+
+class _SharedSongStatus:
+    """
+    合并歌曲的查找状态：所有需要这首歌的歌单都已找到时才算找到
+
+    供 MusicProcessor._find_filename_matches 使用，已找到的歌曲不再查找候选文件。
+    合并歌曲以第一次出现的原始行为键（相同的行总是合并为同一首歌）
+    """
+
+    def __init__(self, shared_songs: List[SongEntry],
+                 owners: List[List[Tuple[_BatchList, int]]]):
+        self.owners = {song.original_line: song_owners
+                       for song, song_owners in zip(shared_songs, owners)}
+
+    def __getitem__(self, original_line: str) -> bool:
+        for batch_list, song_index in self.owners[original_line]:
+            song_info = batch_list.songs_to_find[song_index]
+            if not batch_list.song_status[song_info.original_line]:
+                return False
+        return True
+
+
+class _OutputGroups:
+    """
+    收集待输出的文件，按源文件分组后提交给复制流水线
+
+    与 CopyPipeline.submit 的签名相同，可直接传给 _schedule_output
+    """
+
+    def __init__(self):
+        self.groups: Dict[str, List[CopyJob]] = {}
+
+    def submit(self, source: str, destination: str, label: str,
+               replace: bool = False):
+        self.groups.setdefault(source, []).append(
+            CopyJob(source, destination, label, replace))
+
+    def flush(self, copy_pipeline: CopyPipeline) -> int:
+        """
+        提交所有分组
+
+        Returns:
+            被多个歌单共用的源文件数
+        """
+        shared = 0
+        for jobs in self.groups.values():
+            if len(jobs) > 1:
+                shared += 1
+            copy_pipeline.submit_group(jobs)
+        self.groups.clear()
+        return shared
+
+
+class BatchProcessor(MusicProcessor):
+    """批量处理器：多个歌单对同一个音乐库只扫描一次"""
+
+    @run_report.instrumented('batch')
+    def find_and_copy_batch(
+            self,
+            batch_lists: List[_BatchList],
+            library_path,
+            progress_callback) -> Optional[List[BatchListResult]]:
+        """
+        查找并复制多个歌单的歌曲
+
+        每个歌单的结果与单独运行 find_and_copy_songs 相同。
+
+        Args:
+            batch_lists: 歌单状态列表
+            library_path: 音乐库路径
+            progress_callback: 进度回调，参数为 ProgressSnapshot
+
+        Returns:
+            每个歌单的结果，中止或出错时返回None
+        """
+        if not os.path.isdir(library_path):
+            self._log_message(self.translator.t(
+                'invalid_library_path', library_path), 'error')
+            run_report.current().mark('failed')
+            return None
+
+        for batch_list in batch_lists:
+            if not self._create_output_directory(batch_list.output_path):
+                run_report.current().mark('failed')
+                return None
+
+        match_started = time.perf_counter()
+        report = run_report.current()
+        self._log_message(self.translator.t('starting_search', library_path))
+
+        # 相同的歌曲（标题、艺术家和最佳音质标记）合并，只查找一次候选文件，
+        # 由第一次出现的条目代表
+        shared_songs = []
+        owners = []
+        shared_ids = {}
+        for batch_list in batch_lists:
+            for song_index, song_info in enumerate(batch_list.songs_to_find):
+                key = (song_info.title, song_info.artist,
+                       song_info.prefer_best)
+                shared_index = shared_ids.get(key)
+                if shared_index is None:
+                    shared_index = shared_ids[key] = len(shared_songs)
+                    shared_songs.append(song_info)
+                    owners.append([])
+                owners[shared_index].append((batch_list, song_index))
+                batch_list.song_indices.setdefault(
+                    shared_index, []).append(song_index)
+
+            if self.prefer_best_quality:
+                batch_list.best_quality = {
+                    song_info.original_line: None
+                    for song_info in batch_list.songs_to_find
+                    if song_info.prefer_best}
+
+        # 任一歌单需要比较音质的歌曲，扫描到最后都要继续查找
+        shared_best = {
+            shared_songs[shared_index].original_line: None
+            for shared_index, song_owners in enumerate(owners)
+            if any(batch_list.songs_to_find[song_index].original_line
+                   in batch_list.best_quality
+                   for batch_list, song_index in song_owners)}
+        songs_total = sum(len(batch_list.song_status)
+                          for batch_list in batch_lists)
+        progress = ProgressTracker(progress_callback, songs_total)
+        self._begin_file_log(songs_total)
+
+        library_index = LibraryIndex()
+        scan_stats = ScanStats()
+        file_stage = self._iter_library_files(
+            library_path, library_index, scan_stats, shared_songs,
+            _SharedSongStatus(shared_songs, owners), shared_best, progress)
+        use_metadata = bool(
+            self.use_metadata_matching and self.metadata_processor)
+        if use_metadata:
+            file_stage = self._iter_library_metadata(
+                library_index, file_stage)
+        else:
+            file_stage = ((file_id, matches, None)
+                          for file_id, matches in file_stage)
+
+        # 每个输出目录的同步清单和输出计数
+        lists_by_output = {batch_list.output_key: batch_list
+                           for batch_list in batch_lists}
+        copied_counts = Counter()
+        counts_lock = threading.Lock()
+        if self.sync_mode:
+            for batch_list in batch_lists:
+                batch_list.sync_manifest = SyncManifest(
+                    batch_list.output_path, self.sync_hash)
+                batch_list.sync_manifest.load()
+
+        def on_copied(job, mode):
+            output_key = _output_key(os.path.dirname(job.destination))
+            with counts_lock:
+                copied_counts[output_key] += 1
+            batch_list = lists_by_output.get(output_key)
+            if batch_list and batch_list.sync_manifest:
+                batch_list.sync_manifest.record(
+                    os.path.basename(job.destination), job.source)
+
+        copy_pipeline = CopyPipeline(
+            self.translator, self._log_message,
+            output_mode=self.output_mode, on_copied=on_copied,
+            per_file_log=self.per_file_log)
+        copy_pipeline.start()
+        report.add_source(lambda: self._live_counters(progress, copy_pipeline))
+        shared_files = 0
+        completed = False
+        stopped_early = False
+        try:
+            for file_id, shared_matches, metadata in file_stage:
+                if not self.is_running:
+                    break
+
+                entry = library_index.entry(file_id)
+                outputs = _OutputGroups()
+                for batch_list in batch_lists:
+                    # 换算为本歌单的歌曲序号（按歌单顺序）
+                    filename_matches = sorted(
+                        song_index
+                        for shared_index in shared_matches
+                        for song_index in batch_list.song_indices.get(
+                            shared_index, ()))
+                    if not filename_matches and metadata is None:
+                        continue
+                    with report.phase('match'):
+                        matched = self._process_file_match(
+                            entry.file_path, entry.filename,
+                            batch_list.songs_to_find, batch_list.song_status,
+                            batch_list.output_path, outputs,
+                            batch_list.claimed_destinations,
+                            filename_matches, metadata,
+                            batch_list.sync_manifest,
+                            batch_list.best_quality)
+                    if matched:
+                        progress.songs_matched += 1
+                shared_files += outputs.flush(copy_pipeline)
+
+                progress.files_scanned = file_id + 1
+                progress.files_copied = copy_pipeline.files_copied
+                progress.report()
+
+                if (progress.songs_matched == progress.songs_total and
+                        not shared_best):
+                    completed = stopped_early = True
+                    break
+            else:
+                completed = self.is_running
+                progress.files_scanned = progress.files_total
+
+            if completed:
+                # 多个歌单选出同一个最佳音质文件时也只读取一次
+                outputs = _OutputGroups()
+                for batch_list in batch_lists:
+                    self._schedule_best_quality(
+                        batch_list.best_quality, batch_list.output_path,
+                        outputs, batch_list.claimed_destinations,
+                        batch_list.sync_manifest)
+                shared_files += outputs.flush(copy_pipeline)
+        finally:
+            file_stage.close()
+            match_seconds = time.perf_counter() - match_started
+            copy_pipeline.finish(cancel=not completed)
+            for batch_list in batch_lists:
+                if batch_list.sync_manifest:
+                    self._finalize_sync(
+                        batch_list.sync_manifest,
+                        batch_list.claimed_destinations, completed)
+
+        if not completed:
+            report.mark('aborted')
+            self._record_run_counters(
+                report, progress, scan_stats, len(library_index))
+            self._log_message(self.translator.t('operation_aborted'))
+            return None
+
+        if stopped_early:
+            self._log_message(self.translator.t(
+                'early_stop_summary', progress.files_scanned,
+                scan_stats.directories_listed,
+                scan_stats.directories_skipped))
+        else:
+            self._log_message(self.translator.t(
+                'library_indexed', len(library_index)))
+
+        if use_metadata:
+            self.metadata_processor.log_cache_stats()
+
+        # 复制失败的歌曲重新标记为未找到
+        for failure in copy_pipeline.failures:
+            output_key = _output_key(os.path.dirname(failure.job.destination))
+            batch_list = lists_by_output.get(output_key)
+            if batch_list and batch_list.song_status.get(failure.job.label):
+                batch_list.song_status[failure.job.label] = False
+                progress.songs_matched -= 1
+        progress.files_copied = copy_pipeline.files_copied
+
+        results = [
+            BatchListResult(
+                batch_list.list_file, batch_list.output_path,
+                len(batch_list.song_status),
+                sum(batch_list.song_status.values()),
+                copied_counts[batch_list.output_key],
+                [line for line, found in batch_list.song_status.items()
+                 if not found])
+            for batch_list in batch_lists]
+        self._log_batch_report(
+            results, len(library_index), shared_files,
+            copy_pipeline.shared_reads)
+        self._log_timing_summary(match_seconds, copy_pipeline)
+        self._record_run_counters(
+            report, progress, scan_stats, len(library_index))
+        report.set('lists', len(batch_lists))
+        report.set('shared_files', shared_files)
+        report.set('shared_reads', copy_pipeline.shared_reads)
+        progress.report(force=True)
+        return results
+
+    def _log_batch_report(self, results, files_indexed, shared_files,
+                          shared_reads):
+        """输出每个歌单的结果和共用读取统计"""
+        for result in results:
+            self._log_message('\n' + self.translator.t(
+                'batch_list_summary', os.path.basename(result.list_file),
+                result.songs_found, result.songs_total,
+                result.files_copied, result.output_path))
+            if result.unfound:
+                self._log_message(self.translator.t('unfound_songs_header'))
+                for original_line in result.unfound:
+                    self._log_message(f"- {original_line}")
+        self._log_message('\n' + self.translator.t(
+            'batch_summary', len(results), files_indexed,
+            shared_files, shared_reads))
+
+    @run_report.instrumented('batch')
+    def start_batch(self, jobs, music_lib, progress_callback=None
+                    ) -> Optional[List[BatchListResult]]:
+        """
+        开始批量处理
+
+        Args:
+            jobs: (歌单文件, 输出目录) 列表，每个歌单输出到不同的目录
+            music_lib: 音乐库路径
+            progress_callback: 进度回调，参数为 ProgressSnapshot（可选）
+
+        Returns:
+            每个歌单的结果，中止或出错时返回None
+        """
+        self.is_running = True
+        self._log_message(self.translator.t('batch_started', len(jobs)))
+        self.set_use_metadata_matching(self.use_metadata_matching)
+
+        batch_lists = []
+        output_keys = set()
+        for list_file, output_dir in jobs:
+            output_key = _output_key(output_dir)
+            if output_key in output_keys:
+                self._log_message(self.translator.t(
+                    'batch_duplicate_output', output_dir), 'error')
+                run_report.current().mark('failed')
+                self.is_running = False
+                return None
+            output_keys.add(output_key)
+
+            songs_to_find = self.parse_song_list(list_file)
+            if songs_to_find is None:
+                run_report.current().mark('failed')
+                self.is_running = False
+                return None
+            if not songs_to_find:
+                self._log_message(
+                    f"{list_file}: " + self.translator.t('song_list_empty'))
+            batch_lists.append(_BatchList(list_file, output_dir, songs_to_find))
+
+        if progress_callback is None:
+            def progress_callback(snapshot):
+                pass
+
+        try:
+            return self.find_and_copy_batch(
+                batch_lists, music_lib, progress_callback)
+        finally:
+            self.is_running = False
@@ -0,0 +1,120 @@
+"""
+界面日志吞吐量基准
+工作线程以尽可能快的速度（或指定速率）调用 log_message，测量界面实际显示的
+消息速率，以及界面事件循环的最大停顿（用 10 毫秒心跳的间隔衡量）。
+加 --direct 时改为旧方式（每条消息单独 insert + see）作为对照。
+
+需要图形环境；没有显示器时输出 skipped 并正常退出。
+
+用法：python benchmarks/bench_gui_log.py [--seconds 5] [--rate 每秒条数]
+      [--direct]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEARTBEAT_MS = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0,
+                        help='工作线程写入消息的时长')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='每秒写入的消息数，0 表示不限速')
+    parser.add_argument('--direct', action='store_true',
+                        help='每条消息直接写入日志区域（旧方式）')
+    args = parser.parse_args()
+
+    import tkinter as tk
+    from translator import Translator
+    from gui import MusicPickerGUI
+
+    app = MusicPickerGUI(Translator(), None)
+    try:
+        app.create_window()
+    except tk.TclError as e:
+        print(f'skipped: {e}')
+        return 0
+    app.update_ui_language()
+
+    log_area = app.widgets['log_area']
+    if args.direct:
+        def log_message(message, level='INFO'):
+            def insert():
+                log_area.insert(tk.END, f"[{level}] {message}\n")
+                log_area.see(tk.END)
+            app.root.after(0, insert)
+    else:
+        log_message = app.log_message
+
+    # 统计已显示的行数
+    displayed = [0]
+    append = app._append_log_lines
+
+    def counting_append(lines):
+        displayed[0] += len(lines)
+        append(lines)
+    app._append_log_lines = counting_append
+    if args.direct:
+        _insert = log_area.insert
+
+        def counting_insert(*insert_args):
+            displayed[0] += 1
+            _insert(*insert_args)
+        log_area.insert = counting_insert
+
+    sent = [0]
+    producer_done = threading.Event()
+
+    def produce():
+        interval = 1.0 / args.rate if args.rate > 0 else 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < args.seconds:
+            log_message(f"✓ 第 {sent[0]} 首 - 某位歌手 "
+                        f"(D:/Music/专辑/第 {sent[0]} 首 - 某位歌手.flac)")
+            sent[0] += 1
+            if interval:
+                time.sleep(interval)
+        producer_done.set()
+
+    gaps = []
+    last_beat = [time.perf_counter()]
+
+    def heartbeat():
+        now = time.perf_counter()
+        gaps.append(now - last_beat[0])
+        last_beat[0] = now
+        if producer_done.is_set() and displayed[0] >= sent[0]:
+            app.root.quit()
+            return
+        app.root.after(HEARTBEAT_MS, heartbeat)
+
+    started = time.perf_counter()
+    threading.Thread(target=produce, daemon=True).start()
+    app.root.after(HEARTBEAT_MS, heartbeat)
+    app.root.mainloop()
+    seconds = time.perf_counter() - started
+    lines_kept = int(log_area.index('end-2c').split('.')[0])
+    app.root.destroy()
+
+    gaps_ms = sorted(gap * 1000 for gap in gaps)
+    print(f"mode              {'direct' if args.direct else 'queued'}")
+    print(f"messages sent     {sent[0]} "
+          f"({sent[0] / args.seconds:.0f}/s over {args.seconds:.1f} s)")
+    print(f"messages shown    {displayed[0]} in {seconds:.2f} s "
+          f"({displayed[0] / seconds:.0f}/s sustained)")
+    print(f"lines kept        {lines_kept}")
+    print(f"event loop gap    median {statistics.median(gaps_ms):.1f} ms, "
+          f"p99 {gaps_ms[int(len(gaps_ms) * 0.99)]:.1f} ms, "
+          f"max {gaps_ms[-1]:.1f} ms (heartbeat {HEARTBEAT_MS} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+文本标准化微基准
+对比旧实现（每次调用重新编译正则、逐首歌曲重复标准化）与 text_normalizer 的调用速度
+
+用法：python benchmarks/bench_normalization.py [--songs N] [--files N]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import (  # noqa: E402
+    normalize_for_comparison, normalize_artist_separators,
+    prepare_song_query)
+
+_WORDS = ['love', 'sun', 'moon', 'star', 'rain', 'blue', 'heart', 'fire',
+          '告白', '气球', '夜曲', '七里香', '晴天', '稻香']
+_ARTISTS = ['周杰伦', 'Taylor Swift', '陈奕迅/王菲', 'A_B', 'Adele',
+            'Coldplay/Rihanna']
+
+
+def legacy_normalize_for_comparison(text):
+    """旧版 utils.normalize_for_comparison / MetadataProcessor._normalize_text"""
+    if not text:
+        return ""
+    text = text.lower().strip()
+    text = re.sub(r'\([^)]*\)', '', text)
+    text = re.sub(r'\[[^\]]*\]', '', text)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def legacy_normalize_artist_separators(text):
+    """旧版 MusicProcessor._normalize_artist_separators"""
+    text = re.sub(r'[/_]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.lower()
+
+
+def legacy_filename_match(song_title, song_artist, filename_no_ext):
+    """旧版 MusicProcessor._enhanced_filename_match（每次调用都重新标准化歌曲）"""
+    if song_title in filename_no_ext and song_artist in filename_no_ext:
+        return True
+    normalized_filename = legacy_normalize_artist_separators(filename_no_ext)
+    normalized_artist = legacy_normalize_artist_separators(song_artist)
+    normalized_title = song_title.lower().strip()
+    if (normalized_title in normalized_filename and
+            normalized_artist in normalized_filename):
+        return True
+    artists_in_song = re.split(r'[/_]', song_artist.strip())
+    artists_in_song = [artist.strip().lower()
+                       for artist in artists_in_song if artist.strip()]
+    if artists_in_song:
+        all_artists_found = all(
+            artist in normalized_filename for artist in artists_in_song)
+        if normalized_title in normalized_filename and all_artists_found:
+            return True
+    return False
+
+
+def current_filename_match(query, filename_no_ext):
+    """新版匹配（与 MusicProcessor._enhanced_filename_match 相同）"""
+    if query.title in filename_no_ext and query.artist in filename_no_ext:
+        return True
+    normalized_filename = normalize_artist_separators(filename_no_ext)
+    normalized_title = query.normalized_title
+    if (normalized_title in normalized_filename and
+            query.normalized_artist in normalized_filename):
+        return True
+    if query.artists and normalized_title in normalized_filename:
+        return all(artist in normalized_filename for artist in query.artists)
+    return False
+
+
+def make_data(song_count, file_count, seed=1):
+    """生成确定性的歌单条目和文件名"""
+    rng = random.Random(seed)
+    songs = []
+    for _ in range(song_count):
+        title = ' '.join(rng.sample(_WORDS, rng.randint(1, 3))).lower()
+        songs.append((title, rng.choice(_ARTISTS).lower()))
+    filenames = []
+    for _ in range(file_count):
+        title = ' '.join(rng.sample(_WORDS, rng.randint(1, 3)))
+        artist = rng.choice(_ARTISTS).replace('/', rng.choice(['/', '_', ' ']))
+        suffix = rng.choice(['', ' (Live)', ' [Remaster]', ' (feat. X)'])
+        sep = rng.choice([' - ', '-', '_'])
+        filenames.append(f'{title}{sep}{artist}{suffix}'.lower())
+    return songs, filenames
+
+
+def timed(label, calls, func):
+    """运行并打印每秒调用次数"""
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f'{label:<40} {calls / elapsed:>14,.0f} calls/s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--songs', type=int, default=200)
+    parser.add_argument('--files', type=int, default=500)
+    args = parser.parse_args()
+
+    songs, filenames = make_data(args.songs, args.files)
+    texts = filenames + [title for title, _ in songs]
+
+    print('normalize_for_comparison')
+    old = timed('  legacy (re.sub per call)', len(texts),
+                lambda: [legacy_normalize_for_comparison(t) for t in texts])
+    normalize_for_comparison.cache_clear()
+    new = timed('  precompiled, cold cache', len(texts),
+                lambda: [normalize_for_comparison(t) for t in texts])
+    timed('  precompiled, warm cache', len(texts),
+          lambda: [normalize_for_comparison(t) for t in texts])
+    assert old == new
+
+    print('normalize_artist_separators')
+    old = timed('  legacy (re.sub per call)', len(texts),
+                lambda: [legacy_normalize_artist_separators(t) for t in texts])
+    normalize_artist_separators.cache_clear()
+    new = timed('  precompiled, cold cache', len(texts),
+                lambda: [normalize_artist_separators(t) for t in texts])
+    assert old == new
+
+    pairs = len(songs) * len(filenames)
+    print(f'filename match ({len(songs)} songs x {len(filenames)} files)')
+    old = timed('  legacy (normalize per pair)', pairs,
+                lambda: [legacy_filename_match(title, artist, name)
+                         for title, artist in songs for name in filenames])
+    normalize_artist_separators.cache_clear()
+
+    def run_current():
+        queries = [prepare_song_query(title, artist)
+                   for title, artist in songs]
+        return [current_filename_match(query, name)
+                for query in queries for name in filenames]
+    new = timed('  pre-normalized queries', pairs, run_current)
+    assert old == new
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+启动时间基准
+解析 python -X importtime 的输出统计 MusicPicker 的导入时间，并测量从启动进程到
+窗口第一次绘制、处理模块加载完成的时间；超过记录的预算、缺少预算或无法测量
+（例如没有显示器）时以状态码 1 退出
+
+用法：python benchmarks/bench_startup.py [--runs N] [--update] [--budget 文件]
+      没有显示器时使用 xvfb-run python benchmarks/bench_startup.py
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'startup_budget.json')
+
+# 窗口绘制前不允许导入的模块（应在第一次使用时才加载）
+DEFERRED_MODULES = ('mutagen', 'music_processor', 'metadata_processor',
+                    'playlist_generator', 'playlist_comparator',
+                    'library_watcher', 'concurrent.futures.process')
+
+# 超过预算的容差倍数（吸收机器负载带来的波动）
+TOLERANCE = 1.25
+
+# 在子进程中运行：打补丁输出时间点后调用 MusicPicker.main()
+_PROBE = r'''
+import sys, time
+import MusicPicker
+from gui import MusicPickerGUI
+
+_show = MusicPickerGUI.show
+_create_backends = MusicPicker.create_backends
+
+def show(self):
+    self.root.after_idle(
+        lambda: print('FIRST_FRAME', time.time(), flush=True))
+    _show(self)
+
+def create_backends(app, translator):
+    result = _create_backends(app, translator)
+    print('BACKENDS_READY', time.time(), flush=True)
+    app.root.after_idle(app.root.destroy)
+    return result
+
+MusicPickerGUI.show = show
+MusicPicker.create_backends = create_backends
+MusicPicker.main()
+'''
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        {模块名: (自身耗时微秒, 累计耗时微秒)}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        name = fields[2].strip()
+        modules[name] = (int(fields[0]), int(fields[1]))
+    return modules
+
+
+def measure_import(runs):
+    """多次测量 import MusicPicker，返回 (累计耗时中位数毫秒, 最后一次的模块表)"""
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import MusicPicker'],
+            cwd=ROOT, capture_output=True, text=True, check=True)
+        modules = parse_importtime(result.stderr)
+        totals.append(modules['MusicPicker'][1] / 1000)
+    return statistics.median(totals), modules
+
+
+def measure_first_frame(runs, tmp_dir):
+    """
+    测量从启动进程到第一次绘制和处理模块加载完成的时间
+
+    Returns:
+        (第一次绘制毫秒中位数, 处理模块加载完成毫秒中位数)；没有显示器等原因
+        未输出时间点时对应的值为 None
+    """
+    first_frames = []
+    backends = []
+    for _ in range(runs):
+        # 在临时目录运行，日志和数据库文件不写入项目目录
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        # 时间点使用挂钟时间，可以与子进程输出的时间直接比较
+        start = time.time()
+        result = subprocess.run(
+            [sys.executable, '-c', _PROBE], cwd=tmp_dir, env=env,
+            capture_output=True, text=True, timeout=60)
+        marks = {}
+        for line in result.stdout.splitlines():
+            name, _, value = line.partition(' ')
+            if name in ('FIRST_FRAME', 'BACKENDS_READY'):
+                marks[name] = float(value)
+        if 'FIRST_FRAME' not in marks:
+            return None, None
+        first_frames.append((marks['FIRST_FRAME'] - start) * 1000)
+        if 'BACKENDS_READY' not in marks:
+            return statistics.median(first_frames), None
+        backends.append((marks['BACKENDS_READY'] - start) * 1000)
+    return statistics.median(first_frames), statistics.median(backends)
+
+
+def check(name, value, budget):
+    """比较测量值与预算，返回是否通过（缺少测量值或预算时不通过）"""
+    if value is None:
+        print(f'{name:<20} not measured  FAILED')
+        return False
+    if budget is None:
+        print(f'{name:<20} {value:8.1f} ms  no budget recorded (run --update)'
+              f'  FAILED')
+        return False
+    limit = budget * TOLERANCE
+    passed = value <= limit
+    print(f'{name:<20} {value:8.1f} ms  budget {budget:.1f} ms '
+          f'(limit {limit:.1f})  {"ok" if passed else "REGRESSED"}')
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', default=DEFAULT_BUDGET)
+    parser.add_argument('--update', action='store_true',
+                        help='把本次测量值写入预算文件')
+    args = parser.parse_args()
+
+    import_ms, modules = measure_import(args.runs)
+    print('slowest modules imported before the first frame (self time):')
+    for name, (self_us, _) in sorted(
+            modules.items(), key=lambda item: -item[1][0])[:10]:
+        print(f'  {self_us / 1000:7.2f} ms  {name}')
+
+    eager = [name for name in modules
+             if name.split('.')[0] in DEFERRED_MODULES
+             or name in DEFERRED_MODULES]
+    if eager:
+        print(f'modules that should load on first use: {", ".join(eager)}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first_frame_ms, backends_ms = measure_first_frame(args.runs, tmp_dir)
+
+    measured = {'import_ms': round(import_ms, 1),
+                'first_frame_ms': first_frame_ms and round(first_frame_ms, 1),
+                'backends_ready_ms': backends_ms and round(backends_ms, 1)}
+    missing = [name for name, value in measured.items() if value is None]
+    if args.update:
+        if missing:
+            # 不写入空预算，否则以后的检查无法发现回退
+            print(f'not measured: {", ".join(missing)} '
+                  f'(needs a display, e.g. xvfb-run); budget not written')
+            return 1
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(measured, f, indent=2)
+            f.write('\n')
+        print(f'budget written to {args.budget}')
+        return 0
+
+    budget = {}
+    if os.path.exists(args.budget):
+        with open(args.budget, encoding='utf-8') as f:
+            budget = json.load(f)
+    passed = not eager
+    for name, value in measured.items():
+        passed = check(name, value, budget.get(name)) and passed
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+标签读取基准
+在带大封面的 MP3、FLAC 和 M4A 文件上对比完整解析（mutagen.File）与快速标签读取
+（tag_reader）的吞吐量和内存峰值，并检查两种方式读取的标签相同
+
+用法：python benchmarks/bench_tag_reader.py [--files N] [--art-kb N]
+      [--rounds N] [--work-dir 文件夹]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_library import build_flac, build_m4a, build_mp3  # noqa: E402
+from metadata_processor import read_metadata  # noqa: E402
+from tag_reader import FIELD_TAG_KEYS  # noqa: E402
+
+# 每个格式的静音音频帧数（MP3）
+MP3_FRAMES = 2000
+
+
+def make_files(directory, files, art_kb, seed=0):
+    """生成带封面的测试文件，返回 {格式: [路径]}"""
+    rng = random.Random(seed)
+    paths = {'.mp3': [], '.flac': [], '.m4a': []}
+    for index in range(files):
+        picture = rng.randbytes(art_kb * 1024)
+        title, artist, album = f'Song {index}', f'Artist {index % 50}', 'Album'
+        for ext, data in (
+                ('.mp3', build_mp3(title, artist, album, index + 1,
+                                   frames=MP3_FRAMES, picture=picture)),
+                ('.flac', build_flac(title, artist, album, index + 1, 240,
+                                     picture=picture)),
+                ('.m4a', build_m4a(title, artist, album, index + 1, 240,
+                                   picture=picture))):
+            path = os.path.join(directory, f'{index}{ext}')
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths[ext].append(path)
+    return paths
+
+
+def measure(paths, fast, rounds):
+    """最快一轮的用时（秒）和单个文件读取的内存峰值（字节）"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for path in paths:
+            read_metadata(path, fast=fast)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+
+    tracemalloc.start()
+    peak = 0
+    for path in paths[:5]:
+        tracemalloc.reset_peak()
+        read_metadata(path, fast=fast)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return best, peak
+
+
+def same_tags(paths):
+    """两种方式读取的标签字段是否相同"""
+    for path in paths:
+        full = read_metadata(path, fast=False)
+        fast = read_metadata(path, fast=True)
+        for field in FIELD_TAG_KEYS:
+            if getattr(full, field) != getattr(fast, field):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=100,
+                        help='每种格式的文件数')
+    parser.add_argument('--art-kb', type=int, default=2048,
+                        help='封面大小（KB）')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--work-dir', help='测试文件存放位置（默认临时文件夹）')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_tags_', dir=args.work_dir)
+    try:
+        paths = make_files(directory, args.files, args.art_kb)
+        # 先读一遍，两种方式都在页缓存中比较
+        for group in paths.values():
+            for path in group:
+                with open(path, 'rb') as f:
+                    while f.read(1024 * 1024):
+                        pass
+
+        print(f'{args.files} files per format, {args.art_kb} KB cover art')
+        print(f"{'format':8}{'full files/s':>14}{'fast files/s':>14}"
+              f"{'speedup':>9}{'full peak':>12}{'fast peak':>12}  same")
+        for ext, group in paths.items():
+            full_seconds, full_peak = measure(group, False, args.rounds)
+            fast_seconds, fast_peak = measure(group, True, args.rounds)
+            print(f'{ext[1:]:8}{len(group) / full_seconds:>14.0f}'
+                  f'{len(group) / fast_seconds:>14.0f}'
+                  f'{full_seconds / fast_seconds:>8.1f}x'
+                  f'{full_peak / 1024:>9.0f} KB{fast_peak / 1024:>9.0f} KB'
+                  f"  {'yes' if same_tags(group) else 'NO'}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
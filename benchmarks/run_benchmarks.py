@@ -0,0 +1,258 @@
+"""
+热点路径基准套件
+在合成音乐库（见 synthetic_library.py）上测量歌曲挑选、元数据读取、歌单生成、
+歌单比较、重复文件查找和相似歌曲查找的耗时，结果写入 JSON
+
+合成音乐库按 (文件数, 随机种子) 缓存在工作目录中，重复运行时直接复用。
+平方复杂度的基准在比较次数超过 --max-pairs 时跳过并在结果中注明。
+
+用法：python benchmarks/run_benchmarks.py [--sizes 1000,10000,100000]
+      [--only 名称,...] [--output 结果.json] [--work-dir 文件夹]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_library import generate_library  # noqa: E402
+from translator import Translator  # noqa: E402
+from music_processor import MusicProcessor  # noqa: E402
+from metadata_processor import MetadataProcessor  # noqa: E402
+from playlist_generator import PlaylistGenerator  # noqa: E402
+from playlist_comparator import PlaylistComparator  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_MAX_PAIRS = 20_000_000
+
+
+def _discard(message, level='info'):
+    """丢弃处理过程中的界面消息"""
+
+
+class BenchContext:
+    """一个规模下所有基准共用的数据"""
+
+    def __init__(self, library, work_dir, max_pairs):
+        self.library = library
+        self.work_dir = work_dir
+        self.max_pairs = max_pairs
+        self.translator = Translator()
+        self.metadata = None        # extract_metadata 的结果
+        self.playlist_file = None   # generate_playlist_from_folder 的输出
+
+    def metadata_list(self):
+        """音乐库所有文件的元数据（只读取一次）"""
+        if self.metadata is None:
+            processor = MetadataProcessor(self.translator, _discard)
+            self.metadata = [processor.extract_metadata(track.path)
+                             for track in self.library.tracks]
+        return self.metadata
+
+    def generated_playlist(self):
+        """由整个音乐库生成的歌单（只生成一次）"""
+        if self.playlist_file is None:
+            bench_generate_playlist(self)
+        return self.playlist_file
+
+
+def bench_find_and_copy(context, use_metadata=False):
+    """find_and_copy_songs：扫描、索引、匹配并复制歌单中的歌曲"""
+    output = os.path.join(context.work_dir, 'picked')
+    shutil.rmtree(output, ignore_errors=True)
+    processor = MusicProcessor(context.translator, _discard)
+    if use_metadata:
+        processor.set_metadata_processor(
+            MetadataProcessor(context.translator, _discard))
+        processor.set_use_metadata_matching(True)
+    processor.is_running = True
+    songs = processor.parse_song_list(context.library.list_file)
+    snapshots = []
+    started = time.perf_counter()
+    processor.find_and_copy_songs(
+        songs, context.library.root, output, snapshots.append)
+    seconds = time.perf_counter() - started
+    shutil.rmtree(output, ignore_errors=True)
+    last = snapshots[-1] if snapshots else None
+    return {'seconds': seconds,
+            'items': last.files_scanned if last else 0,
+            'songs': len(songs),
+            'songs_matched': last.songs_matched if last else 0}
+
+
+def bench_find_and_copy_metadata(context):
+    """find_and_copy_songs（元数据匹配）"""
+    return bench_find_and_copy(context, use_metadata=True)
+
+
+def bench_extract_metadata(context):
+    """extract_metadata：逐个读取所有文件的标签（不使用缓存）"""
+    processor = MetadataProcessor(context.translator, _discard)
+    paths = [track.path for track in context.library.tracks]
+    started = time.perf_counter()
+    metadata = [processor.extract_metadata(path) for path in paths]
+    seconds = time.perf_counter() - started
+    context.metadata = metadata
+    return {'seconds': seconds, 'items': len(paths),
+            'with_tags': sum(1 for item in metadata if item and item.title)}
+
+
+def bench_generate_playlist(context):
+    """generate_playlist_from_folder：按元数据为整个音乐库生成歌单"""
+    output = os.path.join(context.work_dir, 'generated.txt')
+    generator = PlaylistGenerator(
+        MetadataProcessor(context.translator, _discard),
+        context.translator, _discard)
+    started = time.perf_counter()
+    success = generator.generate_playlist_from_folder(
+        context.library.root, output, use_metadata=True)
+    seconds = time.perf_counter() - started
+    context.playlist_file = output
+    return {'seconds': seconds, 'items': len(context.library.tracks),
+            'success': bool(success)}
+
+
+def bench_compare_playlists(context):
+    """compare_playlists：整个音乐库的歌单与比较用歌单"""
+    playlist = context.generated_playlist()
+    report_dir = os.path.join(context.work_dir, 'compare_report')
+    shutil.rmtree(report_dir, ignore_errors=True)
+    comparator = PlaylistComparator(context.translator, _discard)
+    started = time.perf_counter()
+    result = comparator.compare_playlists(
+        playlist, context.library.compare_file, report_dir)
+    seconds = time.perf_counter() - started
+    stats = result.get('stats', {}) if result else {}
+    return {'seconds': seconds,
+            'items': result['playlist1']['total'] if result else 0,
+            'common': stats.get('common_count', 0)}
+
+
+def bench_find_duplicates(context):
+    """find_duplicates：默认阈值下查找重复文件"""
+    metadata = [item for item in context.metadata_list() if item]
+    processor = MetadataProcessor(context.translator, _discard)
+    started = time.perf_counter()
+    groups = processor.find_duplicates(metadata)
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(metadata),
+            'groups': len(groups)}
+
+
+def bench_find_similar_songs(context):
+    """find_similar_songs：整个音乐库的歌单与比较用歌单的差集两两比较"""
+    comparator = PlaylistComparator(context.translator, _discard)
+    songs1 = comparator.parse_playlist_file(context.generated_playlist())
+    songs2 = comparator.parse_playlist_file(context.library.compare_file)
+    pairs = len(songs1 - songs2) * len(songs2 - songs1)
+    if pairs > context.max_pairs:
+        return {'skipped': f'{pairs} pairs exceeds --max-pairs',
+                'items': len(songs1) + len(songs2)}
+    started = time.perf_counter()
+    similar = comparator.find_similar_songs(songs1, songs2)
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(songs1) + len(songs2),
+            'pairs': pairs, 'similar': len(similar)}
+
+
+BENCHMARKS = {
+    'find_and_copy_songs': bench_find_and_copy,
+    'find_and_copy_songs_metadata': bench_find_and_copy_metadata,
+    'extract_metadata': bench_extract_metadata,
+    'generate_playlist_from_folder': bench_generate_playlist,
+    'compare_playlists': bench_compare_playlists,
+    'find_duplicates': bench_find_duplicates,
+    'find_similar_songs': bench_find_similar_songs,
+}
+
+
+def prepare_library(work_dir, files, seed, regenerate=False):
+    """生成或复用合成音乐库"""
+    root = os.path.join(work_dir, f'library-{files}-{seed}')
+    marker = os.path.join(root, 'library.json')
+    if regenerate:
+        shutil.rmtree(root, ignore_errors=True)
+    if os.path.exists(marker):
+        from synthetic_library import SyntheticLibrary, Track
+        with open(marker, encoding='utf-8') as f:
+            data = json.load(f)
+        return SyntheticLibrary(
+            data['root'], [Track(*track) for track in data['tracks']],
+            data['list_file'], data['compare_file']), 0.0
+
+    shutil.rmtree(root, ignore_errors=True)
+    started = time.perf_counter()
+    library = generate_library(root, files, seed)
+    seconds = time.perf_counter() - started
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(library._asdict(), f, ensure_ascii=False)
+    return library, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='音乐库文件数，逗号分隔')
+    parser.add_argument('--only', help='只运行指定的基准，逗号分隔')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', default=os.path.join(
+        tempfile.gettempdir(), 'music_picker_bench'))
+    parser.add_argument('--output', help='结果 JSON 文件（默认写入工作目录）')
+    parser.add_argument('--max-pairs', type=int, default=DEFAULT_MAX_PAIRS,
+                        help='平方复杂度基准允许的最大比较次数')
+    parser.add_argument('--regenerate', action='store_true',
+                        help='重新生成合成音乐库')
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS)
+    if args.only:
+        names = [name.strip() for name in args.only.split(',')]
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f'unknown benchmarks: {", ".join(unknown)}')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    results = []
+    for files in sizes:
+        library, generate_seconds = prepare_library(
+            args.work_dir, files, args.seed, args.regenerate)
+        print(f'library {files} files'
+              + (f' (generated in {generate_seconds:.1f} s)'
+                 if generate_seconds else ' (cached)'), flush=True)
+        context = BenchContext(
+            library, os.path.dirname(library.root), args.max_pairs)
+        for name in names:
+            result = BENCHMARKS[name](context)
+            result = {'benchmark': name, 'files': files, **result}
+            if 'seconds' in result and result['seconds'] > 0:
+                result['rate'] = result['items'] / result['seconds']
+                print(f'  {name:<30} {result["seconds"]:9.3f} s '
+                      f'{result["rate"]:12.0f} items/s', flush=True)
+            else:
+                print(f'  {name:<30} skipped: {result.get("skipped")}',
+                      flush=True)
+            results.append(result)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    output = args.output or os.path.join(args.work_dir, 'results.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+合成音乐库生成器
+按固定随机种子生成可复现的测试音乐库：体积很小但格式有效的 MP3/FLAC/M4A 文件，
+带有真实的标题、艺术家和专辑标签，文件名混合中英文，多位艺术家在标签中用 / 分隔、
+在文件名中用 _ 分隔；同时生成可匹配的歌单文件
+
+文件内容直接按格式拼装，不依赖 mutagen，相同参数生成的文件逐字节相同
+
+用法：python benchmarks/synthetic_library.py 输出文件夹 [--files N] [--seed N]
+"""
+import os
+import sys
+import json
+import random
+import struct
+import argparse
+from typing import List, NamedTuple
+
+_LATIN_WORDS = [
+    'love', 'sun', 'moon', 'star', 'rain', 'blue', 'heart', 'fire', 'night',
+    'dream', 'summer', 'river', 'light', 'shadow', 'ocean', 'city', 'road',
+    'gold', 'winter', 'paper', 'silver', 'echo', 'wild', 'home', 'sky']
+_CJK_WORDS = [
+    '告白', '气球', '夜曲', '七里香', '晴天', '稻香', '十年', '后来', '光年',
+    '月亮', '海边', '春天', '雨季', '远方', '青花', '红豆', '星空', '烟火']
+_LATIN_ARTISTS = [
+    'Taylor Swift', 'Adele', 'Coldplay', 'Ed Sheeran', 'Norah Jones',
+    'Daft Punk', 'Bruno Mars', 'Lana Del Rey', 'The Weeknd', 'Sia']
+_CJK_ARTISTS = [
+    '周杰伦', '陈奕迅', '王菲', '林俊杰', '邓紫棋', '孙燕姿', '五月天',
+    '李荣浩', '张学友', '莫文蔚']
+_SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'su', 'te', 'no', 'vi', 'an', 'el',
+              'ou', 'zi', 'pa', 'de', 'yu', 'ko']
+
+# 格式及其权重
+_FORMATS = (('.mp3', 5), ('.flac', 3), ('.m4a', 2))
+# MPEG-1 Layer III 比特率索引 -> kbps
+_MP3_BITRATES = {9: 128, 11: 192, 14: 320}
+
+SAMPLE_RATE = 44100
+
+
+class Track(NamedTuple):
+    """生成的一首歌曲"""
+    path: str
+    title: str
+    artist: str        # 标签中的艺术家（多位艺术家用 / 分隔）
+    album: str
+    duration: int      # 秒
+
+
+class SyntheticLibrary(NamedTuple):
+    """生成结果"""
+    root: str
+    tracks: List[Track]
+    list_file: str           # 挑选用歌单（包含少量不存在的歌曲）
+    compare_file: str        # 与 list_file 部分重叠的歌单，用于比较
+
+
+# ---------------------------------------------------------------- 文件格式
+
+def _syncsafe(value: int) -> bytes:
+    """ID3v2.4 同步安全整数"""
+    return bytes(((value >> 21) & 0x7F, (value >> 14) & 0x7F,
+                  (value >> 7) & 0x7F, value & 0x7F))
+
+
+def _id3_text_frame(frame_id: str, text: str) -> bytes:
+    payload = b'\x03' + text.encode('utf-8')   # 编码 3 = UTF-8
+    return (frame_id.encode('ascii') + _syncsafe(len(payload)) +
+            b'\x00\x00' + payload)
+
+
+def build_mp3(title: str, artist: str, album: str, track_number: int,
+              bitrate_index: int = 9, frames: int = 4,
+              picture: bytes = b'') -> bytes:
+    """ID3v2.4 标签（可带 APIC 封面）+ 若干个静音 MPEG-1 Layer III 帧"""
+    tag_body = b''.join((
+        _id3_text_frame('TIT2', title),
+        _id3_text_frame('TPE1', artist),
+        _id3_text_frame('TALB', album),
+        _id3_text_frame('TRCK', str(track_number)),
+    ))
+    if picture:
+        # 编码 0、MIME、图片类型 3（封面）、空描述
+        payload = b'\x00image/jpeg\x00\x03\x00' + picture
+        tag_body += b'APIC' + _syncsafe(len(payload)) + b'\x00\x00' + payload
+    tag = b'ID3\x04\x00\x00' + _syncsafe(len(tag_body)) + tag_body
+    kbps = _MP3_BITRATES[bitrate_index]
+    frame_size = 144 * kbps * 1000 // SAMPLE_RATE
+    header = bytes((0xFF, 0xFB, (bitrate_index << 4), 0x64))
+    frame = header + b'\x00' * (frame_size - len(header))
+    return tag + frame * frames
+
+
+def _flac_block(block_type: int, data: bytes, last: bool) -> bytes:
+    return (bytes(((0x80 if last else 0) | block_type,)) +
+            len(data).to_bytes(3, 'big') + data)
+
+
+def build_flac(title: str, artist: str, album: str, track_number: int,
+               duration: int, picture: bytes = b'') -> bytes:
+    """STREAMINFO + VORBIS_COMMENT（+ PICTURE 封面），不包含音频帧"""
+    samples = duration * SAMPLE_RATE
+    packed = (SAMPLE_RATE << 44) | (1 << 41) | (15 << 36) | samples
+    streaminfo = (struct.pack('>HH', 4096, 4096) + b'\x00' * 6 +
+                  packed.to_bytes(8, 'big') + b'\x00' * 16)
+    vendor = b'synthetic'
+    comments = [f'TITLE={title}', f'ARTIST={artist}', f'ALBUM={album}',
+                f'TRACKNUMBER={track_number}']
+    vorbis = struct.pack('<I', len(vendor)) + vendor
+    vorbis += struct.pack('<I', len(comments))
+    for comment in comments:
+        encoded = comment.encode('utf-8')
+        vorbis += struct.pack('<I', len(encoded)) + encoded
+    blocks = b'fLaC' + _flac_block(0, streaminfo, False)
+    if not picture:
+        return blocks + _flac_block(4, vorbis, True)
+    mime = b'image/jpeg'
+    picture_block = (struct.pack('>II', 3, len(mime)) + mime +
+                     struct.pack('>5I', 0, 500, 500, 24, 0) +
+                     struct.pack('>I', len(picture)) + picture)
+    return (blocks + _flac_block(4, vorbis, False) +
+            _flac_block(6, picture_block, True))
+
+
+def _atom(name: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data) + 8) + name + data
+
+
+def _full_atom(name: bytes, data: bytes) -> bytes:
+    return _atom(name, b'\x00\x00\x00\x00' + data)
+
+
+def _mp4_text(name: bytes, text: str) -> bytes:
+    return _atom(name, _atom(b'data', struct.pack('>II', 1, 0) +
+                             text.encode('utf-8')))
+
+
+def build_m4a(title: str, artist: str, album: str, track_number: int,
+              duration: int, picture: bytes = b'') -> bytes:
+    """ftyp + moov（音频轨道和 iTunes 标签，可带 covr 封面）+ 空 mdat"""
+    timescale = SAMPLE_RATE
+    mvhd = _full_atom(b'mvhd', struct.pack(
+        '>IIII', 0, 0, timescale, duration * timescale) +
+        struct.pack('>IH', 0x00010000, 0x0100) + b'\x00' * 10 +
+        struct.pack('>9I', 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000) +
+        b'\x00' * 24 + struct.pack('>I', 2))
+    mdhd = _full_atom(b'mdhd', struct.pack(
+        '>IIII', 0, 0, timescale, duration * timescale) + b'\x55\xc4\x00\x00')
+    hdlr = _full_atom(b'hdlr', b'\x00' * 4 + b'soun' + b'\x00' * 12 + b'\x00')
+    trak = _atom(b'trak', _atom(b'mdia', mdhd + hdlr))
+    ilst = _atom(b'ilst', b''.join((
+        _mp4_text(b'\xa9nam', title),
+        _mp4_text(b'\xa9ART', artist),
+        _mp4_text(b'\xa9alb', album),
+        _atom(b'trkn', _atom(b'data', struct.pack('>II', 0, 0) +
+                             struct.pack('>HHHH', 0, track_number, 0, 0))),
+        # 数据类型 13 = JPEG
+        _atom(b'covr', _atom(b'data', struct.pack('>II', 13, 0) + picture))
+        if picture else b'',
+    )))
+    meta_hdlr = _full_atom(b'hdlr', b'\x00' * 4 + b'mdir' + b'appl' +
+                           b'\x00' * 8 + b'\x00')
+    udta = _atom(b'udta', _full_atom(b'meta', meta_hdlr + ilst))
+    ftyp = _atom(b'ftyp', b'M4A ' + struct.pack('>I', 0) + b'M4A mp42isom')
+    return ftyp + _atom(b'moov', mvhd + trak + udta) + _atom(b'mdat', b'')
+
+
+# ---------------------------------------------------------------- 音乐库
+
+def _make_title(rng: random.Random) -> str:
+    """1-2 个常用词加一个生成词，中英文混合"""
+    words = rng.sample(_LATIN_WORDS + _CJK_WORDS, rng.randint(1, 2))
+    nonce = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3)))
+    words.insert(rng.randint(0, len(words)), nonce)
+    return ' '.join(words)
+
+
+def _make_artist(rng: random.Random) -> str:
+    """单个艺术家，约 15% 为多位艺术家（标签中用 / 分隔）"""
+    pool = _LATIN_ARTISTS + _CJK_ARTISTS
+    if rng.random() < 0.15:
+        return '/'.join(rng.sample(pool, 2))
+    return rng.choice(pool)
+
+
+def _safe_name(text: str) -> str:
+    """文件名中不能使用 /，多位艺术家之间改用 _"""
+    return text.replace('/', '_')
+
+
+def generate_library(root: str, files: int = 1000, seed: int = 0,
+                     list_size: int = None,
+                     duplicate_ratio: float = 0.05) -> SyntheticLibrary:
+    """
+    生成合成音乐库和歌单
+
+    Args:
+        root: 输出文件夹（音乐库在 root/library 下）
+        files: 音频文件数
+        seed: 随机种子
+        list_size: 歌单中的歌曲数，None 表示文件数的 1%（至少 20 首）
+        duplicate_ratio: 以其他格式重复出现的歌曲比例（用于重复文件和最佳音质）
+
+    Returns:
+        SyntheticLibrary
+    """
+    rng = random.Random(seed)
+    library_root = os.path.join(root, 'library')
+    tracks: List[Track] = []
+    albums_per_artist = {}
+    formats = [ext for ext, weight in _FORMATS for _ in range(weight)]
+
+    for index in range(files):
+        if tracks and rng.random() < duplicate_ratio:
+            # 同一首歌的另一个版本（不同格式或比特率）
+            original = rng.choice(tracks)
+            title, artist, album = original.title, original.artist, original.album
+        else:
+            title = _make_title(rng)
+            artist = _make_artist(rng)
+            album_count = albums_per_artist.setdefault(artist, rng.randint(1, 4))
+            album = f'{_safe_name(artist)} {rng.randint(1, album_count)}'
+        ext = rng.choice(formats)
+        duration = rng.randint(120, 360)
+        track_number = index % 20 + 1
+
+        separator = rng.choice((' - ', ' - ', ' - ', '-', '_'))
+        filename = f'{title}{separator}{_safe_name(artist)}'
+        if rng.random() < 0.1:
+            filename += ' (live)'
+        directory = os.path.join(library_root, _safe_name(artist), album)
+        path = os.path.join(directory, f'{filename} {index}{ext}')
+
+        if ext == '.mp3':
+            data = build_mp3(title, artist, album, track_number,
+                             rng.choice(list(_MP3_BITRATES)))
+        elif ext == '.flac':
+            data = build_flac(title, artist, album, track_number, duration)
+        else:
+            data = build_m4a(title, artist, album, track_number, duration)
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        tracks.append(Track(path, title, artist, album, duration))
+
+    # 歌单：大部分歌曲在音乐库中，少量不存在，少量要求最佳音质
+    if list_size is None:
+        list_size = max(20, files // 100)
+    picked = rng.sample(tracks, min(list_size, len(tracks)))
+    lines = []
+    for track in picked:
+        artist = track.artist if rng.random() < 0.5 else _safe_name(track.artist)
+        line = f'{track.title} - {artist}'
+        if rng.random() < 0.05:
+            line += ' [best]'
+        lines.append(line)
+    for _ in range(max(1, list_size // 20)):
+        lines.append(f'{_make_title(rng)} - {_make_artist(rng)}')
+    rng.shuffle(lines)
+
+    # 比较用歌单：一半与挑选用歌单相同，另一半来自音乐库中的其他歌曲
+    others = rng.sample(tracks, min(len(lines), len(tracks)))
+    compare_lines = lines[:len(lines) // 2] + [
+        f'{track.title} - {track.artist}' for track in others[len(lines) // 2:]]
+
+    list_file = os.path.join(root, 'list.txt')
+    compare_file = os.path.join(root, 'compare.txt')
+    with open(list_file, 'w', encoding='utf-8') as f:
+        f.write('# synthetic song list\n' + '\n'.join(lines) + '\n')
+    with open(compare_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(compare_lines) + '\n')
+    return SyntheticLibrary(library_root, tracks, list_file, compare_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help='输出文件夹')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--list-size', type=int)
+    args = parser.parse_args()
+
+    library = generate_library(args.output, args.files, args.seed,
+                               args.list_size)
+    json.dump({'root': library.root, 'files': len(library.tracks),
+               'list_file': library.list_file,
+               'compare_file': library.compare_file},
+              sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""
+命令行入口
+无界面运行歌曲挑选、歌单生成和歌单比较，整个过程不导入 tkinter
+
+用法:
+    python -m musicpicker pick 歌单.txt 音乐库 输出文件夹 [--metadata]
+    python -m musicpicker batch 音乐库 -j 歌单1.txt 输出1 -j 歌单2.txt 输出2
+    python -m musicpicker generate 音乐文件夹 歌单.txt [--metadata]
+    python -m musicpicker compare 歌单1.txt 歌单2.txt [--report-dir 文件夹]
+"""
+import os
+import sys
+import logging
+import argparse
+from translator import Translator, detect_system_language
+from utils import setup_logging
+from config import (APP_NAME, APP_VERSION, METADATA_CACHE_FILE,
+                    LIBRARY_SNAPSHOT_FILE, METRICS_TEXTFILE, LOG_VERBOSITY,
+                    LOG_VERBOSITY_LEVELS)
+
+logger = logging.getLogger(__name__)
+
+
+def _print_message(message, level='info'):
+    """输出处理消息（错误和警告输出到标准错误）"""
+    stream = sys.stdout if level == 'info' else sys.stderr
+    print(message, file=stream, flush=True)
+
+
+class _ProgressPrinter:
+    """在终端同一行刷新进度（标准错误不是终端时不输出）"""
+
+    def __init__(self, translator):
+        self.translator = translator
+        self.enabled = sys.stderr.isatty()
+        self.printed = False
+
+    def __call__(self, snapshot):
+        if not self.enabled:
+            return
+        if snapshot.eta is None:
+            eta_text = '--:--'
+        else:
+            minutes, seconds = divmod(int(snapshot.eta), 60)
+            eta_text = f"{minutes}:{seconds:02d}"
+        text = self.translator.t(
+            'progress_detail_format',
+            snapshot.files_scanned, snapshot.files_total,
+            snapshot.songs_matched, snapshot.songs_total,
+            snapshot.rate, eta_text)
+        sys.stderr.write('\r' + text + '\033[K')
+        sys.stderr.flush()
+        self.printed = True
+
+    def finish(self):
+        """结束进度行"""
+        if self.printed:
+            sys.stderr.write('\n')
+            sys.stderr.flush()
+
+
+def _open_metadata_cache(args):
+    """打开元数据缓存，不可用或被禁用时返回None"""
+    if args.no_cache:
+        return None
+    from metadata_cache import MetadataCache
+    try:
+        return MetadataCache(METADATA_CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"元数据缓存不可用: {e}")
+        return None
+
+
+def _open_library_snapshot(args):
+    """打开音乐库快照，不可用或被禁用时返回None"""
+    if args.no_snapshot:
+        return None
+    from library_snapshot import LibrarySnapshot
+    try:
+        return LibrarySnapshot(LIBRARY_SNAPSHOT_FILE)
+    except Exception as e:
+        logger.warning(f"音乐库快照不可用: {e}")
+        return None
+
+
+def _create_metadata_processor(translator, args):
+    """创建元数据处理器（附带缓存）"""
+    from metadata_processor import MetadataProcessor
+    return MetadataProcessor(
+        translator, _print_message, _open_metadata_cache(args))
+
+
+def _close_metadata_processor(metadata_processor):
+    """清理并关闭元数据缓存"""
+    cache = metadata_processor.cache if metadata_processor else None
+    if cache:
+        cache.vacuum()
+        cache.close()
+
+
+def _configure_processor(processor, args, translator):
+    """
+    按命令行选项设置音乐处理器
+
+    Returns:
+        退出时需要关闭的 (元数据处理器, 音乐库快照)
+    """
+    processor.set_output_mode(args.output_mode)
+    processor.set_sync_mode(args.sync, prune=args.prune, use_hash=args.hash)
+    processor.set_prefer_best_quality(args.best_quality)
+    processor.set_log_verbosity(args.file_log)
+
+    metadata_processor = None
+    if args.metadata:
+        metadata_processor = _create_metadata_processor(translator, args)
+        processor.set_metadata_processor(metadata_processor)
+        processor.set_use_metadata_matching(True)
+    library_snapshot = _open_library_snapshot(args)
+    processor.set_library_snapshot(library_snapshot)
+    return metadata_processor, library_snapshot
+
+
+def cmd_pick(args, translator) -> int:
+    """按歌单从音乐库挑选歌曲"""
+    from music_processor import MusicProcessor
+
+    if not os.path.isfile(args.song_list):
+        _print_message(translator.t('file_not_found', args.song_list), 'error')
+        return 1
+
+    processor = MusicProcessor(translator, _print_message)
+    metadata_processor, library_snapshot = _configure_processor(
+        processor, args, translator)
+
+    progress = _ProgressPrinter(translator)
+    try:
+        success = processor.start_processing(
+            args.song_list, args.library, args.output, progress)
+    except KeyboardInterrupt:
+        processor.stop_processing()
+        return 130
+    finally:
+        progress.finish()
+        _close_metadata_processor(metadata_processor)
+        if library_snapshot:
+            library_snapshot.close()
+    return 0 if success else 1
+
+
+def cmd_batch(args, translator) -> int:
+    """多个歌单共用一次音乐库扫描"""
+    from batch_processor import BatchProcessor
+
+    for song_list, _ in args.job:
+        if not os.path.isfile(song_list):
+            _print_message(translator.t('file_not_found', song_list), 'error')
+            return 1
+
+    processor = BatchProcessor(translator, _print_message)
+    metadata_processor, library_snapshot = _configure_processor(
+        processor, args, translator)
+
+    progress = _ProgressPrinter(translator)
+    try:
+        results = processor.start_batch(args.job, args.library, progress)
+    except KeyboardInterrupt:
+        processor.stop_processing()
+        return 130
+    finally:
+        progress.finish()
+        _close_metadata_processor(metadata_processor)
+        if library_snapshot:
+            library_snapshot.close()
+    return 0 if results is not None else 1
+
+
+def cmd_generate(args, translator) -> int:
+    """从音乐文件夹生成歌单"""
+    from playlist_generator import PlaylistGenerator
+
+    metadata_processor = None
+    if args.metadata:
+        metadata_processor = _create_metadata_processor(translator, args)
+    generator = PlaylistGenerator(
+        metadata_processor, translator, _print_message)
+    library_snapshot = _open_library_snapshot(args)
+    generator.set_library_snapshot(library_snapshot)
+
+    try:
+        success = generator.generate_playlist(
+            args.folder, args.output, args.metadata, not args.no_subdirs)
+    finally:
+        _close_metadata_processor(metadata_processor)
+        if library_snapshot:
+            library_snapshot.close()
+    return 0 if success else 1
+
+
+def cmd_compare(args, translator) -> int:
+    """比较两个歌单"""
+    from playlist_comparator import PlaylistComparator
+
+    comparator = PlaylistComparator(translator, _print_message)
+    result = comparator.compare_playlists(
+        args.playlist1, args.playlist2, args.report_dir)
+    return 0 if result else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    from copy_pipeline import OUTPUT_MODES
+
+    parser = argparse.ArgumentParser(
+        prog='musicpicker',
+        description=f'{APP_NAME} {APP_VERSION} 命令行模式（无界面）')
+    parser.add_argument('--lang', choices=('zh', 'en'),
+                        help='消息语言（默认跟随系统）')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='同时在控制台输出日志文件中的记录')
+    parser.add_argument('--metrics-file', default=METRICS_TEXTFILE,
+                        help='运行期间和结束时写入 Prometheus 文本格式指标的 '
+                             '.prom 文件（供 node_exporter textfile collector 读取）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pick = subparsers.add_parser('pick', help='按歌单从音乐库挑选歌曲')
+    pick.add_argument('song_list', help='歌单文件（每行 "歌名 - 歌手"）')
+    pick.add_argument('library', help='音乐库文件夹')
+    pick.add_argument('output', help='输出文件夹')
+    pick.set_defaults(handler=cmd_pick)
+
+    batch = subparsers.add_parser(
+        'batch', help='多个歌单共用一次音乐库扫描，分别输出到各自的文件夹')
+    batch.add_argument('library', help='音乐库文件夹')
+    batch.add_argument('-j', '--job', nargs=2, action='append', required=True,
+                       metavar=('SONG_LIST', 'OUTPUT'),
+                       help='歌单文件和对应的输出文件夹（可重复）')
+    batch.set_defaults(handler=cmd_batch)
+
+    for subparser in (pick, batch):
+        subparser.add_argument('--metadata', action='store_true',
+                               help='使用元数据匹配')
+        subparser.add_argument('--output-mode', choices=OUTPUT_MODES,
+                               default='copy', help='输出方式（默认 copy）')
+        subparser.add_argument('--sync', action='store_true',
+                               help='增量同步：只输出新增或变化的文件')
+        subparser.add_argument('--prune', action='store_true',
+                               help='增量同步时删除不再在歌单中的文件')
+        subparser.add_argument('--hash', action='store_true',
+                               help='增量同步时比较文件摘要')
+        subparser.add_argument('--best-quality', action='store_true',
+                               help='歌单中带 [best] 标记的歌曲选择最佳音质')
+        subparser.add_argument('--file-log', choices=LOG_VERBOSITY_LEVELS,
+                               default=LOG_VERBOSITY,
+                               help='逐个文件的匹配和输出日志：detailed 每个文件'
+                                    '一行，summary 定期汇总，auto 歌单较大时汇总'
+                                    f'（默认 {LOG_VERBOSITY}）')
+
+    generate = subparsers.add_parser('generate', help='从音乐文件夹生成歌单')
+    generate.add_argument('folder', help='音乐文件夹')
+    generate.add_argument('output', help='输出的歌单文件')
+    generate.add_argument('--metadata', action='store_true',
+                          help='优先使用元数据中的标题和艺术家')
+    generate.add_argument('--no-subdirs', action='store_true',
+                          help='不包含子文件夹')
+    generate.set_defaults(handler=cmd_generate)
+
+    compare = subparsers.add_parser('compare', help='比较两个歌单')
+    compare.add_argument('playlist1', help='第一个歌单文件')
+    compare.add_argument('playlist2', help='第二个歌单文件')
+    compare.add_argument('--report-dir',
+                         help='生成差异报告的文件夹（可选）')
+    compare.set_defaults(handler=cmd_compare)
+
+    for subparser in (pick, batch, generate):
+        subparser.add_argument('--no-cache', action='store_true',
+                               help='不使用元数据缓存')
+        subparser.add_argument('--no-snapshot', action='store_true',
+                               help='不使用音乐库快照，完整扫描')
+    return parser
+
+
+def main(argv=None) -> int:
+    """命令行主函数"""
+    args = build_parser().parse_args(argv)
+    setup_logging(console=args.verbose)
+    if args.metrics_file:
+        from metrics_exporter import register_textfile
+        register_textfile(args.metrics_file)
+
+    translator = Translator()
+    translator.set_language(args.lang or detect_system_language())
+    return args.handler(args, translator)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,6 @@
 """
 应用程序配置文件
 """
-import tkinter as tk
 
 # 应用程序信息
 APP_NAME = "MusicPicker"
@@ -15,14 +14,92 @@ WINDOW_MIN_SIZE = (850, 650)  # 增加最小窗口尺寸，确保所有内容可
 # 支持的音频格式
 SUPPORTED_AUDIO_FORMATS = ('.mp3', '.flac', '.wav', '.m4a', '.aac', '.ogg')
 
+# 音乐库扫描线程数（目录列举以IO为主，网络存储上并行效果明显）
+SCAN_WORKERS = 8
+# 每批建立索引并匹配的文件数，全部歌曲找到后不再扫描后续批次
+SCAN_CHUNK_SIZE = 1024
+
+# 歌单按块读取并流式解析，超过阈值的文件使用内存映射
+SONG_LIST_CHUNK_SIZE = 1024 * 1024
+SONG_LIST_MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# 音乐库快照数据库（保存目录列表，再次扫描时只重新列出变化的目录）
+LIBRARY_SNAPSHOT_FILE = 'music_picker_library.db'
+
+# 音乐库监视（仅 Linux）：列出的根目录在后台通过 inotify 保持最新，
+# 挑选歌曲时直接使用内存中的列表而无需扫描
+LIBRARY_WATCH_ROOTS = []
+LIBRARY_WATCH_RECONCILE_SECONDS = 1800  # 完整核对间隔（秒），弥补丢失的事件
+LIBRARY_WATCH_DEBOUNCE = 0.2            # 合并连续事件的等待时间（秒）
+
+# 歌单行以该标记结尾时表示优先选择最佳音质（需开启最佳音质模式）
+BEST_QUALITY_MARKER = '[best]'
+# 无损格式，最佳音质模式下优先于有损格式
+LOSSLESS_AUDIO_FORMATS = ('.flac', '.wav')
+
+# 复制流水线配置
+COPY_WORKERS = 4        # 复制线程数
+COPY_QUEUE_SIZE = 64    # 待复制队列容量，队列满时匹配阶段等待
+COPY_BUFFER_SIZE = 1024 * 1024  # 同一源文件写入多个目标时每次读取的字节数
+
+# 文本标准化结果缓存容量（条）
+NORMALIZE_CACHE_SIZE = 65536
+
+# 增量同步清单文件名（保存在输出文件夹中）
+SYNC_MANIFEST_FILE = '.musicpicker_manifest.json'
+
 # 元数据匹配相关配置
 METADATA_SIMILARITY_THRESHOLD = 0.8  # 元数据匹配相似度阈值
 METADATA_TITLE_WEIGHT = 0.7           # 标题权重
 METADATA_ARTIST_WEIGHT = 0.3          # 艺术家权重
 
+# 元数据缓存配置
+METADATA_CACHE_FILE = 'music_picker_cache.db'  # 元数据缓存数据库
+METADATA_CACHE_MAX_AGE_DAYS = 90               # 超过该天数未使用的记录将被清理
+METADATA_CACHE_VACUUM_INTERVAL_DAYS = 7        # 自动清理间隔（天）
+
+# 只读取标签区域，跳过封面图片和音频帧（时长和比特率在需要时再读取）
+METADATA_FAST_READ = True
+
+# 并行元数据读取配置
+METADATA_WORKERS = 0               # 进程数，0 表示使用CPU核心数
+METADATA_PARALLEL_MIN_FILES = 64   # 少于该数量的文件直接串行读取
+METADATA_BATCH_SIZE = 16           # 每个进程任务包含的文件数
+METADATA_PENDING_PER_WORKER = 4    # 每个进程允许的在途任务数
+
+# 进度刷新间隔（秒）
+PROGRESS_REFRESH_INTERVAL = 0.2
+
+# 后台任务：挑选、生成歌单和比较歌单共用的线程数，
+# 以及同时运行的 IO 密集任务数（扫描音乐库、读取标签、复制文件）
+TASK_WORKERS = 4
+TASK_IO_LIMIT = 1
+TASK_SHUTDOWN_TIMEOUT = 10  # 退出时等待每个任务结束的最长秒数
+
 # 日志配置
 LOG_FILE = 'music_picker.log'
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# 日志由后台线程写入；文件超过大小（字节）后轮转为 .1、.2 ...，保留的旧文件数
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# 逐个文件的匹配和输出日志：'detailed' 每个文件一行，'summary' 按间隔（秒）
+# 输出汇总，'auto' 在歌曲数超过 LOG_SUMMARY_MIN_SONGS 时使用汇总
+LOG_VERBOSITY = 'auto'
+LOG_VERBOSITY_LEVELS = ('auto', 'detailed', 'summary')
+LOG_SUMMARY_MIN_SONGS = 500
+LOG_SUMMARY_INTERVAL = 5
+
+# 运行报告：每次运行结束后在日志文件所在目录写出各阶段耗时（JSON）
+RUN_REPORT_ENABLED = True
+RUN_REPORT_FILE = 'music_picker_report.json'
+# Prometheus 文本文件指标（供 node_exporter textfile collector 读取），
+# 为空时不输出；命令行可用 --metrics-file 指定。运行期间按间隔（秒）更新
+METRICS_TEXTFILE = ''
+METRICS_INTERVAL = 15
+
+# 界面日志区域：消息排队后按间隔（毫秒）批量显示，只保留最近的行数
+LOG_VIEW_REFRESH_MS = 50
+LOG_VIEW_MAX_LINES = 5000
 
 # 界面配置
 BUTTON_WIDTH = 5
@@ -33,23 +110,22 @@ MAIN_PADDING = 15
 # 统一的字体配置 - 所有文字使用相同大小
 
 
-def get_font_config():
-    """获取字体配置，统一字体大小"""
-    try:
-        # 创建临时根窗口来检测DPI
-        temp_root = tk.Tk()
-        temp_root.withdraw()  # 隐藏窗口
+def get_font_config(root):
+    """
+    获取字体配置，统一字体大小
 
+    Args:
+        root: 界面的 Tk 根窗口，用于检测DPI
+    """
+    try:
         # 获取DPI缩放比例
-        dpi = temp_root.winfo_fpixels('1i')
+        dpi = root.winfo_fpixels('1i')
         scale_factor = max(1.0, dpi / 96.0)  # 最小缩放比例为1.0
 
         # 统一的字体大小 - 所有界面元素使用相同大小
         unified_size = max(11, int(12 * scale_factor))  # 统一使用12号字体
         button_size = max(12, int(13 * scale_factor))   # 按钮稍大一点
 
-        temp_root.destroy()
-
         # 字体配置 - 统一字体大小
         fonts = {
             'main': ('Microsoft YaHei UI', unified_size),           # 主要文字
@@ -75,8 +151,14 @@ def get_font_config():
         }
 
 
-# 获取字体配置
-FONTS = get_font_config()
+# 字体配置：DPI 检测需要 Tk 根窗口，由界面创建窗口后调用 init_fonts 填充，
+# 命令行和处理模块导入 config 时不会初始化 Tk
+FONTS = {}
+
+
+def init_fonts(root):
+    """根据界面根窗口的DPI填充 FONTS（原地更新，已导入的引用同样生效）"""
+    FONTS.update(get_font_config(root))
 
 # 简化的颜色配置
 COLORS = {
@@ -0,0 +1,378 @@
+"""
+文件复制流水线模块
+匹配阶段将待复制文件放入有界队列，由复制线程池并行处理，
+支持复制、硬链接、写时复制和符号链接四种输出方式
+"""
+import os
+import sys
+import errno
+import queue
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from config import (COPY_WORKERS, COPY_QUEUE_SIZE, COPY_BUFFER_SIZE,
+                    LOG_SUMMARY_INTERVAL)
+
+# 输出方式：复制、硬链接、写时复制（reflink）、符号链接
+OUTPUT_MODES = ('copy', 'hardlink', 'reflink', 'symlink')
+
+# Linux ioctl FICLONE（_IOW(0x94, 9, int)）
+FICLONE = 0x40049409
+
+# 无法创建链接、应降级为复制的错误：跨设备、文件系统不支持或不允许链接、
+# 链接数达到上限；Windows 下没有创建符号链接的权限（ERROR_PRIVILEGE_NOT_HELD）
+_LINK_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.ENOTSUP,
+                            errno.EOPNOTSUPP, errno.EMLINK}
+_WINERROR_PRIVILEGE_NOT_HELD = 1314
+
+
+def _link_unsupported(error: OSError) -> bool:
+    """链接失败是否因为不支持（目标已存在等其他错误应作为输出失败报告）"""
+    if getattr(error, 'winerror', None) == _WINERROR_PRIVILEGE_NOT_HELD:
+        return True
+    return error.errno in _LINK_UNSUPPORTED_ERRNOS
+
+
+def _reflink(source: str, destination: str) -> str:
+    """
+    尝试写时复制，失败时依次降级到 copy_file_range 和普通复制
+
+    Returns:
+        实际使用的方式（'reflink' 或 'copy'）
+    """
+    if not sys.platform.startswith('linux'):
+        shutil.copy2(source, destination)
+        return 'copy'
+
+    import fcntl
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            mode = 'reflink'
+        except OSError:
+            # 跨设备或文件系统不支持克隆：由内核完成复制，避免经过用户态
+            mode = 'copy'
+            remaining = os.fstat(src.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(
+                        src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+                shutil.copyfileobj(src, dst)
+    shutil.copystat(source, destination)
+    return mode
+
+
+def transfer_file(source: str, destination: str, mode: str = 'copy') -> str:
+    """
+    按指定方式输出文件，不支持链接时自动降级为复制
+
+    Args:
+        source: 源文件路径
+        destination: 目标文件路径
+        mode: 输出方式，取值见 OUTPUT_MODES
+
+    Returns:
+        实际使用的输出方式
+
+    Raises:
+        OSError: 输出失败（包括目标已存在等不应降级的链接错误）
+    """
+    if mode == 'hardlink':
+        try:
+            os.link(source, destination)
+            return 'hardlink'
+        except OSError as e:
+            # 跨设备、文件系统不支持或权限不足时降级
+            if not _link_unsupported(e):
+                raise
+    elif mode == 'symlink':
+        try:
+            os.symlink(os.path.abspath(source), destination)
+            return 'symlink'
+        except OSError as e:
+            # Windows 下创建符号链接可能需要管理员权限
+            if not _link_unsupported(e):
+                raise
+    elif mode == 'reflink':
+        return _reflink(source, destination)
+
+    shutil.copy2(source, destination)
+    return 'copy'
+
+
+def copy_to_many(source: str, destinations: List[str],
+                 buffer_size: int = COPY_BUFFER_SIZE
+                 ) -> List[Optional[Exception]]:
+    """
+    源文件只读取一次，同时写入多个目标文件（每个目标等同于 shutil.copy2）
+
+    Args:
+        source: 源文件路径
+        destinations: 目标文件路径列表
+        buffer_size: 每次读取的字节数
+
+    Returns:
+        与目标列表对应的错误，成功的目标为None；源文件无法读取时直接抛出异常
+    """
+    errors: List[Optional[Exception]] = [None] * len(destinations)
+    with open(source, 'rb') as src:
+        outputs = []
+        for index, destination in enumerate(destinations):
+            try:
+                outputs.append((index, open(destination, 'wb')))
+            except OSError as e:
+                errors[index] = e
+        try:
+            while outputs:
+                chunk = src.read(buffer_size)
+                if not chunk:
+                    break
+                for output in list(outputs):
+                    try:
+                        output[1].write(chunk)
+                    except OSError as e:
+                        # 写入失败的目标不再接收后续数据
+                        errors[output[0]] = e
+                        output[1].close()
+                        outputs.remove(output)
+        finally:
+            for index, dst in outputs:
+                try:
+                    dst.close()
+                except OSError as e:
+                    errors[index] = e
+
+    for index, destination in enumerate(destinations):
+        if errors[index] is None:
+            try:
+                shutil.copystat(source, destination)
+            except OSError as e:
+                errors[index] = e
+    return errors
+
+
+class CopyJob(NamedTuple):
+    """单个复制任务"""
+    source: str
+    destination: str
+    label: str  # 歌单中的原始行，用于日志
+    replace: bool = False  # 是否先删除已存在的目标文件（增量同步更新）
+
+
+class CopyFailure(NamedTuple):
+    """复制失败记录"""
+    job: CopyJob
+    error: str
+
+
+class CopyPipeline:
+    """有界队列 + 复制线程池"""
+
+    def __init__(self, translator, log_message,
+                 workers: int = COPY_WORKERS,
+                 queue_size: int = COPY_QUEUE_SIZE,
+                 output_mode: str = 'copy',
+                 on_copied: Optional[Callable[[CopyJob, str], None]] = None,
+                 per_file_log: bool = True,
+                 summary_interval: float = LOG_SUMMARY_INTERVAL):
+        """
+        初始化复制流水线
+
+        Args:
+            translator: 翻译器实例
+            log_message: 日志函数，签名为 (message, level='info')
+            workers: 复制线程数
+            queue_size: 队列容量，队列满时匹配阶段会等待
+            output_mode: 输出方式，取值见 OUTPUT_MODES
+            on_copied: 每个文件输出成功后在复制线程中调用，参数为 (任务, 实际输出方式)
+            per_file_log: 是否为每个输出的文件记录一行日志，否则按间隔输出汇总
+            summary_interval: 汇总日志的间隔（秒）
+        """
+        self.translator = translator
+        self.log_message = log_message
+        self.output_mode = output_mode
+        self.on_copied = on_copied
+        self.per_file_log = per_file_log
+        self.summary_interval = summary_interval
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+        self.files_copied = 0
+        self.bytes_copied = 0
+        self.mode_counts: Dict[str, int] = {}
+        self.failures: List[CopyFailure] = []
+        self.shared_reads = 0  # 与同组其他目标共用一次读取的复制数
+        self._first_start: Optional[float] = None
+        self._last_end: Optional[float] = None
+        self._last_summary = time.perf_counter()
+
+    def start(self):
+        """启动复制线程"""
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f'copy-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, source: str, destination: str, label: str,
+               replace: bool = False):
+        """提交复制任务，队列已满时阻塞等待"""
+        self._queue.put(CopyJob(source, destination, label, replace))
+
+    def submit_group(self, jobs: List[CopyJob]):
+        """
+        提交同一源文件的多个复制任务，复制方式下源文件只读取一次
+
+        Args:
+            jobs: 源文件相同、目标不同的复制任务
+        """
+        if len(jobs) == 1:
+            self._queue.put(jobs[0])
+        elif jobs:
+            self._queue.put(list(jobs))
+
+    def finish(self, cancel: bool = False):
+        """
+        等待队列中的任务全部完成并停止线程
+
+        Args:
+            cancel: 是否丢弃尚未开始的任务
+        """
+        if cancel:
+            self._cancelled.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    @property
+    def copy_seconds(self) -> float:
+        """复制阶段的实际用时（第一个任务开始到最后一个任务结束）"""
+        if self._first_start is None or self._last_end is None:
+            return 0.0
+        return self._last_end - self._first_start
+
+    def _worker(self):
+        """复制线程主循环"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            if self._cancelled.is_set():
+                continue
+            if isinstance(job, list):
+                self._copy_group(job)
+            else:
+                self._copy(job)
+
+    def _mark_started(self):
+        """记录复制阶段的开始时间"""
+        started = time.perf_counter()
+        with self._lock:
+            if self._first_start is None:
+                self._first_start = started
+
+    def _copy(self, job: CopyJob):
+        """执行单个复制任务"""
+        self._mark_started()
+        try:
+            # 先删除旧文件，避免覆盖符号链接时写入链接指向的源文件
+            if job.replace and os.path.lexists(job.destination):
+                os.remove(job.destination)
+            mode = transfer_file(job.source, job.destination, self.output_mode)
+            # 链接不产生数据复制，不计入复制字节数
+            size = os.path.getsize(job.source) if mode == 'copy' else 0
+        except Exception as e:
+            self._record_failure(job, e)
+            return
+        self._record_success(job, mode, size)
+
+    def _copy_group(self, jobs: List[CopyJob]):
+        """执行同一源文件的多个复制任务"""
+        # 链接和写时复制不读取文件内容，逐个处理即可
+        if self.output_mode != 'copy':
+            for job in jobs:
+                self._copy(job)
+            return
+
+        self._mark_started()
+        try:
+            for job in jobs:
+                if job.replace and os.path.lexists(job.destination):
+                    os.remove(job.destination)
+            errors = copy_to_many(
+                jobs[0].source, [job.destination for job in jobs])
+            size = os.path.getsize(jobs[0].source)
+        except Exception as e:
+            for job in jobs:
+                self._record_failure(job, e)
+            return
+
+        copied = 0
+        for job, error in zip(jobs, errors):
+            if error is None:
+                copied += 1
+                self._record_success(job, 'copy', size)
+            else:
+                self._record_failure(job, error)
+        with self._lock:
+            self.shared_reads += max(0, copied - 1)
+
+    def _record_failure(self, job: CopyJob, error: Exception):
+        """记录复制失败"""
+        with self._lock:
+            self.failures.append(CopyFailure(job, str(error)))
+            self._last_end = time.perf_counter()
+        self.log_message(
+            self.translator.t(
+                'copy_failed', job.source, job.destination, error),
+            'error')
+
+    def _record_success(self, job: CopyJob, mode: str, size: int):
+        """记录复制成功并输出日志"""
+        summary = None
+        with self._lock:
+            self.files_copied += 1
+            self.bytes_copied += size
+            self.mode_counts[mode] = self.mode_counts.get(mode, 0) + 1
+            self._last_end = time.perf_counter()
+            if (not self.per_file_log and
+                    self._last_end - self._last_summary >=
+                    self.summary_interval):
+                self._last_summary = self._last_end
+                summary = (self.files_copied, self.bytes_copied)
+
+        if self.on_copied:
+            try:
+                self.on_copied(job, mode)
+            except Exception as e:
+                self.log_message(str(e), 'error')
+
+        if not self.per_file_log:
+            if summary:
+                self.log_message(self.translator.t(
+                    'output_progress_summary', summary[0],
+                    summary[1] / (1024 * 1024)))
+            return
+
+        filename = os.path.basename(job.destination)
+        if mode == 'copy' and self.output_mode == 'copy':
+            self.log_message(
+                self.translator.t('found_and_copied', job.label, filename))
+        else:
+            self.log_message(
+                self.translator.t(
+                    'found_and_output', self.translator.t(
+                        f'output_mode_{mode}'), job.label, filename))
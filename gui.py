@@ -3,9 +3,10 @@
 """
 import tkinter as tk
 from tkinter import filedialog, scrolledtext, messagebox, ttk
-import threading
+import queue
 import logging
 from config import *
+from copy_pipeline import OUTPUT_MODES
 
 
 class MusicPickerGUI:
@@ -15,15 +16,22 @@ class MusicPickerGUI:
         self.metadata_processor = None  # 将通过外部设置
         self.playlist_generator = None  # v1.2 播放列表生成器
         self.playlist_comparator = None  # v1.2 播放列表比较器
+        self.task_manager = None  # 后台任务管理器（第一次提交任务时创建）
+        self._picker_task = None  # 正在运行的挑选任务
         self.root = None
         self.widgets = {}
         self.browse_buttons = []
         self.notebook = None  # 选项卡控件
         self.logger = logging.getLogger(__name__)
+        # 日志消息先进入线程安全队列，由界面线程定时批量写入日志区域
+        self._log_queue = queue.SimpleQueue()
+        # 任务线程不直接调用 Tk：进度和任务结束事件同样排队，由界面线程处理
+        self._ui_queue = queue.SimpleQueue()
 
     def create_window(self):
         """创建主窗口"""
         self.root = tk.Tk()
+        init_fonts(self.root)
         self.root.title(self.translator.t('window_title'))
         self.root.geometry(WINDOW_GEOMETRY)
         self.root.minsize(*WINDOW_MIN_SIZE)
@@ -54,6 +62,7 @@ class MusicPickerGUI:
 
         # 设置事件处理
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
+        self.root.after(LOG_VIEW_REFRESH_MS, self._drain_log_queue)
 
         return self.root
 
@@ -244,6 +253,92 @@ class MusicPickerGUI:
         self.widgets['metadata_checkbox'].pack(
             side=tk.LEFT, padx=(ENTRY_PADDING, 5))
 
+        # 输出方式选择（复制/硬链接/写时复制/符号链接）
+        self.widgets['output_mode_label'] = tk.Label(
+            metadata_frame,
+            font=FONTS['main'],
+            fg=COLORS['text_normal'],
+            bg=COLORS['bg_main']
+        )
+        self.widgets['output_mode_label'].pack(side=tk.LEFT, padx=(20, 5))
+
+        self.widgets['output_mode_combobox'] = ttk.Combobox(
+            metadata_frame,
+            state='readonly',
+            font=FONTS['main'],
+            width=12
+        )
+        self.widgets['output_mode_combobox'].bind(
+            '<<ComboboxSelected>>', self._on_output_mode_changed)
+        self.widgets['output_mode_combobox'].pack(side=tk.LEFT)
+
+        # 增量同步复选框
+        self.sync_mode_var = tk.BooleanVar()
+        self.widgets['sync_mode_checkbox'] = tk.Checkbutton(
+            metadata_frame,
+            variable=self.sync_mode_var,
+            command=self._on_sync_mode_changed,
+            font=FONTS['main'],
+            bg=COLORS['bg_main'],
+            fg=COLORS['text_normal'],
+            selectcolor=COLORS['bg_main'],
+            activebackground=COLORS['bg_main'],
+            activeforeground=COLORS['text_normal']
+        )
+        self.widgets['sync_mode_checkbox'].pack(side=tk.LEFT, padx=(20, 5))
+
+        # 最佳音质复选框（对歌单中带标记的歌曲扫描完整个音乐库）
+        self.best_quality_var = tk.BooleanVar()
+        self.widgets['best_quality_checkbox'] = tk.Checkbutton(
+            metadata_frame,
+            variable=self.best_quality_var,
+            command=self._on_best_quality_changed,
+            font=FONTS['main'],
+            bg=COLORS['bg_main'],
+            fg=COLORS['text_normal'],
+            selectcolor=COLORS['bg_main'],
+            activebackground=COLORS['bg_main'],
+            activeforeground=COLORS['text_normal']
+        )
+        self.widgets['best_quality_checkbox'].pack(
+            side=tk.LEFT, padx=(20, 5))
+
+    def _on_sync_mode_changed(self):
+        """增量同步选项改变时的回调"""
+        if self.music_processor:
+            self.music_processor.set_sync_mode(self.sync_mode_var.get())
+
+    def _on_best_quality_changed(self):
+        """最佳音质选项改变时的回调"""
+        if self.music_processor:
+            self.music_processor.set_prefer_best_quality(
+                self.best_quality_var.get())
+
+    def apply_processing_options(self):
+        """处理器创建后同步窗口上已选择的选项"""
+        if not self.music_processor:
+            return
+        index = self.widgets['output_mode_combobox'].current()
+        if index >= 0:
+            self.music_processor.set_output_mode(OUTPUT_MODES[index])
+        self.music_processor.set_sync_mode(self.sync_mode_var.get())
+        self.music_processor.set_prefer_best_quality(
+            self.best_quality_var.get())
+        self.music_processor.set_use_metadata_matching(
+            self.use_metadata_var.get())
+
+    def _on_output_mode_changed(self, event=None):
+        """输出方式改变时的回调"""
+        index = self.widgets['output_mode_combobox'].current()
+        if index < 0:
+            return
+        output_mode = OUTPUT_MODES[index]
+        if self.music_processor:
+            self.music_processor.set_output_mode(output_mode)
+        self.log_message(self.translator.t(
+            'output_mode_label') + ' ' + self.translator.t(
+            f'output_mode_{output_mode}'))
+
     def _on_metadata_option_changed(self):
         """元数据选项改变时的回调"""
         use_metadata = self.use_metadata_var.get()
@@ -811,12 +906,15 @@ class MusicPickerGUI:
 
             self.log_message(self.translator.t('generating_playlist'))
 
-            def run_generation():
+            def run_generation(task):
                 try:
                     # 使用播放列表生成器
                     if self.playlist_generator:
                         result = self.playlist_generator.generate_playlist(
-                            music_folder, output_file, use_metadata, include_subfolders)
+                            music_folder, output_file, use_metadata,
+                            include_subfolders, task.token)
+                        if task.cancelled:
+                            return
                         if result:
                             self.log_message(self.translator.t(
                                 'playlist_generated_successfully'))
@@ -829,10 +927,8 @@ class MusicPickerGUI:
                 except Exception as e:
                     self.log_message(f"生成播放列表时出错: {str(e)}")
 
-            # 在后台线程中运行
-            thread = threading.Thread(target=run_generation)
-            thread.daemon = True
-            thread.start()
+            # 在后台任务中运行（扫描和读取标签，受 IO 任务数限制）
+            self._get_task_manager().submit('generate', run_generation)
 
         except Exception as e:
             messagebox.showerror(
@@ -861,13 +957,17 @@ class MusicPickerGUI:
 
             self.log_message(self.translator.t('comparing_playlists'))
 
-            def run_comparison():
+            def run_comparison(task):
                 try:
                     # 使用播放列表比较器
-                    if self.playlist_comparator:
-                        result = self.playlist_comparator.compare_playlists(
-                            playlist1, playlist2, output_folder, similarity_threshold
+                    playlist_comparator = self._get_playlist_comparator()
+                    if playlist_comparator:
+                        result = playlist_comparator.compare_playlists(
+                            playlist1, playlist2, output_folder,
+                            similarity_threshold, task.token
                         )
+                        if task.cancelled:
+                            return
                         if result:
                             self.log_message(self.translator.t(
                                 'playlists_compared_successfully'))
@@ -880,10 +980,9 @@ class MusicPickerGUI:
                 except Exception as e:
                     self.log_message(f"比较播放列表时出错: {str(e)}")
 
-            # 在后台线程中运行
-            thread = threading.Thread(target=run_comparison)
-            thread.daemon = True
-            thread.start()
+            # 在后台任务中运行（只读取两个歌单文件，不占用 IO 任务名额）
+            self._get_task_manager().submit(
+                'compare', run_comparison, io_heavy=False)
 
         except Exception as e:
             messagebox.showerror(
@@ -919,6 +1018,20 @@ class MusicPickerGUI:
                 text=self.translator.t('output_folder_path'))
             self.widgets['metadata_checkbox'].config(
                 text=self.translator.t('use_metadata_matching'))
+            self.widgets['output_mode_label'].config(
+                text=self.translator.t('output_mode_label'))
+            self.widgets['sync_mode_checkbox'].config(
+                text=self.translator.t('sync_mode_option'))
+            self.widgets['best_quality_checkbox'].config(
+                text=self.translator.t('best_quality_option'))
+            output_mode = 'copy'
+            if self.music_processor:
+                output_mode = self.music_processor.output_mode
+            self.widgets['output_mode_combobox'].config(
+                values=[self.translator.t(f'output_mode_{mode}')
+                        for mode in OUTPUT_MODES])
+            self.widgets['output_mode_combobox'].current(
+                OUTPUT_MODES.index(output_mode))
 
             # 更新生成器选项卡的标签
             self.widgets['music_folder_label'].config(
@@ -977,19 +1090,88 @@ class MusicPickerGUI:
             self.logger.error(f"更新界面语言时出错: {e}")
 
     def log_message(self, message, level="INFO"):
-        """在日志区域显示消息"""
-        if 'log_area' in self.widgets:
-            timestamp = threading.current_thread().ident
-            log_line = f"[{level}] {message}\n"
-            self.widgets['log_area'].insert(tk.END, log_line)
-            self.widgets['log_area'].see(tk.END)
-
-    def update_progress(self, current, total):
-        """更新进度显示"""
-        if 'progress_label' in self.widgets:
-            progress_text = self.translator.t(
-                'progress_format', current, total)
-            self.widgets['progress_label'].config(text=progress_text)
+        """在日志区域显示消息（可在任意线程中调用，消息排队后批量显示）"""
+        self._log_queue.put(f"[{level}] {message}\n")
+
+    def record_message(self, message):
+        """显示消息并写入日志文件（供自身不写日志文件的处理模块使用）"""
+        self.logger.info(message)
+        self.log_message(message)
+
+    def _drain_log_queue(self):
+        """定时取出排队的日志消息和界面事件，在界面线程中处理"""
+        lines = []
+        # 只取出当前已排队的消息，工作线程持续写入时也不会阻塞界面
+        for _ in range(self._log_queue.qsize()):
+            try:
+                lines.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines and 'log_area' in self.widgets:
+            self._append_log_lines(lines)
+
+        snapshot = None
+        pick_finished = False
+        for _ in range(self._ui_queue.qsize()):
+            try:
+                kind, value = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                snapshot = value  # 只显示最新的进度
+            elif kind == 'pick_finished':
+                pick_finished = True
+        if snapshot is not None:
+            self._show_progress(snapshot)
+        if pick_finished:
+            self._reset_processing_buttons()
+        self.root.after(LOG_VIEW_REFRESH_MS, self._drain_log_queue)
+
+    def _append_log_lines(self, lines):
+        """
+        追加日志行，日志区域只保留最近的 LOG_VIEW_MAX_LINES 行（完整日志在日志文件中）
+
+        Args:
+            lines: 以换行结尾的日志行
+        """
+        log_area = self.widgets['log_area']
+        # 留出一行给跳过提示
+        omitted = len(lines) - (LOG_VIEW_MAX_LINES - 1)
+        if len(lines) > LOG_VIEW_MAX_LINES:
+            # 一批超过保留行数时，较早的行写入后也会立即删除，直接跳过
+            lines = lines[omitted:]
+            lines.insert(0, self.translator.t(
+                'log_lines_omitted', omitted, LOG_FILE) + '\n')
+        log_area.insert(tk.END, ''.join(lines))
+
+        # 每行以换行结尾，'end-1c' 位于最后一行之后的空行，取 'end-2c'
+        line_count = int(log_area.index('end-2c').split('.')[0])
+        excess = line_count - LOG_VIEW_MAX_LINES
+        if excess > 0:
+            log_area.delete('1.0', f'{excess + 1}.0')
+        log_area.see(tk.END)
+
+    def update_progress(self, snapshot):
+        """更新进度显示（可在任意线程中调用，由界面线程定时显示最新进度）"""
+        self._ui_queue.put(('progress', snapshot))
+
+    def _show_progress(self, snapshot):
+        """在进度标签中显示进度（界面线程）"""
+        if 'progress_label' not in self.widgets:
+            return
+
+        if snapshot.eta is None:
+            eta_text = '--:--'
+        else:
+            minutes, seconds = divmod(int(snapshot.eta), 60)
+            eta_text = f"{minutes}:{seconds:02d}"
+        progress_text = self.translator.t(
+            'progress_detail_format',
+            snapshot.files_scanned, snapshot.files_total,
+            snapshot.songs_matched, snapshot.songs_total,
+            snapshot.rate, eta_text)
+
+        self.widgets['progress_label'].config(text=progress_text)
 
     def set_metadata_processor(self, metadata_processor):
         """设置元数据处理器"""
@@ -1003,6 +1185,51 @@ class MusicPickerGUI:
         """设置播放列表比较器"""
         self.playlist_comparator = playlist_comparator
 
+    def _get_playlist_comparator(self):
+        """获取播放列表比较器，第一次使用时才导入并创建"""
+        if self.playlist_comparator is None:
+            from playlist_comparator import PlaylistComparator
+            self.playlist_comparator = PlaylistComparator(
+                self.translator, self.record_message)
+        return self.playlist_comparator
+
+    def _get_task_manager(self):
+        """获取后台任务管理器，第一次使用时才创建"""
+        if self.task_manager is None:
+            from task_manager import TaskManager
+            self.task_manager = TaskManager()
+            self.task_manager.add_listener(self._on_task_event)
+        return self.task_manager
+
+    def _on_task_event(self, event):
+        """处理后台任务的状态和进度事件（在任务线程中调用）"""
+        from task_manager import (TASK_WAITING, TASK_FAILED,
+                                  FINISHED_STATES)
+        if event.kind == 'state':
+            if event.value == TASK_WAITING:
+                self.log_message(self.translator.t('task_waiting'))
+            elif event.value == TASK_FAILED:
+                self.log_message(self.translator.t(
+                    'task_failed', event.task.error), 'ERROR')
+
+        # 不在任务线程中调用 Tk，窗口关闭后排队的事件不再处理
+        if event.kind == 'progress':
+            self.update_progress(event.value)
+        elif event.value in FINISHED_STATES and event.task.name == 'pick':
+            self._ui_queue.put(('pick_finished', None))
+
+    def _reset_processing_buttons(self):
+        """挑选任务结束后恢复按钮状态"""
+        self._picker_task = None
+        self.widgets['start_button'].config(state=tk.NORMAL)
+        self.widgets['stop_button'].config(state=tk.DISABLED)
+
+    def shutdown_tasks(self):
+        """取消并等待所有后台任务结束（退出前调用）"""
+        if self.task_manager:
+            self.task_manager.shutdown(
+                cancel=True, timeout=TASK_SHUTDOWN_TIMEOUT)
+
     def _start_processing(self):
         """开始处理"""
         try:
@@ -1022,9 +1249,12 @@ class MusicPickerGUI:
             self.widgets['start_button'].config(state=tk.DISABLED)
             self.widgets['stop_button'].config(state=tk.NORMAL)
 
-            # 开始处理
-            self.music_processor.start_processing(
-                list_file, music_lib, output_dir)
+            # 在后台任务中处理，界面保持响应，停止按钮可以随时取消
+            music_processor = self.music_processor
+            self._picker_task = self._get_task_manager().submit(
+                'pick', lambda task: music_processor.start_processing(
+                    list_file, music_lib, output_dir,
+                    task.report_progress, task.token))
 
         except Exception as e:
             messagebox.showerror(
@@ -1037,14 +1267,19 @@ class MusicPickerGUI:
 
     def _stop_processing(self):
         """停止处理"""
+        if self._picker_task is not None:
+            # 任务结束（状态事件）后才恢复开始按钮
+            self._picker_task.cancel()
+            self.widgets['stop_button'].config(state=tk.DISABLED)
+            return
         self.music_processor.stop_processing()
-        # 重置按钮状态
-        self.widgets['start_button'].config(state=tk.NORMAL)
-        self.widgets['stop_button'].config(state=tk.DISABLED)
+        self._reset_processing_buttons()
 
     def _on_closing(self):
         """窗口关闭事件"""
-        if hasattr(self.music_processor, 'stop_processing'):
+        if self.task_manager:
+            self.task_manager.cancel_all()
+        elif hasattr(self.music_processor, 'stop_processing'):
             self.music_processor.stop_processing()
         self.root.destroy()
 
@@ -0,0 +1,115 @@
+"""
+音乐库索引模块
+将音乐库文件名按字符片段建立倒排索引，用于快速筛选候选文件
+"""
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from text_normalizer import make_index_key, split_artists
+
+# 倒排索引使用的字符片段长度（二元组对中文和英文都足够区分）
+GRAM_SIZE = 2
+
+
+class LibraryEntry(NamedTuple):
+    """音乐库中的单个文件"""
+    file_path: str
+    filename: str
+    filename_no_ext: str
+
+
+def file_index_key(filename: str) -> str:
+    """由文件名（含扩展名）生成索引键，与 LibraryIndex.add 一致"""
+    return make_index_key(os.path.splitext(filename)[0].lower())
+
+
+def _iter_grams(key: str) -> Iterable[str]:
+    """枚举索引键中的所有字符片段（去重）"""
+    return {key[i:i + GRAM_SIZE] for i in range(len(key) - GRAM_SIZE + 1)}
+
+
+class LibraryIndex:
+    """音乐库倒排索引"""
+
+    def __init__(self):
+        self._entries: List[LibraryEntry] = []
+        self._keys: List[str] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, file_path: str, filename: Optional[str] = None,
+            key: Optional[str] = None) -> int:
+        """
+        向索引中添加一个文件
+
+        Args:
+            file_path: 文件完整路径
+            filename: 文件名（省略时从路径中获取）
+            key: 预先计算的索引键（省略时由文件名生成）
+
+        Returns:
+            文件编号（按添加顺序递增）
+        """
+        if filename is None:
+            filename = os.path.basename(file_path)
+        filename_no_ext = os.path.splitext(filename)[0].lower()
+
+        file_id = len(self._entries)
+        if key is None:
+            key = make_index_key(filename_no_ext)
+        self._entries.append(
+            LibraryEntry(file_path, filename, filename_no_ext))
+        self._keys.append(key)
+        for gram in _iter_grams(key):
+            self._postings[gram].append(file_id)
+        return file_id
+
+    def entry(self, file_id: int) -> LibraryEntry:
+        """获取文件编号对应的条目"""
+        return self._entries[file_id]
+
+    def candidates(self, title: str, artist: str,
+                   start: int = 0) -> List[int]:
+        """
+        查找可能与歌曲匹配的文件
+
+        返回的是候选集合（必要条件），调用方仍需用完整的匹配算法确认。
+
+        Args:
+            title: 歌曲标题
+            artist: 歌曲艺术家（可包含 / 或 _ 分隔的多位艺术家）
+            start: 只返回编号不小于该值的文件（用于分批扫描时只查新增文件）
+
+        Returns:
+            按添加顺序排列的候选文件编号列表
+        """
+        pieces = [make_index_key(title)]
+        pieces.extend(make_index_key(part) for part in split_artists(artist))
+        pieces = [piece for piece in pieces if piece]
+
+        grams = set()
+        for piece in pieces:
+            grams.update(_iter_grams(piece))
+
+        if grams:
+            best_posting, best_offset, best_count = None, 0, None
+            for gram in grams:
+                posting = self._postings.get(gram)
+                offset = bisect_left(posting, start) if posting else 0
+                count = len(posting) - offset if posting else 0
+                if count == 0:
+                    return []
+                if best_count is None or count < best_count:
+                    best_posting, best_offset, best_count = (
+                        posting, offset, count)
+            # 从最稀有的片段出发，候选数量由匹配数决定而不是曲库大小
+            candidate_ids = best_posting[best_offset:]
+        else:
+            candidate_ids = range(start, len(self._entries))
+
+        keys = self._keys
+        return [file_id for file_id in candidate_ids
+                if all(piece in keys[file_id] for piece in pieces)]
@@ -0,0 +1,125 @@
+"""
+音乐库扫描模块
+基于 os.scandir 和线程池并行列出目录，按固定顺序流式输出音频文件
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from config import SUPPORTED_AUDIO_FORMATS, SCAN_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class ScanEntry(NamedTuple):
+    """扫描得到的音频文件"""
+    path: str
+    name: str
+    size: int
+    mtime: float
+    ext: str
+    key: Optional[str] = None  # 预先计算的索引键（来自音乐库快照时提供）
+
+
+class ScanStats:
+    """扫描统计，由 scan_library 在扫描过程中更新"""
+
+    def __init__(self):
+        self.directories_listed = 0    # 已输出文件的目录数
+        self.directories_skipped = 0   # 提前结束时尚未访问的目录数（不含其子目录）
+        self.directories_relisted = 0  # 使用快照时因变化而重新列出的目录数
+
+
+def _list_directory(dir_path: str, formats: frozenset,
+                    recursive: bool) -> Tuple[List[ScanEntry], List[str]]:
+    """
+    列出单个目录（在线程池中运行）
+
+    Args:
+        dir_path: 目录路径
+        formats: 支持的扩展名集合（小写，含点号）
+        recursive: 是否返回子目录
+
+    Returns:
+        (按名称排序的音频文件列表, 按名称排序的子目录列表)
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # 与 os.walk 一致：不进入符号链接指向的目录
+                        if recursive and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+
+                    dot = entry.name.rfind('.')
+                    ext = entry.name[dot:].lower() if dot >= 0 else ''
+                    if ext not in formats or not entry.is_file():
+                        continue
+
+                    stat = entry.stat()
+                    files.append(ScanEntry(
+                        entry.path, entry.name, stat.st_size,
+                        stat.st_mtime, ext))
+                except OSError as e:
+                    logger.warning(f"无法读取 {entry.path}: {e}")
+    except OSError as e:
+        logger.warning(f"无法列出目录 {dir_path}: {e}")
+
+    files.sort(key=lambda item: item.name)
+    subdirs.sort()
+    return files, subdirs
+
+
+def scan_library(root: str,
+                 formats: Iterable[str] = SUPPORTED_AUDIO_FORMATS,
+                 recursive: bool = True,
+                 workers: Optional[int] = None,
+                 should_continue: Optional[Callable[[], bool]] = None,
+                 stats: Optional[ScanStats] = None
+                 ) -> Iterator[ScanEntry]:
+    """
+    扫描音乐库，流式输出音频文件
+
+    目录由线程池并行列出，输出顺序与目录并行度无关：先输出当前目录的文件
+    （按名称排序），再依次深入各个子目录，因此相同的音乐库每次扫描顺序一致。
+
+    Args:
+        root: 音乐库根目录
+        formats: 支持的扩展名
+        recursive: 是否包含子目录
+        workers: 目录扫描线程数，None 表示使用配置值
+        should_continue: 返回 False 时停止扫描
+        stats: 扫描统计（可选），扫描结束或提前停止时更新
+
+    Yields:
+        ScanEntry 记录
+    """
+    format_set = frozenset(ext.lower() for ext in formats)
+    executor = ThreadPoolExecutor(
+        max_workers=workers or SCAN_WORKERS,
+        thread_name_prefix='library-scan')
+    stack = [executor.submit(
+        _list_directory, root, format_set, recursive)]
+    try:
+        while stack:
+            if should_continue is not None and not should_continue():
+                return
+
+            files, subdirs = stack.pop().result()
+            # 子目录立即提交给线程池预先列出，输出时再按顺序深入
+            children = [executor.submit(
+                _list_directory, subdir, format_set, recursive)
+                for subdir in subdirs]
+            stack.extend(reversed(children))
+
+            if stats is not None:
+                stats.directories_listed += 1
+            yield from files
+    finally:
+        if stats is not None:
+            stats.directories_skipped = len(stack)
+        executor.shutdown(wait=False, cancel_futures=True)
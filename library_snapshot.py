@@ -0,0 +1,225 @@
+"""
+音乐库快照模块
+将音乐库的目录列表、文件状态和索引键持久化到 SQLite，
+再次扫描时只重新列出修改时间发生变化的目录
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import SUPPORTED_AUDIO_FORMATS, SCAN_WORKERS
+from library_index import file_index_key
+from library_scanner import ScanEntry, ScanStats, _list_directory, scan_library
+
+# 快照结构版本，字段变化时递增以丢弃旧快照
+SCHEMA_VERSION = 1
+
+# 快照中保存的扩展名（请求的格式不在其中时退回普通扫描）
+_SNAPSHOT_FORMATS = frozenset(ext.lower() for ext in SUPPORTED_AUDIO_FORMATS)
+
+# 修改时间距当前不足该值（纳秒）的目录下次仍会重新列出：
+# 同一时间精度内的后续修改不会改变目录的修改时间
+_RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh_directory(dir_path: str, stored: Optional[Tuple[int, str, str]]
+                       ) -> Tuple[List[ScanEntry], List[str], Optional[Tuple]]:
+    """
+    获取单个目录的内容（在线程池中运行）
+
+    Args:
+        dir_path: 目录路径
+        stored: 快照中的记录 (修改时间, 文件JSON, 子目录JSON)，没有时为None
+
+    Returns:
+        (按名称排序的音频文件列表, 按名称排序的子目录列表,
+         需要写回快照的记录；未变化时为None，目录无法读取时为空元组)
+    """
+    try:
+        # 先读取修改时间再列出目录：两者之间发生的修改会在下次扫描时被发现
+        mtime_ns = os.stat(dir_path).st_mtime_ns
+    except OSError as e:
+        logger.warning(f"无法读取目录 {dir_path}: {e}")
+        return [], [], ()
+
+    if stored is not None and stored[0] == mtime_ns:
+        files = []
+        for name, size, mtime, key in json.loads(stored[1]):
+            dot = name.rfind('.')
+            ext = name[dot:].lower() if dot >= 0 else ''
+            files.append(ScanEntry(
+                os.path.join(dir_path, name), name, size, mtime, ext, key))
+        subdirs = [os.path.join(dir_path, name)
+                   for name in json.loads(stored[2])]
+        return files, subdirs, None
+
+    files, subdirs = _list_directory(dir_path, _SNAPSHOT_FORMATS, True)
+    files = [entry._replace(key=file_index_key(entry.name))
+             for entry in files]
+    if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+        mtime_ns = 0
+    row = (mtime_ns,
+           json.dumps([[entry.name, entry.size, entry.mtime, entry.key]
+                       for entry in files], ensure_ascii=False),
+           json.dumps([os.path.basename(path) for path in subdirs],
+                      ensure_ascii=False))
+    return files, subdirs, row
+
+
+class LibrarySnapshot:
+    """音乐库快照"""
+
+    def __init__(self, db_path: str):
+        """
+        初始化音乐库快照
+
+        Args:
+            db_path: SQLite 数据库文件路径
+        """
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建表结构，版本不一致时重建"""
+        with self._lock:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute('DROP TABLE IF EXISTS directories')
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS directories ('
+                'path TEXT PRIMARY KEY, mtime_ns INTEGER, '
+                'files TEXT, subdirs TEXT)')
+            self._conn.commit()
+
+    def _load_tree(self, root_key: str) -> Dict[str, Tuple[int, str, str]]:
+        """读取根目录及其所有子目录的快照记录"""
+        # 以 root + 分隔符 为前缀的路径都在 [root/, root0) 区间内
+        prefix = root_key.rstrip(os.sep) + os.sep
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT path, mtime_ns, files, subdirs FROM directories '
+                'WHERE path = ? OR (path >= ? AND path < ?)',
+                (root_key, prefix, upper)).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def _save_tree(self, changed: List[Tuple],
+                   stale: Iterable[str]):
+        """写回变化的目录并删除已不存在的目录"""
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO directories '
+                '(path, mtime_ns, files, subdirs) VALUES (?, ?, ?, ?)',
+                changed)
+            self._conn.executemany(
+                'DELETE FROM directories WHERE path = ?',
+                [(path,) for path in stale])
+            self._conn.commit()
+
+    def scan(self,
+             root: str,
+             formats: Iterable[str] = SUPPORTED_AUDIO_FORMATS,
+             recursive: bool = True,
+             workers: Optional[int] = None,
+             should_continue: Optional[Callable[[], bool]] = None,
+             stats: Optional[ScanStats] = None) -> Iterator[ScanEntry]:
+        """
+        扫描音乐库，与 scan_library 的输出和顺序相同
+
+        修改时间未变化的目录直接使用快照中的列表。只修改文件内容不会改变
+        目录的修改时间，因此复用的文件大小和修改时间可能不是最新的；
+        需要准确状态的调用方（元数据缓存、增量同步）会自行读取文件状态。
+
+        Args:
+            root: 音乐库根目录
+            formats: 支持的扩展名
+            recursive: 是否包含子目录
+            workers: 目录扫描线程数，None 表示使用配置值
+            should_continue: 返回 False 时停止扫描
+            stats: 扫描统计（可选）
+
+        Yields:
+            ScanEntry 记录（附带索引键）
+        """
+        format_set = frozenset(ext.lower() for ext in formats)
+        if not format_set <= _SNAPSHOT_FORMATS:
+            yield from scan_library(root, formats, recursive, workers,
+                                    should_continue, stats)
+            return
+
+        root_key = os.path.abspath(root)
+        stored_rows = self._load_tree(root_key)
+        visited = set()
+        changed = []
+        completed = False
+
+        def submit(dir_path):
+            dir_key = os.path.abspath(dir_path)
+            visited.add(dir_key)
+            return dir_key, executor.submit(
+                _refresh_directory, dir_path, stored_rows.get(dir_key))
+
+        executor = ThreadPoolExecutor(
+            max_workers=workers or SCAN_WORKERS,
+            thread_name_prefix='library-snapshot')
+        stack = [submit(root)]
+        try:
+            while stack:
+                if should_continue is not None and not should_continue():
+                    return
+
+                dir_key, future = stack.pop()
+                files, subdirs, row = future.result()
+                if row == ():
+                    # 目录已被删除或无法读取，完整遍历后从快照中移除
+                    visited.discard(dir_key)
+                elif row is not None:
+                    changed.append((dir_key,) + row)
+                if recursive:
+                    # 子目录立即提交给线程池，输出时再按顺序深入
+                    children = [submit(subdir) for subdir in subdirs]
+                    stack.extend(reversed(children))
+
+                if stats is not None:
+                    stats.directories_listed += 1
+                yield from (entry for entry in files
+                            if entry.ext in format_set)
+            completed = True
+        finally:
+            if stats is not None:
+                stats.directories_skipped = len(stack)
+                stats.directories_relisted = len(changed)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+            # 完整遍历后才能确定哪些目录已被删除
+            stale = []
+            if completed and recursive:
+                stale = [path for path in stored_rows if path not in visited]
+            try:
+                self._save_tree(changed, stale)
+            except sqlite3.Error as e:
+                self.logger.warning(f"保存音乐库快照失败: {e}")
+            self.logger.info(
+                f"音乐库快照: 访问 {len(visited) - len(stack)} 个目录，"
+                f"重新列出 {len(changed)} 个，删除 {len(stale)} 个")
+
+    def clear(self):
+        """清空快照，下次扫描时重新列出所有目录"""
+        with self._lock:
+            self._conn.execute('DELETE FROM directories')
+            self._conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,341 @@
+"""
+音乐库监视模块
+在 Linux 上通过 inotify（ctypes 调用）监视音乐库目录，
+在内存中维护最新的目录列表，挑选歌曲时无需再扫描音乐库
+"""
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import (SUPPORTED_AUDIO_FORMATS, LIBRARY_WATCH_RECONCILE_SECONDS,
+                    LIBRARY_WATCH_DEBOUNCE)
+from library_index import file_index_key
+from library_scanner import ScanEntry, ScanStats, _list_directory, scan_library
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_CLOEXEC = 0o2000000
+
+# 目录监视关注的事件：新建、删除、重命名以及文件写入完成
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF |
+              IN_ONLYDIR | IN_DONT_FOLLOW)
+
+# struct inotify_event 头部：wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct('iIII')
+
+_FORMATS = frozenset(ext.lower() for ext in SUPPORTED_AUDIO_FORMATS)
+
+logger = logging.getLogger(__name__)
+
+
+def is_watch_supported() -> bool:
+    """当前系统是否支持 inotify"""
+    return sys.platform.startswith('linux')
+
+
+class _Inotify:
+    """inotify 系统调用的最小封装"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                    ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """添加监视，返回监视描述符"""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        """移除监视（目录已删除时内核已自动移除，忽略错误）"""
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> Iterator[Tuple[int, int, str]]:
+        """读取一批事件，返回 (监视描述符, 掩码, 文件名)"""
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            yield wd, mask, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LibraryWatcher:
+    """后台监视音乐库根目录，保持内存中的目录列表为最新"""
+
+    def __init__(self, roots: Iterable[str], metadata_cache=None,
+                 reconcile_interval: float = LIBRARY_WATCH_RECONCILE_SECONDS):
+        """
+        初始化音乐库监视器
+
+        Args:
+            roots: 需要监视的音乐库根目录
+            metadata_cache: 元数据缓存（可选），文件变化或删除时移除对应记录
+            reconcile_interval: 完整核对目录列表的间隔（秒），弥补丢失的事件
+        """
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.metadata_cache = metadata_cache
+        self.reconcile_interval = reconcile_interval
+        self.logger = logging.getLogger(__name__)
+        self.ready = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        # 目录 -> (按名称排序的音频文件, 按名称排序的子目录)
+        self._dirs: Dict[str, Tuple[List[ScanEntry], List[str]]] = {}
+        self._wd_dirs: Dict[int, str] = {}
+
+    def start(self):
+        """启动监视线程（初始列表在后台建立，完成后 ready 被设置）"""
+        if not is_watch_supported():
+            self.logger.warning("当前系统不支持 inotify，音乐库监视未启动")
+            return
+        self._inotify = _Inotify()
+        self._thread = threading.Thread(
+            target=self._run, name='library-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程并释放 inotify"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def is_watching(self, root: str) -> bool:
+        """指定目录是否是已就绪的监视根目录"""
+        return self.ready.is_set() and os.path.abspath(root) in self.roots
+
+    def scan(self,
+             root: str,
+             formats: Iterable[str] = SUPPORTED_AUDIO_FORMATS,
+             recursive: bool = True,
+             workers: Optional[int] = None,
+             should_continue: Optional[Callable[[], bool]] = None,
+             stats: Optional[ScanStats] = None) -> Iterator[ScanEntry]:
+        """
+        从内存中的目录列表输出音乐库文件，与 scan_library 的输出和顺序相同
+
+        根目录未被监视或尚未就绪时退回普通扫描。参数与 scan_library 相同。
+        """
+        format_set = frozenset(ext.lower() for ext in formats)
+        if not self.is_watching(root) or not format_set <= _FORMATS:
+            yield from scan_library(root, formats, recursive, workers,
+                                    should_continue, stats)
+            return
+
+        # 持锁复制文件列表，输出过程中不阻塞事件处理
+        entries = []
+        with self._lock:
+            stack = [os.path.abspath(root)]
+            while stack:
+                dir_path = stack.pop()
+                files, subdirs = self._dirs.get(dir_path, ((), ()))
+                entries.extend(entry for entry in files
+                               if entry.ext in format_set)
+                if recursive:
+                    stack.extend(reversed(subdirs))
+                if stats is not None:
+                    stats.directories_listed += 1
+
+        for entry in entries:
+            if should_continue is not None and not should_continue():
+                return
+            yield entry
+
+    def _run(self):
+        """监视线程主循环"""
+        try:
+            self._reconcile()
+        except Exception as e:
+            self.logger.error(f"建立音乐库列表失败: {e}")
+            return
+        self.ready.set()
+        self.logger.info(
+            f"音乐库监视已就绪: {len(self._dirs)} 个目录")
+
+        next_reconcile = time.monotonic() + self.reconcile_interval
+        fd = self._inotify.fd
+        while not self._stop.is_set():
+            timeout = min(1.0, max(0.0, next_reconcile - time.monotonic()))
+            readable, _, _ = select.select([fd], [], [], timeout)
+            try:
+                if readable:
+                    dirty, overflow = self._collect_events()
+                    if overflow:
+                        self.logger.warning("inotify 事件队列溢出，重新核对音乐库")
+                        self._reconcile()
+                    else:
+                        self._refresh(dirty)
+                if time.monotonic() >= next_reconcile:
+                    self._reconcile()
+                    next_reconcile = (
+                        time.monotonic() + self.reconcile_interval)
+            except Exception as e:
+                self.logger.error(f"处理音乐库变化失败: {e}")
+
+    def _collect_events(self) -> Tuple[set, bool]:
+        """
+        读取事件并合并，短时间内的连续变化只处理一次
+
+        Returns:
+            (需要重新列出的目录集合, 是否发生事件队列溢出)
+        """
+        dirty = set()
+        overflow = False
+        fd = self._inotify.fd
+        while True:
+            for wd, mask, name in self._inotify.read_events():
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                dir_path = self._wd_dirs.get(wd)
+                if dir_path is None:
+                    continue
+                if mask & IN_IGNORED:
+                    self._wd_dirs.pop(wd, None)
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    # 由父目录的事件处理；根目录本身变化时重新核对
+                    if dir_path in self.roots:
+                        overflow = True
+                    continue
+                dirty.add(dir_path)
+            readable, _, _ = select.select([fd], [], [], LIBRARY_WATCH_DEBOUNCE)
+            if not readable:
+                return dirty, overflow
+
+    def _list(self, dir_path: str) -> Tuple[List[ScanEntry], List[str]]:
+        """列出单个目录并附带索引键"""
+        files, subdirs = _list_directory(dir_path, _FORMATS, True)
+        files = [entry._replace(key=file_index_key(entry.name))
+                 for entry in files]
+        return files, subdirs
+
+    def _walk(self, root: str,
+              listing: Dict[str, Tuple[List[ScanEntry], List[str]]],
+              watches: Dict[int, str]):
+        """列出目录树并为每个目录添加监视"""
+        stack = [root]
+        while stack:
+            dir_path = stack.pop()
+            try:
+                watches[self._inotify.add_watch(dir_path)] = dir_path
+            except OSError as e:
+                # 通常是监视数量达到 fs.inotify.max_user_watches，依靠定期核对
+                self.logger.warning(f"无法监视目录 {dir_path}: {e}")
+            files, subdirs = self._list(dir_path)
+            listing[dir_path] = (files, subdirs)
+            stack.extend(subdirs)
+
+    def _reconcile(self):
+        """重新列出所有根目录，替换内存中的列表"""
+        listing = {}
+        watches = {}
+        for root in self.roots:
+            self._walk(root, listing, watches)
+        with self._lock:
+            old_dirs = self._dirs
+            old_watches = self._wd_dirs
+            self._dirs = listing
+            self._wd_dirs = watches
+        for wd in set(old_watches) - set(watches):
+            self._inotify.rm_watch(wd)
+        self._invalidate_changed(old_dirs, listing)
+
+    def _refresh(self, dirty: set):
+        """重新列出发生变化的目录，新增子目录整体加入，删除的子目录整体移除"""
+        updates = {}
+        for dir_path in dirty:
+            if dir_path not in self._dirs:
+                continue
+            if os.path.isdir(dir_path):
+                updates[dir_path] = self._list(dir_path)
+            else:
+                # 目录已删除，父目录的事件会移除它
+                updates[dir_path] = ([], [])
+
+        old = {}
+        with self._lock:
+            for dir_path, (files, subdirs) in updates.items():
+                old[dir_path] = self._dirs.get(dir_path, ([], []))
+                self._dirs[dir_path] = (files, subdirs)
+
+        for dir_path, (files, subdirs) in updates.items():
+            old_subdirs = set(old[dir_path][1])
+            new_subdirs = set(subdirs)
+            for subdir in old_subdirs - new_subdirs:
+                self._remove_tree(subdir)
+            for subdir in new_subdirs - old_subdirs:
+                listing = {}
+                watches = {}
+                self._walk(subdir, listing, watches)
+                with self._lock:
+                    self._dirs.update(listing)
+                    self._wd_dirs.update(watches)
+            self._invalidate_changed(
+                {dir_path: old[dir_path]}, {dir_path: (files, subdirs)})
+
+    def _remove_tree(self, root: str):
+        """从内存列表中移除目录及其所有子目录"""
+        prefix = root + os.sep
+        with self._lock:
+            removed = {path: self._dirs.pop(path)
+                       for path in list(self._dirs)
+                       if path == root or path.startswith(prefix)}
+            for wd, path in list(self._wd_dirs.items()):
+                if path in removed:
+                    del self._wd_dirs[wd]
+                    self._inotify.rm_watch(wd)
+        self._invalidate_changed(removed, {})
+
+    def _invalidate_changed(self, old_dirs: Dict, new_dirs: Dict):
+        """删除或内容发生变化的文件从元数据缓存中移除"""
+        if not self.metadata_cache:
+            return
+        current = {}
+        for files, _ in new_dirs.values():
+            for entry in files:
+                current[entry.path] = (entry.size, entry.mtime)
+        for files, _ in old_dirs.values():
+            for entry in files:
+                if current.get(entry.path) != (entry.size, entry.mtime):
+                    self.metadata_cache.invalidate(entry.path)
@@ -0,0 +1,200 @@
+"""
+元数据缓存模块
+将 MusicMetadata 持久化到 SQLite，按路径、大小和修改时间校验后复用
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import asdict, fields
+from typing import Dict, Optional, Tuple
+from config import (METADATA_CACHE_MAX_AGE_DAYS,
+                    METADATA_CACHE_VACUUM_INTERVAL_DAYS)
+from metadata_processor import MusicMetadata
+
+# 缓存结构版本，字段变化时递增以丢弃旧缓存
+SCHEMA_VERSION = 1
+
+# 累积多少次写入后提交一次事务
+FLUSH_EVERY = 500
+
+_METADATA_FIELDS = {field.name for field in fields(MusicMetadata)}
+
+
+class MetadataCache:
+    """元数据持久化缓存"""
+
+    def __init__(self, db_path: str,
+                 max_age_days: float = METADATA_CACHE_MAX_AGE_DAYS,
+                 vacuum_interval_days: float = METADATA_CACHE_VACUUM_INTERVAL_DAYS):
+        """
+        初始化元数据缓存
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            max_age_days: 超过该天数未被使用的记录会在清理时移除
+            vacuum_interval_days: 自动清理的最小间隔天数
+        """
+        self.db_path = db_path
+        self.max_age_days = max_age_days
+        self.vacuum_interval_days = vacuum_interval_days
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建表结构，版本不一致时重建"""
+        with self._lock:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute('DROP TABLE IF EXISTS metadata')
+                self._conn.execute('DROP TABLE IF EXISTS cache_info')
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, '
+                'data TEXT, last_used REAL)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_info ('
+                'key TEXT PRIMARY KEY, value TEXT)')
+            self._conn.commit()
+
+    def get(self, filepath: str, size: int,
+            mtime_ns: int) -> Tuple[bool, Optional[MusicMetadata]]:
+        """
+        查询缓存
+
+        Args:
+            filepath: 文件路径
+            size: 当前文件大小
+            mtime_ns: 当前文件修改时间（纳秒）
+
+        Returns:
+            (是否命中, 元数据)；命中但文件无可读标签时元数据为None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, mtime_ns, data FROM metadata WHERE path = ?',
+                (filepath,)).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE metadata SET last_used = ? WHERE path = ?',
+                (time.time(), filepath))
+            self._after_write()
+
+        if row[2] is None:
+            return True, None
+        values = json.loads(row[2])
+        return True, MusicMetadata(
+            **{key: value for key, value in values.items()
+               if key in _METADATA_FIELDS})
+
+    def put(self, filepath: str, size: int, mtime_ns: int,
+            metadata: Optional[MusicMetadata]):
+        """
+        写入缓存
+
+        Args:
+            filepath: 文件路径
+            size: 文件大小
+            mtime_ns: 文件修改时间（纳秒）
+            metadata: 元数据；None 表示该文件没有可读取的标签
+        """
+        data = None
+        if metadata is not None:
+            data = json.dumps(asdict(metadata), ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO metadata '
+                '(path, size, mtime_ns, data, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (filepath, size, mtime_ns, data, time.time()))
+            self._after_write()
+
+    def invalidate(self, filepath: str):
+        """移除单个文件的缓存记录"""
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM metadata WHERE path = ?', (filepath,))
+            self._after_write()
+
+    def _after_write(self):
+        """累积写入，定期提交（需持有锁）"""
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def flush(self):
+        """提交所有未提交的写入"""
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取命中统计和记录数"""
+        with self._lock:
+            entries = self._conn.execute(
+                'SELECT COUNT(*) FROM metadata').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def vacuum(self, force: bool = False) -> int:
+        """
+        清理缓存：移除长期未使用的记录和已删除文件的记录，并压缩数据库
+
+        只有当文件所在目录仍然存在时才认为文件已被删除，
+        避免移动硬盘或网络驱动器未挂载时清空整个缓存。
+
+        Args:
+            force: 是否忽略清理间隔强制执行
+
+        Returns:
+            移除的记录数
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_info WHERE key = 'last_vacuum'"
+            ).fetchone()
+            if (not force and row is not None and
+                    now - float(row[0]) < self.vacuum_interval_days * 86400):
+                return 0
+
+            removed = self._conn.execute(
+                'DELETE FROM metadata WHERE last_used < ?',
+                (now - self.max_age_days * 86400,)).rowcount
+
+            missing = []
+            for (path,) in self._conn.execute('SELECT path FROM metadata'):
+                if (not os.path.exists(path) and
+                        os.path.isdir(os.path.dirname(path))):
+                    missing.append((path,))
+            self._conn.executemany(
+                'DELETE FROM metadata WHERE path = ?', missing)
+            removed += len(missing)
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_info (key, value) "
+                "VALUES ('last_vacuum', ?)", (str(now),))
+            self._conn.commit()
+            self._pending = 0
+            self._conn.execute('VACUUM')
+
+        self.logger.info(f"元数据缓存清理完成，移除 {removed} 条记录")
+        return removed
+
+    def close(self):
+        """提交写入并关闭数据库"""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -3,17 +3,23 @@
 用于读取、比较和分析音乐文件的元数据
 """
 import os
+import time
 import logging
-from typing import Dict, List, Optional, Tuple, Any
-try:
-    from mutagen import File
-    from mutagen.id3 import ID3NoHeaderError
-    MUTAGEN_AVAILABLE = True
-except ImportError:
-    MUTAGEN_AVAILABLE = False
+import importlib.util
+from itertools import chain, islice
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+# mutagen 在第一次解析文件时才导入，启动时只检查是否已安装
+MUTAGEN_AVAILABLE = importlib.util.find_spec('mutagen') is not None
 from dataclasses import dataclass, asdict
 import json
-from config import SUPPORTED_AUDIO_FORMATS
+from config import (SUPPORTED_AUDIO_FORMATS, METADATA_WORKERS,
+                    METADATA_PARALLEL_MIN_FILES, METADATA_BATCH_SIZE,
+                    METADATA_PENDING_PER_WORKER, METADATA_FAST_READ)
+import run_report
+import tag_reader
+from song_list_reader import SongEntry
+from text_normalizer import normalize_for_comparison
 
 
 @dataclass
@@ -32,22 +38,143 @@ class MusicMetadata:
     bitrate: Optional[int] = None
     format: Optional[str] = None
     size: Optional[int] = None
+    # 快速读取时 MP3 和 M4A 不解析音频帧，时长和比特率由 load_audio_info 补充
+    audio_info_loaded: bool = True
+
+    def load_audio_info(self) -> 'MusicMetadata':
+        """补充快速读取时跳过的时长和比特率（读取失败时保持为None）"""
+        if self.audio_info_loaded:
+            return self
+        self.audio_info_loaded = True
+        try:
+            self.duration, self.bitrate = tag_reader.read_audio_info(
+                self.filepath)
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                f"读取音频信息失败 {self.filepath}: {e}")
+        return self
+
+
+def _get_tag_value(tags, tag_keys: List[str]) -> Optional[str]:
+    """从标签中获取值，支持多种格式的标签键"""
+    for key in tag_keys:
+        try:
+            if key not in tags:
+                continue
+        except ValueError:
+            # Vorbis 注释只接受 ASCII 键，查询 MP4 的 '\xa9day' 等键会报错
+            continue
+        value = tags[key]
+        if isinstance(value, list) and value:
+            return str(value[0])
+        elif value:
+            return str(value)
+    return None
+
+
+def _comparison_value(metadata: MusicMetadata, field: str) -> str:
+    """比较元数据时使用的字段值（标准化后，空值为空字符串）"""
+    value = getattr(metadata, field, None)
+    return normalize_for_comparison(str(value)) if value else ""
+
+
+def read_metadata(filepath: str, size: Optional[int] = None,
+                  fast: bool = METADATA_FAST_READ) -> Optional[MusicMetadata]:
+    """
+    使用mutagen解析单个文件的元数据（不使用缓存，可在子进程中运行）
+
+    Args:
+        filepath: 音乐文件路径
+        size: 文件大小（省略时读取文件状态）
+        fast: MP3、FLAC 和 M4A 只读取标签区域（见 tag_reader），跳过封面和
+              音频帧；标签结构不支持时自动改用完整解析
+
+    Returns:
+        MusicMetadata对象，文件无法识别时返回None
+    """
+    fast_tags = None
+    if fast:
+        try:
+            fast_tags = tag_reader.read_tags(filepath, size)
+        except Exception:
+            # 文件损坏等情况由完整解析给出结果或错误
+            fast_tags = None
+
+    if fast_tags is not None:
+        tags = fast_tags.tags
+        duration, bitrate = fast_tags.length, fast_tags.bitrate
+    else:
+        from mutagen import File
+
+        audio_file = File(filepath)
+        if audio_file is None:
+            return None
+        tags = audio_file.tags
+        info = getattr(audio_file, 'info', None)
+        duration = getattr(info, 'length', None)
+        bitrate = getattr(info, 'bitrate', None)
+
+    if size is None:
+        size = os.path.getsize(filepath)
+    ext = os.path.splitext(filepath)[1].lower()
+
+    # 创建元数据对象
+    metadata = MusicMetadata(
+        filepath=filepath,
+        filename=os.path.basename(filepath),
+        size=size,
+        format=ext[1:].upper(),
+        duration=duration,
+        bitrate=bitrate,
+        audio_info_loaded=fast_tags is None or fast_tags.length is not None
+    )
+
+    # 提取标签信息
+    if tags:
+        for field, tag_keys in tag_reader.FIELD_TAG_KEYS.items():
+            setattr(metadata, field, _get_tag_value(tags, tag_keys))
+
+    return metadata
+
+
+def _read_metadata_batch(items: List[Tuple[str, int]]
+                         ) -> Tuple[List[Tuple[Optional[MusicMetadata],
+                                               Optional[str]]], float]:
+    """
+    进程池任务：解析一批文件
+
+    Args:
+        items: [(文件路径, 文件大小)]
+
+    Returns:
+        ([(元数据, 错误信息)]，与输入一一对应, 解析用时（秒）)
+    """
+    started = time.perf_counter()
+    outcomes = []
+    for filepath, size in items:
+        try:
+            outcomes.append((read_metadata(filepath, size), None))
+        except Exception as e:
+            outcomes.append((None, str(e)))
+    return outcomes, time.perf_counter() - started
 
 
 class MetadataProcessor:
     """元数据处理器"""
 
-    def __init__(self, translator, log_callback=None):
+    def __init__(self, translator, log_callback=None, cache=None):
         """
         初始化元数据处理器
 
         Args:
             translator: 翻译器实例
             log_callback: 日志回调函数
+            cache: 元数据缓存实例（可选）
         """
         self.translator = translator
         self.log_callback = log_callback or self._default_log
         self.logger = logging.getLogger(__name__)
+        self.cache = cache
 
         # 检查mutagen库是否可用
         if not MUTAGEN_AVAILABLE:
@@ -62,6 +189,20 @@ class MetadataProcessor:
         """检查元数据功能是否可用"""
         return MUTAGEN_AVAILABLE
 
+    def set_cache(self, cache):
+        """设置元数据缓存"""
+        self.cache = cache
+
+    def log_cache_stats(self):
+        """输出缓存命中统计并提交缓存写入"""
+        if not self.cache:
+            return
+        self.cache.flush()
+        stats = self.cache.get_stats()
+        self.log_callback(
+            f"元数据缓存: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次，"
+            f"共 {stats['entries']} 条记录")
+
     def extract_metadata(self, filepath: str) -> Optional[MusicMetadata]:
         """
         提取单个文件的元数据
@@ -76,61 +217,189 @@ class MetadataProcessor:
             return None
 
         try:
-            if not os.path.exists(filepath):
-                return None
-
-            # 检查文件格式
-            ext = os.path.splitext(filepath)[1].lower()
-            if ext not in SUPPORTED_AUDIO_FORMATS:
+            file_stats = self._stat_audio_file(filepath)
+            if file_stats is None:
                 return None
 
-            # 使用mutagen读取元数据
-            audio_file = File(filepath)
-            if audio_file is None:
-                return None
-
-            # 获取基本文件信息
-            file_stats = os.stat(filepath)
-            filename = os.path.basename(filepath)
-
-            # 创建元数据对象
-            metadata = MusicMetadata(
-                filepath=filepath,
-                filename=filename,
-                size=file_stats.st_size,
-                format=ext[1:].upper()
-            )
-
-            # 提取音频信息
-            if hasattr(audio_file, 'info'):
-                info = audio_file.info
-                metadata.duration = getattr(info, 'length', None)
-                metadata.bitrate = getattr(info, 'bitrate', None)
-
-            # 提取标签信息
-            if audio_file.tags:
-                tags = audio_file.tags
-                metadata.title = self._get_tag_value(
-                    tags, ['TIT2', 'TITLE', '\xa9nam'])
-                metadata.artist = self._get_tag_value(
-                    tags, ['TPE1', 'ARTIST', '\xa9ART'])
-                metadata.album = self._get_tag_value(
-                    tags, ['TALB', 'ALBUM', '\xa9alb'])
-                metadata.albumartist = self._get_tag_value(
-                    tags, ['TPE2', 'ALBUMARTIST', 'aART'])
-                metadata.date = self._get_tag_value(
-                    tags, ['TDRC', 'DATE', '\xa9day'])
-                metadata.genre = self._get_tag_value(
-                    tags, ['TCON', 'GENRE', '\xa9gen'])
-                metadata.track = self._get_tag_value(
-                    tags, ['TRCK', 'TRACKNUMBER', 'trkn'])
-
+            # 优先使用缓存（大小和修改时间一致才视为有效）
+            if self.cache:
+                hit, cached = self.cache.get(
+                    filepath, file_stats.st_size, file_stats.st_mtime_ns)
+                self._count_cache_lookup(hit)
+                if hit:
+                    return cached
+
+            with run_report.current().phase(
+                    'metadata_parse', nbytes=file_stats.st_size):
+                metadata = read_metadata(filepath, file_stats.st_size)
+            if self.cache:
+                self.cache.put(filepath, file_stats.st_size,
+                               file_stats.st_mtime_ns, metadata)
             return metadata
 
         except Exception as e:
+            run_report.current().increment('metadata_failures')
             self.log_callback(f"提取元数据失败 {filepath}: {str(e)}")
             return None
 
+    def extract_many(self,
+                     filepaths: Iterable[str],
+                     workers: Optional[int] = None,
+                     ordered: bool = False,
+                     should_continue: Optional[Callable[[], bool]] = None
+                     ) -> Iterator[Tuple[str, Optional[MusicMetadata]]]:
+        """
+        批量提取元数据，未命中缓存的文件分发到进程池并行解析
+
+        Args:
+            filepaths: 音乐文件路径（列表或按需生成路径的迭代器）
+            workers: 进程数，None 表示使用配置值（0 为CPU核心数）
+            ordered: 是否按输入顺序输出结果，否则按完成顺序输出
+            should_continue: 返回 False 时停止提交并丢弃未完成的任务
+
+        Yields:
+            (文件路径, MusicMetadata对象或None)
+        """
+        if should_continue is None:
+            def should_continue():
+                return True
+
+        if not MUTAGEN_AVAILABLE:
+            for filepath in filepaths:
+                yield filepath, None
+            return
+
+        if workers is None:
+            workers = METADATA_WORKERS
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+
+        # 数量较少时进程池的启动开销大于收益，直接串行处理
+        filepaths = iter(filepaths)
+        head = list(islice(filepaths, METADATA_PARALLEL_MIN_FILES))
+        filepaths = chain(head, filepaths)
+        if workers == 1 or len(head) < METADATA_PARALLEL_MIN_FILES:
+            for filepath in filepaths:
+                if not should_continue():
+                    return
+                yield filepath, self.extract_metadata(filepath)
+            return
+
+        # 进程池模块较大，只在需要并行解析时导入
+        from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                        wait)
+
+        results = {}        # 输入序号 -> 结果（仅有序模式使用）
+        next_index = 0      # 有序模式下下一个应输出的序号
+        pending = {}        # Future -> [(序号, 路径, 大小, 修改时间)]
+        batch = []
+        max_pending = workers * METADATA_PENDING_PER_WORKER
+        report = run_report.current()
+
+        def emit(index, filepath, metadata):
+            """记录结果并返回当前可以输出的结果"""
+            nonlocal next_index
+            if not ordered:
+                return [(filepath, metadata)]
+            results[index] = (filepath, metadata)
+            ready = []
+            while next_index in results:
+                ready.append(results.pop(next_index))
+                next_index += 1
+            return ready
+
+        def collect(done_futures):
+            """处理已完成的任务批次"""
+            ready = []
+            for future in done_futures:
+                items = pending.pop(future)
+                try:
+                    outcomes, seconds = future.result()
+                except Exception as e:
+                    outcomes, seconds = [(None, str(e))] * len(items), 0.0
+                # 进程中的解析用时，与主进程等待结果的时间分别记录
+                report.add('metadata_parse', seconds, len(items),
+                           sum(size for _, _, size, _ in items))
+                for (index, filepath, size, mtime_ns), (metadata, error) in zip(
+                        items, outcomes):
+                    if error is not None:
+                        report.increment('metadata_failures')
+                        self.log_callback(f"提取元数据失败 {filepath}: {error}")
+                    elif self.cache:
+                        self.cache.put(filepath, size, mtime_ns, metadata)
+                    ready.extend(emit(index, filepath, metadata))
+            return ready
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            for index, filepath in enumerate(filepaths):
+                if not should_continue():
+                    return
+
+                try:
+                    file_stats = self._stat_audio_file(filepath)
+                except Exception as e:
+                    self.log_callback(f"提取元数据失败 {filepath}: {str(e)}")
+                    file_stats = None
+                if file_stats is None:
+                    yield from emit(index, filepath, None)
+                    continue
+
+                if self.cache:
+                    hit, cached = self.cache.get(
+                        filepath, file_stats.st_size, file_stats.st_mtime_ns)
+                    self._count_cache_lookup(hit)
+                    if hit:
+                        yield from emit(index, filepath, cached)
+                        continue
+
+                batch.append((index, filepath,
+                              file_stats.st_size, file_stats.st_mtime_ns))
+                if len(batch) >= METADATA_BATCH_SIZE:
+                    future = executor.submit(
+                        _read_metadata_batch,
+                        [(path, size) for _, path, size, _ in batch])
+                    pending[future] = batch
+                    batch = []
+
+                # 限制在途任务数量，边提交边输出结果
+                while len(pending) >= max_pending:
+                    with report.phase('metadata_wait'):
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+                    if not should_continue():
+                        return
+
+            if batch:
+                future = executor.submit(
+                    _read_metadata_batch,
+                    [(path, size) for _, path, size, _ in batch])
+                pending[future] = batch
+
+            while pending:
+                with report.phase('metadata_wait'):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+                if not should_continue():
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count_cache_lookup(self, hit: bool):
+        """在运行报告中记录本次运行的缓存命中（缓存自身的统计跨越多次运行）"""
+        run_report.current().increment(
+            'metadata_cache_hits' if hit else 'metadata_cache_misses')
+
+    def _stat_audio_file(self, filepath: str) -> Optional[os.stat_result]:
+        """检查文件格式并获取文件状态，不支持或不存在时返回None"""
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext not in SUPPORTED_AUDIO_FORMATS:
+            return None
+        try:
+            return os.stat(filepath)
+        except OSError:
+            return None
+
     def _get_tag_value(self, tags, tag_keys: List[str]) -> Optional[str]:
         """
         从标签中获取值，支持多种格式的标签键
@@ -142,22 +411,16 @@ class MetadataProcessor:
         Returns:
             标签值或None
         """
-        for key in tag_keys:
-            if key in tags:
-                value = tags[key]
-                if isinstance(value, list) and value:
-                    return str(value[0])
-                elif value:
-                    return str(value)
-        return None
-
-    def match_song_by_metadata(self, song_info: Dict, metadata: MusicMetadata,
+        return _get_tag_value(tags, tag_keys)
+
+    def match_song_by_metadata(self, song_info: SongEntry,
+                               metadata: MusicMetadata,
                                match_threshold: float = 0.8) -> bool:
         """
         基于元数据匹配歌曲
 
         Args:
-            song_info: 歌曲信息字典，包含title和artist
+            song_info: 歌单中的歌曲（使用 title 和 artist）
             metadata: 音乐文件元数据
             match_threshold: 匹配阈值（0-1）
 
@@ -168,10 +431,10 @@ class MetadataProcessor:
             return False
 
         # 标准化比较
-        song_title = self._normalize_text(song_info['title'])
-        song_artist = self._normalize_text(song_info['artist'])
-        meta_title = self._normalize_text(metadata.title)
-        meta_artist = self._normalize_text(metadata.artist)
+        song_title = normalize_for_comparison(song_info.title)
+        song_artist = normalize_for_comparison(song_info.artist)
+        meta_title = normalize_for_comparison(metadata.title)
+        meta_artist = normalize_for_comparison(metadata.artist)
 
         # 计算相似度
         title_similarity = self._calculate_similarity(song_title, meta_title)
@@ -183,35 +446,6 @@ class MetadataProcessor:
 
         return overall_similarity >= match_threshold
 
-    def _normalize_text(self, text: str) -> str:
-        """
-        标准化文本用于比较
-
-        Args:
-            text: 要标准化的文本
-
-        Returns:
-            标准化后的文本
-        """
-        if not text:
-            return ""
-
-        import re
-        # 转换为小写
-        text = text.lower().strip()
-
-        # 移除常见的括号内容（如feat.等）
-        text = re.sub(r'\([^)]*\)', '', text)
-        text = re.sub(r'\[[^\]]*\]', '', text)
-
-        # 移除特殊字符，只保留字母数字和空格
-        text = re.sub(r'[^\w\s]', ' ', text)
-
-        # 压缩多个空格为单个空格
-        text = re.sub(r'\s+', ' ', text).strip()
-
-        return text
-
     def _calculate_similarity(self, text1: str, text2: str) -> float:
         """
         计算两个文本的相似度
@@ -278,10 +512,8 @@ class MetadataProcessor:
             value2 = getattr(metadata2, field, None)
 
             # 标准化值进行比较
-            norm_value1 = self._normalize_text(str(value1)) if value1 else ""
-            norm_value2 = self._normalize_text(str(value2)) if value2 else ""
-
-            if norm_value1 == norm_value2:
+            if (_comparison_value(metadata1, field)
+                    == _comparison_value(metadata2, field)):
                 result['matches'][field] = {
                     'value': value1,
                     'match': True
@@ -307,6 +539,11 @@ class MetadataProcessor:
         """
         在元数据列表中查找重复文件
 
+        按列表顺序，每个尚未分组的文件与其后所有尚未分组、相似度达到阈值的
+        文件组成一组（相似度与 compare_metadata 相同）。每个文件的字段只标准化
+        一次；阈值要求所有字段相同时直接按字段值分组，否则按字段值分桶，
+        只在桶内两两比较。
+
         Args:
             metadata_list: 元数据列表
             similarity_threshold: 相似度阈值（百分比）
@@ -318,34 +555,106 @@ class MetadataProcessor:
         if compare_fields is None:
             compare_fields = ['title', 'artist', 'album']
 
-        duplicate_groups = []
-        processed = set()
-
         self.log_callback(f"开始查找重复文件，相似度阈值: {similarity_threshold}%")
 
-        for i, metadata1 in enumerate(metadata_list):
-            if i in processed:
-                continue
+        # 相似度达到阈值所需的相同字段数，None 表示任何两个文件都达不到
+        total_fields = len(compare_fields)
+        required = next(
+            (count for count in range(total_fields + 1)
+             if (count / total_fields * 100 if total_fields > 0 else 0)
+             >= similarity_threshold), None)
+
+        if required is None or len(metadata_list) < 2:
+            duplicate_groups = []
+        elif required == 0:
+            duplicate_groups = [list(metadata_list)]
+        else:
+            keys = [tuple(_comparison_value(metadata, field)
+                          for field in compare_fields)
+                    for metadata in metadata_list]
+            if required == total_fields:
+                groups = self._group_identical_keys(keys)
+            else:
+                groups = self._group_similar_keys(keys, required)
+            duplicate_groups = [[metadata_list[index] for index in group]
+                                for group in groups]
+
+        self.log_callback(f"找到 {len(duplicate_groups)} 组重复文件")
+        return duplicate_groups
 
-            current_group = [metadata1]
-            processed.add(i)
+    def _group_identical_keys(self, keys: List[Tuple[str, ...]]
+                              ) -> List[List[int]]:
+        """
+        将字段值完全相同的文件分为一组
 
-            for j, metadata2 in enumerate(metadata_list[i + 1:], start=i + 1):
-                if j in processed:
-                    continue
+        Args:
+            keys: 每个文件标准化后的字段值
 
-                comparison = self.compare_metadata(
-                    metadata1, metadata2, compare_fields)
-                if comparison['similarity_score'] >= similarity_threshold:
-                    current_group.append(metadata2)
-                    processed.add(j)
+        Returns:
+            重复文件组（文件下标），按每组第一个文件的顺序排列
+        """
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(key, []).append(index)
+        # 只保存包含多个文件的组（即实际的重复文件）
+        return [group for group in groups.values() if len(group) > 1]
+
+    def _group_similar_keys(self, keys: List[Tuple[str, ...]],
+                            required: int) -> List[List[int]]:
+        """
+        将相同字段数达到 required 的文件分为一组
 
-            # 只保存包含多个文件的组（即实际的重复文件）
-            if len(current_group) > 1:
-                duplicate_groups.append(current_group)
+        两个文件至少有 required 个字段相同时，在任意
+        （字段数 - required + 1）个字段中必有一个相同，因此只需按这些字段
+        分桶，并在桶内比较。
 
-        self.log_callback(f"找到 {len(duplicate_groups)} 组重复文件")
-        return duplicate_groups
+        Args:
+            keys: 每个文件标准化后的字段值
+            required: 需要相同的字段数（大于 0 且小于字段数）
+
+        Returns:
+            重复文件组（文件下标），按每组第一个文件的顺序排列
+        """
+        total_fields = len(keys[0])
+        buckets: List[Dict[str, List[int]]] = []
+        for position in range(total_fields):
+            bucket: Dict[str, List[int]] = {}
+            for index, key in enumerate(keys):
+                bucket.setdefault(key[position], []).append(index)
+            buckets.append(bucket)
+
+        # 选择桶内比较次数最少的字段分桶
+        blocking = sorted(
+            range(total_fields),
+            key=lambda position: sum(
+                len(members) ** 2 for members in buckets[position].values())
+        )[:total_fields - required + 1]
+
+        groups = []
+        processed = [False] * len(keys)
+        for i, key1 in enumerate(keys):
+            if processed[i]:
+                continue
+            processed[i] = True
+
+            # 前面的文件都已分组，未分组的候选文件都在 i 之后
+            candidates = set()
+            for position in blocking:
+                candidates.update(
+                    j for j in buckets[position][key1[position]]
+                    if not processed[j])
+
+            current_group = [i]
+            for j in sorted(candidates):
+                matches = sum(
+                    value1 == value2 for value1, value2 in zip(key1, keys[j]))
+                if matches >= required:
+                    current_group.append(j)
+                    processed[j] = True
+
+            if len(current_group) > 1:
+                groups.append(current_group)
+        return groups
 
     def _format_duration(self, duration: Optional[float]) -> str:
         """格式化时长显示"""
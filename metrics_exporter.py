@@ -0,0 +1,147 @@
+"""
+Prometheus 指标输出模块
+把运行报告写成 Prometheus 文本格式的 .prom 文件，供 node_exporter 的
+textfile collector 读取。文件先写入临时文件再替换，采集时不会读到写了一半的内容。
+"""
+import os
+import re
+import time
+from typing import Any, Dict, List, Tuple
+import run_report
+
+PREFIX = 'musicpicker'
+
+# 运行报告计数器 -> (指标名, 类型, 说明)；未列出的数值计数器以 gauge 输出
+COUNTER_METRICS = {
+    'files_scanned': ('files_scanned_total', 'counter', '已处理的音乐库文件数'),
+    'files_indexed': ('files_indexed_total', 'counter', '已加入索引的音乐库文件数'),
+    'files_total': ('files_discovered', 'gauge', '已发现的音乐库文件数'),
+    'songs_total': ('songs', 'gauge', '歌单中的歌曲数'),
+    'songs_matched': ('songs_matched', 'gauge', '已匹配的歌曲数'),
+    'files_copied': ('files_copied_total', 'counter', '已输出的文件数'),
+    'bytes_copied': ('bytes_copied_total', 'counter', '已复制的字节数'),
+    'copy_failures': ('copy_failures_total', 'counter', '输出失败的文件数'),
+    'directories_listed': ('directories_listed_total', 'counter',
+                           '列出的目录数'),
+    'directories_skipped': ('directories_skipped_total', 'counter',
+                            '扫描提前结束而未访问的目录数'),
+    'directories_relisted': ('directories_relisted_total', 'counter',
+                             '使用快照时因变化而重新列出的目录数'),
+    'metadata_cache_hits': ('metadata_cache_hits_total', 'counter',
+                            '元数据缓存命中次数'),
+    'metadata_cache_misses': ('metadata_cache_misses_total', 'counter',
+                              '元数据缓存未命中次数'),
+    'metadata_failures': ('metadata_parse_failures_total', 'counter',
+                          '元数据读取失败的文件数'),
+    'song_list_invalid_lines': ('song_list_parse_failures_total', 'counter',
+                                '歌单中格式不正确的行数'),
+    'parse_failures': ('filename_parse_failures_total', 'counter',
+                       '生成歌单时无法解析的文件数'),
+}
+
+_NAME_INVALID = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _escape_label(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return '{' + ','.join(f'{key}="{_escape_label(str(value))}"'
+                          for key, value in labels.items()) + '}'
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+def render(report) -> str:
+    """
+    把运行报告转换为 Prometheus 文本格式
+
+    每个指标描述最近一次（或正在进行的）运行，运行类型作为 kind 标签。
+
+    Args:
+        report: RunReport
+
+    Returns:
+        文本格式的指标
+    """
+    data = report.to_dict()
+    kind = {'kind': data['kind']}
+    families: List[Tuple[str, str, str, List[Tuple[Dict[str, str], Any]]]] = []
+
+    def family(name, metric_type, help_text, samples):
+        families.append((f'{PREFIX}_{name}', metric_type, help_text, samples))
+
+    family('run_info', 'gauge',
+           '运行类型和状态（running、completed、aborted、failed）',
+           [({**kind, 'status': data['status']}, 1)])
+    family('run_start_timestamp_seconds', 'gauge', '运行开始时间',
+           [(kind, float(data['started_timestamp']))])
+    family('run_duration_seconds', 'gauge', '运行已用时间',
+           [(kind, float(data['wall_seconds']))])
+    family('run_last_update_timestamp_seconds', 'gauge', '指标文件更新时间',
+           [(kind, time.time())])
+
+    phases = data['phases']
+    family('phase_seconds_total', 'counter', '各阶段累计耗时',
+           [({**kind, 'phase': name}, float(stats['seconds']))
+            for name, stats in phases.items()])
+    family('phase_calls_total', 'counter', '各阶段处理的条目数或调用次数',
+           [({**kind, 'phase': name}, stats['calls'])
+            for name, stats in phases.items()])
+    family('phase_bytes_total', 'counter', '各阶段处理的字节数',
+           [({**kind, 'phase': name}, stats['bytes'])
+            for name, stats in phases.items() if stats['bytes']])
+
+    for counter, value in sorted(data['counters'].items()):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name, metric_type, help_text = COUNTER_METRICS.get(
+            counter, (_NAME_INVALID.sub('_', counter), 'gauge',
+                      f'运行计数 {counter}'))
+        family(name, metric_type, help_text, [(kind, value)])
+
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        if not samples:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in samples:
+            lines.append(f'{name}{_format_labels(labels)} '
+                         f'{_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusTextfile:
+    """运行报告的 Prometheus 文本文件输出（通过 run_report.add_sink 注册）"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: .prom 文件路径（通常位于 textfile collector 的目录中）
+        """
+        self.path = os.path.abspath(path)
+
+    def write(self, report):
+        """原子写入当前指标"""
+        text = render(report)
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        # 临时文件不以 .prom 结尾，collector 不会读取
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+
+
+def register_textfile(path: str) -> PrometheusTextfile:
+    """创建 Prometheus 文本文件输出并注册到运行报告"""
+    sink = PrometheusTextfile(path)
+    run_report.add_sink(sink)
+    return sink
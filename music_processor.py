@@ -2,10 +2,22 @@
 音乐处理核心逻辑模块
 """
 import os
-import shutil
+import time
 import logging
-from config import SUPPORTED_AUDIO_FORMATS
-from utils import is_supported_audio_file, normalize_filename
+from collections import deque
+from itertools import islice
+import run_report
+from library_index import LibraryIndex
+from library_scanner import ScanStats, scan_library
+from copy_pipeline import CopyPipeline, OUTPUT_MODES
+from sync_manifest import SyncManifest
+from progress_tracker import ProgressTracker
+from song_list_reader import ReadStats, gc_paused, iter_song_entries
+from text_normalizer import (
+    SongQuery, normalize_artist_separators, prepare_song_query)
+from config import (SCAN_CHUNK_SIZE, LOSSLESS_AUDIO_FORMATS, LOG_VERBOSITY,
+                    LOG_VERBOSITY_LEVELS, LOG_SUMMARY_MIN_SONGS,
+                    LOG_SUMMARY_INTERVAL)
 
 
 class MusicProcessor:
@@ -16,11 +28,28 @@ class MusicProcessor:
         self.logger = logging.getLogger(__name__)
         self.metadata_processor = None  # 将通过外部设置
         self.use_metadata_matching = False  # 是否使用元数据匹配
+        self.output_mode = 'copy'  # 输出方式：copy/hardlink/reflink/symlink
+        self.sync_mode = False  # 增量同步：只输出新增或变化的文件
+        self.sync_prune = False  # 增量同步时删除不再在歌单中的文件
+        self.sync_hash = False  # 增量同步时记录文件摘要
+        self.prefer_best_quality = False  # 带标记的歌曲在整个音乐库中选择最佳音质
+        self.library_snapshot = None  # 音乐库快照（可选），将通过外部设置
+        self.library_watcher = None  # 音乐库监视器（可选），将通过外部设置
+        self.log_verbosity = LOG_VERBOSITY  # 逐个文件的日志：auto/detailed/summary
+        self.per_file_log = True  # 本次运行是否为每个文件记录日志
 
     def set_metadata_processor(self, metadata_processor):
         """设置元数据处理器"""
         self.metadata_processor = metadata_processor
 
+    def set_library_snapshot(self, library_snapshot):
+        """设置音乐库快照，扫描时只重新列出发生变化的目录"""
+        self.library_snapshot = library_snapshot
+
+    def set_library_watcher(self, library_watcher):
+        """设置音乐库监视器，被监视的音乐库直接使用内存中的列表"""
+        self.library_watcher = library_watcher
+
     def set_use_metadata_matching(self, use_metadata: bool):
         """设置是否使用元数据匹配"""
         self.use_metadata_matching = use_metadata
@@ -28,6 +57,65 @@ class MusicProcessor:
             self._log_message("警告: 元数据功能不可用，将使用文件名匹配", 'warning')
             self.use_metadata_matching = False
 
+    def set_output_mode(self, output_mode: str):
+        """设置输出方式（不支持的方式会在复制时自动降级为复制）"""
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"未知的输出方式: {output_mode}")
+        self.output_mode = output_mode
+
+    def set_sync_mode(self, enabled: bool, prune: bool = False,
+                      use_hash: bool = False):
+        """
+        设置增量同步模式
+
+        Args:
+            enabled: 是否启用增量同步
+            prune: 是否删除输出文件夹中不再匹配的已同步文件
+            use_hash: 是否记录文件摘要
+        """
+        self.sync_mode = enabled
+        self.sync_prune = prune
+        self.sync_hash = use_hash
+
+    def set_prefer_best_quality(self, enabled: bool):
+        """
+        设置最佳音质模式
+
+        启用后，歌单中以 BEST_QUALITY_MARKER 结尾的歌曲会比较音乐库中所有
+        匹配的文件，选择音质最好的一个；其他歌曲全部找到后只为这些歌曲继续扫描。
+
+        Args:
+            enabled: 是否启用最佳音质模式
+        """
+        self.prefer_best_quality = enabled
+
+    def set_log_verbosity(self, verbosity: str):
+        """
+        设置逐个文件的匹配和输出日志
+
+        Args:
+            verbosity: 'detailed' 每个文件一行，'summary' 按间隔输出汇总，
+                       'auto' 在歌曲数超过 LOG_SUMMARY_MIN_SONGS 时使用汇总
+        """
+        if verbosity not in LOG_VERBOSITY_LEVELS:
+            raise ValueError(f"不支持的日志详细程度: {verbosity}")
+        self.log_verbosity = verbosity
+
+    def _begin_file_log(self, songs_total):
+        """按歌曲数决定本次运行是否记录逐个文件的日志"""
+        if self.log_verbosity == 'auto':
+            self.per_file_log = songs_total <= LOG_SUMMARY_MIN_SONGS
+        else:
+            self.per_file_log = self.log_verbosity == 'detailed'
+        if not self.per_file_log:
+            self._log_message(self.translator.t(
+                'per_file_log_summary', songs_total, LOG_SUMMARY_INTERVAL))
+
+    def _log_file_message(self, message):
+        """逐个文件的日志，汇总模式下不输出"""
+        if self.per_file_log:
+            self._log_message(message)
+
     def _log_message(self, message, level='info'):
         """同时记录到GUI和日志文件"""
         # 显示在GUI中
@@ -40,28 +128,33 @@ class MusicProcessor:
         elif level == 'warning':
             self.logger.warning(message)
 
+    def iter_song_list(self, file_path, stats=None):
+        """
+        流式解析歌曲列表文件，格式不正确的行记录警告后跳过
+
+        Args:
+            file_path: 歌曲列表文件路径
+            stats: 读取统计（可选）
+
+        Yields:
+            SongEntry
+        """
+        report = run_report.current()
+
+        def on_invalid(line):
+            report.increment('song_list_invalid_lines')
+            self._log_message(self.translator.t(
+                'parse_warning', line), 'warning')
+
+        return iter_song_entries(file_path, on_invalid, stats)
+
     def parse_song_list(self, file_path):
         """解析歌曲列表文件"""
-        songs_to_find = []
+        stats = ReadStats()
+        started = time.perf_counter()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    # 跳过空行和注释行
-                    if not line or line.startswith('#'):
-                        continue
-                    parts = line.rsplit(' - ', 1)
-                    if len(parts) == 2:
-                        song_title = parts[0].strip().lower()
-                        artist = parts[1].strip().lower()
-                        songs_to_find.append({
-                            'title': song_title,
-                            'artist': artist,
-                            'original_line': line
-                        })
-                    else:
-                        self._log_message(self.translator.t(
-                            'parse_warning', line), 'warning')
+            with gc_paused():
+                songs_to_find = list(self.iter_song_list(file_path, stats))
         except FileNotFoundError:
             self._log_message(self.translator.t(
                 'file_not_found', file_path), 'error')
@@ -69,68 +162,321 @@ class MusicProcessor:
         except Exception as e:
             self._log_message(self.translator.t('parse_error', e), 'error')
             return None
+        elapsed = time.perf_counter() - started
+        run_report.current().add(
+            'parse_list', elapsed, stats.lines_read, stats.bytes_read)
+        self.logger.info(
+            f"解析歌单 {file_path}: {stats.lines_read} 行，"
+            f"{len(songs_to_find)} 首歌曲，用时 {elapsed:.3f} 秒"
+            f"（{stats.lines_read / elapsed if elapsed > 0 else 0:.0f} 行/秒"
+            f"{'，内存映射' if stats.used_mmap else ''}）")
         return songs_to_find
 
+    @run_report.instrumented('pick')
     def find_and_copy_songs(
             self,
             songs_to_find,
             library_path,
             output_path,
             progress_callback):
-        """查找并复制歌曲"""
+        """
+        查找并复制歌曲
+
+        Args:
+            songs_to_find: 歌曲列表
+            library_path: 音乐库路径
+            output_path: 输出目录
+            progress_callback: 进度回调，参数为 ProgressSnapshot
+
+        Returns:
+            是否成功完成（音乐库无效、无法创建输出目录或中止时返回False）
+        """
         if not songs_to_find:
             self._log_message(self.translator.t('song_list_empty'))
-            return
+            return True
 
         if not os.path.isdir(library_path):
             self._log_message(self.translator.t(
                 'invalid_library_path', library_path), 'error')
-            return
+            run_report.current().mark('failed')
+            return False
 
         # 创建输出目录
         if not self._create_output_directory(output_path):
-            return
+            run_report.current().mark('failed')
+            return False
 
-        found_count = 0
-        total_songs_to_check = len(songs_to_find)
+        match_started = time.perf_counter()
+        report = run_report.current()
 
         self._log_message(self.translator.t('starting_search', library_path))
 
         # 创建歌曲状态字典
-        song_status = {song_info['original_line']                       : False for song_info in songs_to_find}
-
-        # 遍历音乐库
-        for root, _, files in os.walk(library_path):
-            if not self.is_running:
-                self._log_message(self.translator.t('operation_aborted'))
-                return
-
-            for filename in files:
+        song_status = {
+            song_info.original_line: False for song_info in songs_to_find}
+        progress = ProgressTracker(progress_callback, len(song_status))
+        self._begin_file_log(len(song_status))
+
+        # 最佳音质模式：带标记的歌曲记录当前最佳文件，扫描结束后再输出
+        best_quality = {}
+        if self.prefer_best_quality:
+            best_quality = {song_info.original_line: None
+                            for song_info in songs_to_find
+                            if song_info.prefer_best}
+
+        # 分批扫描音乐库并建立索引（每次运行只扫描一次），
+        # 每批只为尚未找到的歌曲筛选候选文件
+        library_index = LibraryIndex()
+        scan_stats = ScanStats()
+        file_stage = self._iter_library_files(
+            library_path, library_index, scan_stats, songs_to_find,
+            song_status, best_quality, progress)
+        # 元数据匹配需要检查每个文件，文件名匹配只需处理候选文件
+        if self.use_metadata_matching and self.metadata_processor:
+            file_stage = self._iter_library_metadata(
+                library_index, file_stage)
+        else:
+            file_stage = ((file_id, matches, None)
+                          for file_id, matches in file_stage)
+
+        # 增量同步：读取输出文件夹中的同步清单
+        sync_manifest = None
+        on_copied = None
+        if self.sync_mode:
+            sync_manifest = SyncManifest(output_path, self.sync_hash)
+            sync_manifest.load()
+
+            def on_copied(job, mode):
+                sync_manifest.record(
+                    os.path.basename(job.destination), job.source)
+
+        # 匹配与复制分为两个阶段：匹配结果进入有界队列，由复制线程并行处理
+        copy_pipeline = CopyPipeline(
+            self.translator, self._log_message,
+            output_mode=self.output_mode, on_copied=on_copied,
+            per_file_log=self.per_file_log)
+        copy_pipeline.start()
+        report.add_source(lambda: self._live_counters(progress, copy_pipeline))
+        claimed_destinations = set()
+        completed = False
+        stopped_early = False
+        try:
+            for file_id, filename_matches, metadata in file_stage:
                 if not self.is_running:
-                    self._log_message(self.translator.t('operation_aborted'))
-                    return
-
-                if not is_supported_audio_file(
-                        filename, SUPPORTED_AUDIO_FORMATS):
-                    continue
+                    break
 
-                file_path = os.path.join(root, filename)
-                filename_no_ext = normalize_filename(filename)
+                entry = library_index.entry(file_id)
 
                 # 检查是否匹配歌曲列表
-                found_count += self._process_file_match(
-                    file_path, filename, filename_no_ext,
-                    songs_to_find, song_status, output_path
-                )
+                with report.phase('match'):
+                    matched = self._process_file_match(
+                        entry.file_path, entry.filename,
+                        songs_to_find, song_status, output_path,
+                        copy_pipeline, claimed_destinations,
+                        filename_matches, metadata, sync_manifest,
+                        best_quality)
+                if matched:
+                    progress.songs_matched += 1
+
+                # 更新进度（文件按编号顺序处理，编号即为已扫描数量）
+                progress.files_scanned = file_id + 1
+                progress.files_copied = copy_pipeline.files_copied
+                progress.report()
+
+                # 所有歌曲都已找到且没有需要比较音质的歌曲时，不再扫描剩余文件
+                if (progress.songs_matched == progress.songs_total and
+                        not best_quality):
+                    completed = stopped_early = True
+                    break
+            else:
+                # 扫描或元数据阶段因停止请求提前结束时不算完成
+                completed = self.is_running
+                progress.files_scanned = progress.files_total
+
+            if completed:
+                self._schedule_best_quality(
+                    best_quality, output_path, copy_pipeline,
+                    claimed_destinations, sync_manifest)
+        finally:
+            file_stage.close()
+            match_seconds = time.perf_counter() - match_started
+            copy_pipeline.finish(cancel=not completed)
+            if sync_manifest:
+                self._finalize_sync(
+                    sync_manifest, claimed_destinations, completed)
+
+        if not completed:
+            report.mark('aborted')
+            self._record_run_counters(
+                report, progress, scan_stats, len(library_index))
+            self._log_message(self.translator.t('operation_aborted'))
+            return False
+
+        if stopped_early:
+            self._log_message(self.translator.t(
+                'early_stop_summary', progress.files_scanned,
+                scan_stats.directories_listed,
+                scan_stats.directories_skipped))
+        else:
+            self._log_message(self.translator.t(
+                'library_indexed', len(library_index)))
+
+        if self.use_metadata_matching and self.metadata_processor:
+            self.metadata_processor.log_cache_stats()
 
-                # 更新进度
-                count_processed = sum(
-                    1 for status in song_status.values() if status)
-                progress_callback(count_processed, total_songs_to_check)
+        # 复制失败的歌曲重新标记为未找到
+        for failure in copy_pipeline.failures:
+            if song_status[failure.job.label]:
+                song_status[failure.job.label] = False
+                progress.songs_matched -= 1
+        progress.files_copied = copy_pipeline.files_copied
 
         # 处理完成
         self._finalize_processing(
-            found_count, song_status, total_songs_to_check, progress_callback)
+            copy_pipeline.files_copied, song_status, progress)
+        self._log_timing_summary(match_seconds, copy_pipeline)
+        self._record_run_counters(
+            report, progress, scan_stats, len(library_index))
+        return True
+
+    def _iter_library_files(
+            self,
+            library_path,
+            library_index,
+            scan_stats,
+            songs_to_find,
+            song_status,
+            best_quality,
+            progress):
+        """
+        分批扫描音乐库：每批文件加入索引后，只为尚未找到的歌曲筛选文件名匹配
+
+        Args:
+            library_path: 音乐库路径
+            library_index: 音乐库索引（扫描到的文件依次加入）
+            scan_stats: 扫描统计
+            songs_to_find: 歌曲列表
+            song_status: 歌曲状态字典
+            best_quality: 最佳音质模式下需要比较音质的歌曲
+            progress: 进度计数器
+
+        Yields:
+            (文件编号, 文件名匹配的歌曲序号列表)，按扫描顺序；
+            元数据匹配时输出所有文件，否则只输出有文件名匹配的文件
+        """
+        use_metadata = bool(
+            self.use_metadata_matching and self.metadata_processor)
+        report = run_report.current()
+        # 每首歌曲只标准化一次，所有批次共享
+        with report.phase('normalize', len(songs_to_find)):
+            queries = [prepare_song_query(song_info.title, song_info.artist)
+                       for song_info in songs_to_find]
+        scan_source = scan_library
+        if (self.library_watcher and
+                self.library_watcher.is_watching(library_path)):
+            scan_source = self.library_watcher.scan
+        elif self.library_snapshot:
+            scan_source = self.library_snapshot.scan
+        scan = scan_source(library_path,
+                           should_continue=lambda: self.is_running,
+                           stats=scan_stats)
+        try:
+            while True:
+                with report.phase('scan') as timer:
+                    chunk = list(islice(scan, SCAN_CHUNK_SIZE))
+                    timer.calls = len(chunk)
+                if not chunk:
+                    break
+
+                chunk_start = len(library_index)
+                with report.phase('index', len(chunk)):
+                    for scan_entry in chunk:
+                        library_index.add(
+                            scan_entry.path, scan_entry.name, scan_entry.key)
+                progress.files_total += len(chunk)
+                progress.report()
+
+                with report.phase('filename_match', len(chunk)):
+                    filename_matches = self._find_filename_matches(
+                        songs_to_find, queries, library_index, song_status,
+                        best_quality, chunk_start)
+                if use_metadata:
+                    file_ids = range(chunk_start, len(library_index))
+                else:
+                    file_ids = sorted(filename_matches)
+                for file_id in file_ids:
+                    yield file_id, filename_matches.get(file_id, ())
+        finally:
+            scan.close()
+
+    def _iter_library_metadata(self, library_index, file_stage):
+        """
+        元数据阶段：每个文件只读取一次标签，由进程池并行解析
+
+        Args:
+            library_index: 音乐库索引
+            file_stage: _iter_library_files 的输出
+
+        Yields:
+            (文件编号, 文件名匹配的歌曲序号列表, MusicMetadata或None)，按文件编号顺序
+        """
+        queued = deque()
+
+        def file_paths():
+            for file_id, filename_matches in file_stage:
+                queued.append((file_id, filename_matches))
+                yield library_index.entry(file_id).file_path
+
+        # 有序输出，结果与排队的文件一一对应
+        results = self.metadata_processor.extract_many(
+            file_paths(), ordered=True,
+            should_continue=lambda: self.is_running)
+        try:
+            for _, metadata in results:
+                file_id, filename_matches = queued.popleft()
+                yield file_id, filename_matches, metadata
+        finally:
+            results.close()
+            file_stage.close()
+
+    def _find_filename_matches(
+            self,
+            songs_to_find,
+            queries,
+            library_index,
+            song_status,
+            best_quality=None,
+            start=0):
+        """
+        利用音乐库索引查找文件名匹配
+
+        Args:
+            songs_to_find: 歌曲列表
+            queries: 与歌曲列表对应的预先标准化条目
+            library_index: 音乐库索引
+            song_status: 歌曲状态字典（已找到的歌曲不再查找）
+            best_quality: 最佳音质模式下找到后仍需继续查找的歌曲
+            start: 只查找编号不小于该值的文件
+
+        Returns:
+            文件编号 -> 按歌单顺序排列的匹配歌曲序号列表
+        """
+        best_quality = best_quality or {}
+        filename_matches = {}
+        for song_index, song_info in enumerate(songs_to_find):
+            if not self.is_running:
+                break
+            original_line = song_info.original_line
+            if song_status[original_line] and original_line not in best_quality:
+                continue
+            query = queries[song_index]
+            for file_id in library_index.candidates(
+                    query.title, query.artist, start):
+                entry = library_index.entry(file_id)
+                if self._enhanced_filename_match(query, entry.filename_no_ext):
+                    filename_matches.setdefault(
+                        file_id, []).append(song_index)
+        return filename_matches
 
     def _create_output_directory(self, output_path):
         """创建输出目录"""
@@ -146,66 +492,37 @@ class MusicProcessor:
                 return False
         return True
 
-    def _normalize_artist_separators(self, text: str) -> str:
-        """
-        标准化艺术家分隔符，将 / 和 _ 统一处理
-
-        Args:
-            text: 待处理的文本
-
-        Returns:
-            标准化后的文本
-        """
-        import re
-        # 将 / 和 _ 都替换为空格，便于匹配
-        text = re.sub(r'[/_]', ' ', text)
-        # 压缩多个空格为单个空格
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text.lower()
-
     def _enhanced_filename_match(
             self,
-            song_title: str,
-            song_artist: str,
+            query: SongQuery,
             filename_no_ext: str) -> bool:
         """
         增强的文件名匹配算法，支持多作者分隔符兼容
 
         Args:
-            song_title: 歌曲标题
-            song_artist: 歌曲艺术家
+            query: 预先标准化的歌曲条目
             filename_no_ext: 文件名（无扩展名）
 
         Returns:
             是否匹配
         """
         # 基本匹配：直接包含检查
-        if song_title in filename_no_ext and song_artist in filename_no_ext:
+        if query.title in filename_no_ext and query.artist in filename_no_ext:
             return True
 
         # 增强匹配：处理分隔符差异
-        normalized_filename = self._normalize_artist_separators(
-            filename_no_ext)
-        normalized_artist = self._normalize_artist_separators(song_artist)
-        normalized_title = song_title.lower().strip()
+        normalized_filename = normalize_artist_separators(filename_no_ext)
+        normalized_title = query.normalized_title
 
         # 检查标准化后的匹配
-        if normalized_title in normalized_filename and normalized_artist in normalized_filename:
+        if (normalized_title in normalized_filename and
+                query.normalized_artist in normalized_filename):
             return True
 
-        # 处理多个艺术家的情况：分解艺术家名称
-        import re
-        # 分解歌单中的艺术家（支持 / 和 _ 分隔符）
-        artists_in_song = re.split(r'[/_]', song_artist.strip())
-        artists_in_song = [artist.strip().lower()
-                           for artist in artists_in_song if artist.strip()]
-
-        # 检查是否所有艺术家都在文件名中
-        if artists_in_song:
-            all_artists_found = all(
-                artist in normalized_filename for artist in artists_in_song)
-            if normalized_title in normalized_filename and all_artists_found:
-                return True
+        # 处理多个艺术家的情况：检查是否所有艺术家都在文件名中
+        if query.artists and normalized_title in normalized_filename:
+            return all(
+                artist in normalized_filename for artist in query.artists)
 
         return False
 
@@ -213,81 +530,250 @@ class MusicProcessor:
             self,
             file_path,
             filename,
-            filename_no_ext,
             songs_to_find,
             song_status,
-            output_path):
-        """处理文件匹配"""
-        found_count = 0
+            output_path,
+            copy_pipeline,
+            claimed_destinations,
+            filename_matches=(),
+            metadata=None,
+            sync_manifest=None,
+            best_quality=None):
+        """
+        处理文件匹配，匹配成功的文件交给复制流水线
+
+        Args:
+            file_path: 文件路径
+            filename: 文件名
+            songs_to_find: 歌曲列表
+            song_status: 歌曲状态字典
+            output_path: 输出目录
+            copy_pipeline: 复制流水线
+            claimed_destinations: 本次运行已分配的目标路径
+            filename_matches: 通过索引确认文件名匹配的歌曲序号列表
+            metadata: 元数据阶段读取的文件元数据（未启用元数据匹配时为None）
+            sync_manifest: 增量同步清单（未启用同步时为None）
+            best_quality: 需要比较音质的歌曲 -> (音质, 文件路径, 文件名) 或 None
 
-        for song_info in songs_to_find:
-            if song_status[song_info['original_line']]:
+        Returns:
+            是否有歌曲首次匹配
+        """
+        if best_quality is None:
+            best_quality = {}
+        use_metadata = metadata is not None
+        if use_metadata:
+            song_indices = range(len(songs_to_find))
+        else:
+            song_indices = filename_matches
+
+        for song_index in song_indices:
+            song_info = songs_to_find[song_index]
+            original_line = song_info.original_line
+            compare_quality = original_line in best_quality
+            if song_status[original_line] and not compare_quality:
                 continue
 
             # 根据设置选择匹配方式
             is_match = False
-            if self.use_metadata_matching and self.metadata_processor:
-                # 使用元数据匹配
-                metadata = self.metadata_processor.extract_metadata(file_path)
-                if metadata:
-                    is_match = self.metadata_processor.match_song_by_metadata(
-                        song_info, metadata)
-                    if is_match:
-                        self._log_message(
-                            f"元数据匹配: {
-                                song_info['original_line']} -> {filename}")
-              # 如果元数据匹配失败或未启用，则使用文件名匹配
-            if not is_match:
-                # 使用增强的文件名匹配算法
-                is_match = self._enhanced_filename_match(
-                    song_info['title'], song_info['artist'], filename_no_ext)
+            if use_metadata:
+                # 使用元数据匹配（元数据已在元数据阶段读取）
+                is_match = self.metadata_processor.match_song_by_metadata(
+                    song_info, metadata)
                 if is_match:
-                    if self.use_metadata_matching:
-                        self._log_message(
-                            f"文件名匹配: {
-                                song_info['original_line']} -> {filename}")
-                    else:
-                        self._log_message(
-                            f"文件名匹配: {
-                                song_info['original_line']} -> {filename}")
+                    self._log_file_message(
+                        f"元数据匹配: {
+                            song_info.original_line} -> {filename}")
+            # 如果元数据匹配失败或未启用，则使用文件名匹配结果
+            if not is_match and song_index in filename_matches:
+                is_match = True
+                self._log_file_message(
+                    f"文件名匹配: {
+                        song_info.original_line} -> {filename}")
+
+            if is_match and compare_quality:
+                # 只记录音质更好的文件，扫描结束后统一输出
+                quality = self._quality_rank(file_path, metadata)
+                current = best_quality[original_line]
+                if current is not None and quality <= current[0]:
+                    continue
+                best_quality[original_line] = (quality, file_path, filename)
+                song_status[original_line] = True
+                return current is None
 
             if is_match:
-                destination_path = os.path.join(output_path, filename)
-                try:
-                    if os.path.exists(destination_path):
-                        self._log_message(
-                            self.translator.t(
-                                'file_already_exists',
-                                filename,
-                                song_info['original_line']))
-                    else:
-                        shutil.copy2(file_path, destination_path)
-                        self._log_message(
-                            self.translator.t(
-                                'found_and_copied',
-                                song_info['original_line'],
-                                filename))
-                        found_count += 1
-
-                    song_status[song_info['original_line']] = True
-                    break
-                except Exception as e:
-                    self._log_message(
-                        self.translator.t(
-                            'copy_failed',
-                            file_path,
-                            destination_path,
-                            e),
-                        'error')
+                song_status[song_info.original_line] = True
+                self._schedule_output(
+                    file_path, filename, song_info.original_line,
+                    output_path, copy_pipeline, claimed_destinations,
+                    sync_manifest)
+                return True
+
+        return False
 
-        return found_count
+    def _quality_rank(self, file_path, metadata=None):
+        """
+        音质排序键：无损格式优先，其次比较比特率，最后比较文件大小
+
+        Args:
+            file_path: 文件路径
+            metadata: 文件元数据（可选，用于比较比特率）
+
+        Returns:
+            可比较的元组，越大音质越好
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        if metadata:
+            metadata.load_audio_info()
+        bitrate = metadata.bitrate if metadata and metadata.bitrate else 0
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        return (ext in LOSSLESS_AUDIO_FORMATS, bitrate, size)
+
+    def _schedule_best_quality(
+            self,
+            best_quality,
+            output_path,
+            copy_pipeline,
+            claimed_destinations,
+            sync_manifest=None):
+        """扫描结束后输出最佳音质模式下选出的文件"""
+        for original_line, choice in best_quality.items():
+            if choice is None:
+                continue
+            _, file_path, filename = choice
+            self._log_file_message(self.translator.t(
+                'best_quality_selected', original_line, filename))
+            self._schedule_output(
+                file_path, filename, original_line, output_path,
+                copy_pipeline, claimed_destinations, sync_manifest)
+
+    def _schedule_output(
+            self,
+            file_path,
+            filename,
+            original_line,
+            output_path,
+            copy_pipeline,
+            claimed_destinations,
+            sync_manifest=None):
+        """
+        决定匹配文件是否需要输出，需要时提交给复制流水线
+
+        Returns:
+            是否提交了复制任务
+        """
+        destination_path = os.path.join(output_path, filename)
+        if destination_path in claimed_destinations:
+            self._log_message(self.translator.t(
+                'file_already_exists', filename, original_line))
+            return False
+
+        # 由同步清单管理的文件：未变化则跳过，变化则替换
+        if sync_manifest and sync_manifest.is_managed(filename):
+            claimed_destinations.add(destination_path)
+            try:
+                up_to_date = sync_manifest.is_up_to_date(
+                    filename, file_path, os.stat(file_path))
+            except OSError:
+                up_to_date = False
+            if up_to_date:
+                sync_manifest.unchanged += 1
+                self._log_file_message(self.translator.t(
+                    'sync_up_to_date', original_line, filename))
+                return False
+            copy_pipeline.submit(
+                file_path, destination_path, original_line, replace=True)
+            return True
+
+        if os.path.exists(destination_path):
+            self._log_message(self.translator.t(
+                'file_already_exists', filename, original_line))
+            return False
+
+        claimed_destinations.add(destination_path)
+        copy_pipeline.submit(file_path, destination_path, original_line)
+        return True
+
+    def _finalize_sync(self, sync_manifest, claimed_destinations, completed):
+        """
+        完成增量同步：清理过期文件并保存清单
+
+        Args:
+            sync_manifest: 同步清单
+            claimed_destinations: 本次运行匹配到的输出路径
+            completed: 匹配是否完整结束（中止时不清理）
+        """
+        pruned = []
+        if completed and self.sync_prune:
+            keep = {os.path.basename(path) for path in claimed_destinations}
+            pruned = sync_manifest.prune(keep)
+            for filename in pruned:
+                self._log_message(self.translator.t('sync_pruned', filename))
+        try:
+            sync_manifest.save()
+        except OSError as e:
+            self._log_message(self.translator.t(
+                'sync_manifest_save_failed', e), 'error')
+        self._log_message(self.translator.t(
+            'sync_summary', sync_manifest.unchanged, len(pruned)))
+
+    def _log_timing_summary(self, match_seconds, copy_pipeline):
+        """输出匹配用时和复制吞吐量，并计入运行报告"""
+        report = run_report.current()
+        report.add('copy', copy_pipeline.copy_seconds,
+                   copy_pipeline.files_copied, copy_pipeline.bytes_copied)
+        report.set('match_seconds', round(match_seconds, 6))
+        report.set('bytes_copied', copy_pipeline.bytes_copied)
+        report.set('copy_failures', len(copy_pipeline.failures))
+        for mode, count in copy_pipeline.mode_counts.items():
+            report.set(f'output_{mode}', count)
+        self._log_message(
+            self.translator.t('match_time_summary', match_seconds))
+        copy_seconds = copy_pipeline.copy_seconds
+        if copy_pipeline.files_copied and copy_seconds > 0:
+            megabytes = copy_pipeline.bytes_copied / (1024 * 1024)
+            self._log_message(self.translator.t(
+                'copy_throughput_summary',
+                copy_pipeline.files_copied, megabytes, copy_seconds,
+                megabytes / copy_seconds,
+                copy_pipeline.files_copied / copy_seconds))
+        if copy_pipeline.mode_counts:
+            mode_summary = ', '.join(
+                f"{self.translator.t(f'output_mode_{mode}')} {count}"
+                for mode, count in sorted(copy_pipeline.mode_counts.items()))
+            self._log_message(
+                self.translator.t('output_mode_summary', mode_summary))
+
+    def _live_counters(self, progress, copy_pipeline):
+        """运行期间输出指标时读取的实时计数"""
+        return {
+            'files_scanned': progress.files_scanned,
+            'files_total': progress.files_total,
+            'songs_total': progress.songs_total,
+            'songs_matched': progress.songs_matched,
+            'files_copied': copy_pipeline.files_copied,
+            'bytes_copied': copy_pipeline.bytes_copied,
+        }
+
+    def _record_run_counters(self, report, progress, scan_stats,
+                             files_indexed):
+        """把进度和扫描统计写入运行报告"""
+        report.set('songs_total', progress.songs_total)
+        report.set('songs_matched', progress.songs_matched)
+        report.set('files_scanned', progress.files_scanned)
+        report.set('files_indexed', files_indexed)
+        report.set('files_copied', progress.files_copied)
+        report.set('directories_listed', scan_stats.directories_listed)
+        report.set('directories_skipped', scan_stats.directories_skipped)
+        report.set('directories_relisted', scan_stats.directories_relisted)
 
     def _finalize_processing(
             self,
             found_count,
             song_status,
-            total_songs,
-            progress_callback):
+            progress):
         """完成处理"""
         self._log_message(self.translator.t('search_complete', found_count))
 
@@ -299,11 +785,28 @@ class MusicProcessor:
             for original_line in unfound_songs:
                 self._log_message(f"- {original_line}")
 
-        progress_callback(total_songs, total_songs)
+        progress.report(force=True)
+
+    @run_report.instrumented('pick')
+    def start_processing(self, list_file, music_lib, output_dir,
+                         progress_callback=None, cancel_token=None):
+        """
+        开始处理音乐文件
+
+        Args:
+            list_file: 歌曲列表文件
+            music_lib: 音乐库路径
+            output_dir: 输出目录
+            progress_callback: 进度回调，参数为 ProgressSnapshot（可选）
+            cancel_token: 取消令牌（可选），取消时停止处理
 
-    def start_processing(self, list_file, music_lib, output_dir):
-        """开始处理音乐文件"""
+        Returns:
+            是否成功完成
+        """
         self.is_running = True
+        if cancel_token is not None:
+            # 各阶段循环检查 is_running，取消时由令牌回调清除
+            cancel_token.on_cancel(self.stop_processing)
         self._log_message("开始处理音乐文件...")
 
         # 设置元数据匹配选项
@@ -313,17 +816,19 @@ class MusicProcessor:
         # 解析歌曲列表
         songs_to_find = self.parse_song_list(list_file)
         if songs_to_find is None:
+            run_report.current().mark('failed')
             self.is_running = False
-            return
+            return False
 
         # 开始查找和复制
-        def dummy_progress_callback(current, total):
-            """临时进度回调函数"""
-            pass
+        if progress_callback is None:
+            def progress_callback(snapshot):
+                pass
 
-        self.find_and_copy_songs(
-            songs_to_find, music_lib, output_dir, dummy_progress_callback)
+        success = self.find_and_copy_songs(
+            songs_to_find, music_lib, output_dir, progress_callback)
         self.is_running = False
+        return success
 
     def stop_processing(self):
         """停止处理"""
@@ -0,0 +1,4 @@
+"""
+MusicPicker 命令行包
+通过 python -m musicpicker 运行，详见 cli 模块
+"""
@@ -0,0 +1,18 @@
+"""
+python -m musicpicker 入口
+"""
+import os
+import sys
+import multiprocessing
+
+# 处理模块位于项目根目录，从其他目录运行时加入搜索路径
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from cli import main  # noqa: E402
+
+if __name__ == '__main__':
+    # 打包后的程序需要此调用才能正确启动元数据解析子进程
+    multiprocessing.freeze_support()
+    sys.exit(main())
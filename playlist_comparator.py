@@ -3,9 +3,12 @@
 用于比较两个歌单文件的差异
 """
 import os
+import time
 import logging
-from typing import List, Set, Dict, Tuple
+from typing import Iterator, List, Set, Dict, Tuple
 import re
+import run_report
+from song_list_reader import ReadStats, iter_song_lines
 
 
 class PlaylistComparator:
@@ -27,6 +30,32 @@ class PlaylistComparator:
         """默认日志输出"""
         self.logger.info(message)
 
+    def iter_playlist_entries(self, file_path: str, encoding: str = 'utf-8',
+                              stats: ReadStats = None,
+                              warn: bool = True) -> Iterator[str]:
+        """
+        流式解析歌单文件
+
+        Args:
+            file_path: 歌单文件路径
+            encoding: 文件编码
+            stats: 读取统计（可选）
+            warn: 是否记录格式不正确的行
+
+        Yields:
+            标准化后的歌曲条目（格式：歌名 - 歌手）
+        """
+        for line_num, line in iter_song_lines(
+                file_path, encoding, stats=stats):
+            # 验证歌曲格式（歌名 - 歌手）
+            if ' - ' in line:
+                # 标准化格式
+                normalized_song = self._normalize_song_entry(line)
+                if normalized_song:
+                    yield normalized_song
+            elif warn:
+                self.log_callback(f"⚠️  第{line_num}行格式不正确: {line}")
+
     def parse_playlist_file(self, file_path: str) -> Set[str]:
         """
         解析歌单文件，返回歌曲集合
@@ -41,43 +70,27 @@ class PlaylistComparator:
             self.log_callback(f"错误: 文件不存在 {file_path}")
             return set()
 
-        songs = set()
+        stats = ReadStats()
+        started = time.perf_counter()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-
-                    # 跳过空行和注释行
-                    if not line or line.startswith('#'):
-                        continue
-
-                    # 验证歌曲格式（歌名 - 歌手）
-                    if ' - ' in line:
-                        # 标准化格式
-                        normalized_song = self._normalize_song_entry(line)
-                        if normalized_song:
-                            songs.add(normalized_song)
-                    else:
-                        self.log_callback(f"⚠️  第{line_num}行格式不正确: {line}")
-
+            songs = set(self.iter_playlist_entries(file_path, stats=stats))
             self.log_callback(
                 f"✓ 解析完成: {os.path.basename(file_path)} ({len(songs)} 首歌曲)")
+            self._log_parse_rate(file_path, stats, started)
             return songs
 
         except UnicodeDecodeError:
-            # 尝试其他编码
+            # 尝试其他编码（重新读取，已读取的条目作废）
             try:
-                with open(file_path, 'r', encoding='gbk') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and ' - ' in line:
-                            normalized_song = self._normalize_song_entry(line)
-                            if normalized_song:
-                                songs.add(normalized_song)
+                stats = ReadStats()
+                started = time.perf_counter()
+                songs = set(self.iter_playlist_entries(
+                    file_path, 'gbk', stats, warn=False))
                 self.log_callback(
                     f"✓ 解析完成(GBK编码): {
                         os.path.basename(file_path)} ({
                         len(songs)} 首歌曲)")
+                self._log_parse_rate(file_path, stats, started)
                 return songs
             except Exception as e:
                 self.log_callback(f"❌ 编码错误: {str(e)}")
@@ -86,6 +99,18 @@ class PlaylistComparator:
             self.log_callback(f"❌ 解析文件失败 {file_path}: {str(e)}")
             return set()
 
+    def _log_parse_rate(self, file_path: str, stats: ReadStats,
+                        started: float):
+        """在日志文件中记录解析速度，并计入运行报告"""
+        elapsed = time.perf_counter() - started
+        run_report.current().add(
+            'parse_playlist', elapsed, stats.lines_read, stats.bytes_read)
+        rate = stats.lines_read / elapsed if elapsed > 0 else 0
+        self.logger.info(
+            f"解析歌单 {file_path}: {stats.lines_read} 行，"
+            f"用时 {elapsed:.3f} 秒（{rate:.0f} 行/秒"
+            f"{'，内存映射' if stats.used_mmap else ''}）")
+
     def _normalize_song_entry(self, song_line: str) -> str:
         """
         标准化歌曲条目格式
@@ -108,12 +133,14 @@ class PlaylistComparator:
 
         return ""
 
+    @run_report.instrumented('compare')
     def compare_playlists(
             self,
             playlist1_path: str,
             playlist2_path: str,
             output_folder: str = None,
-            similarity_threshold: float = None) -> Dict:
+            similarity_threshold: float = None,
+            cancel_token=None) -> Dict:
         """
         比较两个歌单文件
 
@@ -122,6 +149,7 @@ class PlaylistComparator:
             playlist2_path: 第二个歌单文件路径
             output_folder: 输出文件夹路径（可选）
             similarity_threshold: 相似度阈值（可选）
+            cancel_token: 取消令牌（可选），取消时返回空结果
 
         Returns:
             比较结果字典
@@ -135,14 +163,19 @@ class PlaylistComparator:
         songs1 = self.parse_playlist_file(playlist1_path)
         songs2 = self.parse_playlist_file(playlist2_path)
 
+        if cancel_token is not None and cancel_token.cancelled:
+            return self._comparison_cancelled()
         if not songs1 and not songs2:
             self.log_callback("❌ 两个歌单都为空或解析失败")
+            run_report.current().mark('failed')
             return {}
 
+        report = run_report.current()
         # 计算差异
-        only_in_1 = songs1 - songs2  # 只在歌单1中存在
-        only_in_2 = songs2 - songs1  # 只在歌单2中存在
-        common = songs1 & songs2     # 两个歌单都有
+        with report.phase('compare', len(songs1) + len(songs2)):
+            only_in_1 = songs1 - songs2  # 只在歌单1中存在
+            only_in_2 = songs2 - songs1  # 只在歌单2中存在
+            common = songs1 & songs2     # 两个歌单都有
 
         # 生成比较结果
         result = {
@@ -175,9 +208,19 @@ class PlaylistComparator:
         self.log_callback(f"   🆔 仅在 {playlist2_name}: {len(only_in_2)} 首")
         self.log_callback(f"   🎵 总计不重复: {len(songs1 | songs2)} 首")
 
+        report.set('playlist1_songs', len(songs1))
+        report.set('playlist2_songs', len(songs2))
+        report.set('common_songs', len(common))
+
+        if cancel_token is not None and cancel_token.cancelled:
+            return self._comparison_cancelled()
+
         # 如果提供了输出文件夹，生成详细报告
         if output_folder:
-            if self.generate_difference_reports(result, output_folder):
+            with report.phase('write_reports'):
+                written = self.generate_difference_reports(
+                    result, output_folder)
+            if written:
                 self.log_callback(f"✅ 详细报告已生成到: {output_folder}")
             else:
                 self.log_callback("❌ 生成详细报告失败")
@@ -325,6 +368,12 @@ class PlaylistComparator:
 
         return safe_name
 
+    def _comparison_cancelled(self) -> Dict:
+        """记录比较已取消，返回空结果"""
+        run_report.current().mark('aborted')
+        self.log_callback("⏹ 已取消比较歌单")
+        return {}
+
     def _get_current_time(self) -> str:
         """获取当前时间字符串"""
         from datetime import datetime
@@ -333,9 +382,8 @@ class PlaylistComparator:
     def find_similar_songs(self,
                            songs1: Set[str],
                            songs2: Set[str],
-                           similarity_threshold: float = 0.8) -> List[Tuple[str,
-                                                                            str,
-                                                                            float]]:
+                           similarity_threshold: float = 0.8,
+                           cancel_token=None) -> List[Tuple[str, str, float]]:
         """
         查找相似但不完全相同的歌曲
 
@@ -343,6 +391,7 @@ class PlaylistComparator:
             songs1: 第一个歌曲集合
             songs2: 第二个歌曲集合
             similarity_threshold: 相似度阈值
+            cancel_token: 取消令牌（可选），取消时返回已找到的部分结果
 
         Returns:
             相似歌曲对列表 [(歌曲1, 歌曲2, 相似度)]
@@ -353,11 +402,15 @@ class PlaylistComparator:
         only_in_1 = songs1 - songs2
         only_in_2 = songs2 - songs1
 
-        for song1 in only_in_1:
-            for song2 in only_in_2:
-                similarity = self._calculate_song_similarity(song1, song2)
-                if similarity >= similarity_threshold:
-                    similar_pairs.append((song1, song2, similarity))
+        with run_report.current().phase(
+                'find_similar', len(only_in_1) * len(only_in_2)):
+            for song1 in only_in_1:
+                if cancel_token is not None and cancel_token.cancelled:
+                    break
+                for song2 in only_in_2:
+                    similarity = self._calculate_song_similarity(song1, song2)
+                    if similarity >= similarity_threshold:
+                        similar_pairs.append((song1, song2, similarity))
 
         # 按相似度排序
         similar_pairs.sort(key=lambda x: x[2], reverse=True)
@@ -7,7 +7,8 @@ import logging
 from typing import List, Optional, Tuple, Dict
 from pathlib import Path
 import re
-from config import SUPPORTED_AUDIO_FORMATS
+import run_report
+from library_scanner import scan_library
 
 
 class PlaylistGenerator:
@@ -30,17 +31,26 @@ class PlaylistGenerator:
         self.translator = translator
         self.log_callback = log_callback or self._default_log
         self.logger = logging.getLogger(__name__)
+        self.library_snapshot = None  # 音乐库快照（可选）
+
+    def set_library_snapshot(self, library_snapshot):
+        """设置音乐库快照，扫描时只重新列出发生变化的目录"""
+        self.library_snapshot = library_snapshot
 
     def _default_log(self, message: str):
         """默认日志输出"""
         self.logger.info(message)
 
-    def scan_music_folder(self, folder_path: str) -> List[str]:
+    def scan_music_folder(self, folder_path: str,
+                          include_subdirs: bool = True,
+                          should_continue=None) -> List[str]:
         """
         扫描文件夹中的音乐文件
 
         Args:
             folder_path: 音乐文件夹路径
+            include_subdirs: 是否包含子目录
+            should_continue: 返回 False 时停止扫描（可选）
 
         Returns:
             音乐文件路径列表
@@ -49,14 +59,15 @@ class PlaylistGenerator:
             self.log_callback(f"错误: 文件夹不存在 {folder_path}")
             return []
 
-        music_files = []
         try:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if any(file.lower().endswith(ext)
-                           for ext in SUPPORTED_AUDIO_FORMATS):
-                        file_path = os.path.join(root, file)
-                        music_files.append(file_path)
+            scan_source = scan_library
+            if self.library_snapshot:
+                scan_source = self.library_snapshot.scan
+            with run_report.current().phase('scan') as timer:
+                music_files = [entry.path for entry in scan_source(
+                    folder_path, recursive=include_subdirs,
+                    should_continue=should_continue)]
+                timer.calls = len(music_files)
 
             self.log_callback(f"扫描完成，找到 {len(music_files)} 个音乐文件")
             return music_files
@@ -110,17 +121,44 @@ class PlaylistGenerator:
 
         try:
             metadata = self.metadata_processor.extract_metadata(filepath)
-            if metadata and metadata.title and metadata.artist:
-                return (metadata.title.strip(), metadata.artist.strip())
+            return self._song_info_from_metadata(metadata)
         except Exception as e:
             self.log_callback(
                 f"提取元数据失败 {os.path.basename(filepath)}: {str(e)}")
 
         return None
 
+    def _song_info_from_metadata(self, metadata) -> Optional[Tuple[str, str]]:
+        """从已读取的元数据中取出 (歌名, 歌手)，信息不全时返回None"""
+        if metadata and metadata.title and metadata.artist:
+            return (metadata.title.strip(), metadata.artist.strip())
+        return None
+
+    def _iter_metadata(self, music_files: List[str], use_metadata: bool,
+                       should_continue=None):
+        """
+        按文件顺序输出元数据，启用元数据时由进程池并行读取
+
+        Args:
+            music_files: 音乐文件路径列表
+            use_metadata: 是否读取元数据
+            should_continue: 返回 False 时停止读取（可选）
+
+        Yields:
+            (文件路径, MusicMetadata或None)
+        """
+        if use_metadata and self.metadata_processor:
+            yield from self.metadata_processor.extract_many(
+                music_files, ordered=True, should_continue=should_continue)
+        else:
+            for file_path in music_files:
+                yield file_path, None
+
+    @run_report.instrumented('generate')
     def generate_playlist_from_folder(self, folder_path: str, output_file: str,
                                       use_metadata: bool = False,
-                                      include_subdirs: bool = True) -> bool:
+                                      include_subdirs: bool = True,
+                                      cancel_token=None) -> bool:
         """
         从文件夹生成歌单
 
@@ -129,33 +167,45 @@ class PlaylistGenerator:
             output_file: 输出的歌单文件路径
             use_metadata: 是否优先使用元数据
             include_subdirs: 是否包含子目录
+            cancel_token: 取消令牌（可选），取消时不写入歌单
 
         Returns:
             是否成功生成
         """
+        def should_continue():
+            return cancel_token is None or not cancel_token.cancelled
+
         if not os.path.exists(folder_path):
             self.log_callback("错误: 指定的文件夹不存在")
+            run_report.current().mark('failed')
             return False
 
         self.log_callback(f"开始扫描文件夹: {folder_path}")
-        music_files = self.scan_music_folder(folder_path)
+        music_files = self.scan_music_folder(
+            folder_path, include_subdirs, should_continue)
 
+        if not should_continue():
+            return self._generation_cancelled()
         if not music_files:
             self.log_callback("文件夹中没有找到音乐文件")
+            run_report.current().mark('failed')
             return False
 
         playlist_entries = []
         success_count = 0
         failed_files = []
 
-        for file_path in music_files:
+        for file_path, metadata in self._iter_metadata(
+                music_files, use_metadata, should_continue):
+            if not should_continue():
+                break
             song_info = None
             filename = os.path.basename(file_path)
 
             # 根据用户选择决定提取方式
             if use_metadata and self.metadata_processor:
                 # 优先使用元数据
-                song_info = self.extract_song_info_from_metadata(file_path)
+                song_info = self._song_info_from_metadata(metadata)
                 if not song_info:
                     # 元数据失败时降级到文件名
                     song_info = self.parse_filename(file_path)
@@ -175,13 +225,24 @@ class PlaylistGenerator:
                 failed_files.append(filename)
                 self.log_callback(f"✗ 无法解析: {filename}")
 
+        if use_metadata and self.metadata_processor:
+            self.metadata_processor.log_cache_stats()
+        if not should_continue():
+            return self._generation_cancelled()
+
+        report = run_report.current()
+        report.set('files_scanned', len(music_files))
+        report.set('entries', len(playlist_entries))
+        report.set('parse_failures', len(failed_files))
+
         # 排序歌单条目
         playlist_entries.sort()
 
         # 写入文件
         try:
             os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            with open(output_file, 'w', encoding='utf-8') as f:
+            with report.phase('write', len(playlist_entries)), \
+                    open(output_file, 'w', encoding='utf-8') as f:
                 f.write(f"# 歌单生成时间: {self._get_current_time()}\n")
                 f.write(f"# 源文件夹: {folder_path}\n")
                 f.write(f"# 总歌曲数: {len(playlist_entries)}\n")
@@ -208,8 +269,15 @@ class PlaylistGenerator:
 
         except Exception as e:
             self.log_callback(f"❌ 写入文件失败: {str(e)}")
+            run_report.current().mark('failed')
             return False
 
+    def _generation_cancelled(self) -> bool:
+        """记录生成已取消，返回 False"""
+        run_report.current().mark('aborted')
+        self.log_callback("⏹ 已取消生成歌单")
+        return False
+
     def _get_current_time(self) -> str:
         """获取当前时间字符串"""
         from datetime import datetime
@@ -236,6 +304,7 @@ class PlaylistGenerator:
                         return True
         return False
 
+    @run_report.instrumented('analyze')
     def get_folder_analysis(self, folder_path: str) -> Dict:
         """
         分析文件夹内容，返回统计信息
@@ -259,7 +328,8 @@ class PlaylistGenerator:
             "unparseable_files": []
         }
 
-        for file_path in music_files:
+        for file_path, metadata in self._iter_metadata(
+                music_files, self.metadata_processor is not None):
             filename = os.path.basename(file_path)
             ext = os.path.splitext(filename)[1].lower()
 
@@ -275,16 +345,18 @@ class PlaylistGenerator:
                 analysis["unparseable_files"].append(filename)
 
             # 检查是否有元数据
-            if self.metadata_processor:
-                metadata = self.extract_song_info_from_metadata(file_path)
-                if metadata:
-                    analysis["metadata_available"] += 1
+            if self._song_info_from_metadata(metadata):
+                analysis["metadata_available"] += 1
+
+        if self.metadata_processor:
+            self.metadata_processor.log_cache_stats()
 
         return analysis
 
     def generate_playlist(self, folder_path: str, output_file: str,
                           use_metadata: bool = False,
-                          include_subdirs: bool = True) -> bool:
+                          include_subdirs: bool = True,
+                          cancel_token=None) -> bool:
         """
         生成播放列表的主接口方法（供GUI调用）
 
@@ -293,10 +365,12 @@ class PlaylistGenerator:
             output_file: 输出的歌单文件路径
             use_metadata: 是否优先使用元数据
             include_subdirs: 是否包含子目录
+            cancel_token: 取消令牌（可选）
 
         Returns:
             是否成功生成
         """
         return self.generate_playlist_from_folder(
-            folder_path, output_file, use_metadata, include_subdirs
+            folder_path, output_file, use_metadata, include_subdirs,
+            cancel_token
         )
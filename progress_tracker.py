@@ -0,0 +1,72 @@
+"""
+进度统计模块
+维护扫描、匹配和复制计数，按固定间隔向界面报告进度、速度和预计剩余时间
+"""
+import time
+from typing import Callable, NamedTuple, Optional
+from config import PROGRESS_REFRESH_INTERVAL
+
+
+class ProgressSnapshot(NamedTuple):
+    """某一时刻的进度"""
+    files_scanned: int      # 已处理的音乐库文件数
+    files_total: int        # 已发现的音乐库文件数
+    songs_matched: int      # 已匹配的歌曲数
+    songs_total: int        # 歌单中的歌曲数
+    files_copied: int       # 已输出的文件数
+    rate: float             # 处理速度（文件/秒）
+    eta: Optional[float]    # 预计剩余秒数，未知时为None
+
+
+class ProgressTracker:
+    """O(1) 进度计数器，按刷新间隔节流回调"""
+
+    def __init__(self, callback: Callable[[ProgressSnapshot], None],
+                 songs_total: int,
+                 refresh_interval: float = PROGRESS_REFRESH_INTERVAL):
+        """
+        初始化进度计数器
+
+        Args:
+            callback: 进度回调，参数为 ProgressSnapshot
+            songs_total: 歌单中的歌曲数
+            refresh_interval: 两次回调之间的最小间隔（秒）
+        """
+        self.callback = callback
+        self.refresh_interval = refresh_interval
+        self.files_scanned = 0
+        self.files_total = 0
+        self.songs_matched = 0
+        self.songs_total = songs_total
+        self.files_copied = 0
+        self._started = time.perf_counter()
+        self._last_report = 0.0
+
+    def restart_clock(self):
+        """重新开始计算速度（进入新阶段时调用）"""
+        self._started = time.perf_counter()
+
+    def snapshot(self) -> ProgressSnapshot:
+        """生成当前进度"""
+        elapsed = time.perf_counter() - self._started
+        rate = self.files_scanned / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if rate > 0 and self.files_total >= self.files_scanned:
+            eta = (self.files_total - self.files_scanned) / rate
+        return ProgressSnapshot(
+            self.files_scanned, self.files_total,
+            self.songs_matched, self.songs_total,
+            self.files_copied, rate, eta)
+
+    def report(self, force: bool = False):
+        """
+        向回调报告进度，距上次报告不足刷新间隔时忽略
+
+        Args:
+            force: 是否忽略刷新间隔
+        """
+        now = time.perf_counter()
+        if not force and now - self._last_report < self.refresh_interval:
+            return
+        self._last_report = now
+        self.callback(self.snapshot())
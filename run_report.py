@@ -0,0 +1,306 @@
+"""
+运行报告模块
+按阶段记录耗时、次数和字节数，每次运行结束后在日志文件所在目录写出 JSON 报告，
+并交给已注册的指标输出（如 Prometheus 文本文件，运行期间也会定期输出）。
+各处理模块通过 current() 取得当前线程的报告；未在运行中或已关闭报告时
+返回空报告，计时和计数都是空操作。
+"""
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+from config import (LOG_FILE, RUN_REPORT_ENABLED, RUN_REPORT_FILE,
+                    METRICS_INTERVAL)
+
+REPORT_VERSION = 1
+
+
+class PhaseStats:
+    """一个阶段的累计统计"""
+    __slots__ = ('seconds', 'calls', 'bytes')
+
+    def __init__(self):
+        self.seconds = 0.0  # 累计耗时（秒）
+        self.calls = 0      # 处理的条目数或调用次数
+        self.bytes = 0      # 处理的字节数
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'seconds': round(self.seconds, 6), 'calls': self.calls,
+                'bytes': self.bytes}
+
+
+class _PhaseTimer:
+    """
+    阶段计时上下文，退出时把耗时计入报告
+
+    calls 和 nbytes 可以在上下文内更新（例如读取完一批文件后才知道数量）。
+    """
+    __slots__ = ('report', 'name', 'calls', 'nbytes', 'started')
+
+    def __init__(self, report, name: str, calls: int, nbytes: int):
+        self.report = report
+        self.name = name
+        self.calls = calls
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.report.add(self.name, time.perf_counter() - self.started,
+                        self.calls, self.nbytes)
+        return False
+
+
+class RunReport:
+    """一次运行（挑选、批量挑选、生成歌单、比较歌单）的报告"""
+    enabled = True
+
+    def __init__(self, kind: str):
+        """
+        Args:
+            kind: 运行类型，写入报告
+        """
+        self.kind = kind
+        self.status = 'running'
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.wall_seconds = None
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, Any] = {}
+        self._sources: List[Callable[[], Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def phase(self, name: str, calls: int = 1, nbytes: int = 0) -> _PhaseTimer:
+        """返回计时上下文，退出时累计到指定阶段"""
+        return _PhaseTimer(self, name, calls, nbytes)
+
+    def add(self, name: str, seconds: float = 0.0, calls: int = 1,
+            nbytes: int = 0):
+        """累计一个阶段的耗时、次数和字节数（线程安全）"""
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats()
+            stats.seconds += seconds
+            stats.calls += calls
+            stats.bytes += nbytes
+
+    def set(self, name: str, value: Any):
+        """设置计数器"""
+        with self._lock:
+            self.counters[name] = value
+
+    def increment(self, name: str, value: int = 1):
+        """增加计数器"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_source(self, source: Callable[[], Dict[str, Any]]):
+        """
+        注册实时计数来源，生成报告时调用
+
+        运行期间定期输出指标时，进度等尚未写入计数器的数值从这里读取；
+        同名的计数器优先于来源中的数值。
+        """
+        with self._lock:
+            self._sources.append(source)
+
+    def mark(self, status: str):
+        """设置运行状态（running、completed、aborted、failed）"""
+        self.status = status
+
+    def finish(self):
+        """记录总耗时，未设置状态时视为正常完成"""
+        self.wall_seconds = time.perf_counter() - self._started
+        if self.status == 'running':
+            self.status = 'completed'
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            sources = list(self._sources)
+        counters = {}
+        for source in sources:
+            counters.update(source())
+        with self._lock:
+            counters.update(self.counters)
+            wall_seconds = self.wall_seconds
+            if wall_seconds is None:
+                wall_seconds = time.perf_counter() - self._started
+            return {
+                'version': REPORT_VERSION,
+                'kind': self.kind,
+                'status': self.status,
+                'started_at': time.strftime(
+                    '%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'started_timestamp': self.started_at,
+                'wall_seconds': round(wall_seconds, 6),
+                'phases': {name: stats.to_dict()
+                           for name, stats in self.phases.items()},
+                'counters': counters,
+            }
+
+    def write(self, path: str):
+        """原子写入 JSON 报告"""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+
+class _NullPhase:
+    """空计时上下文"""
+    __slots__ = ('calls', 'nbytes')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _NullReport:
+    """未记录报告时使用的空报告，所有方法都是空操作"""
+    enabled = False
+
+    def phase(self, name, calls=1, nbytes=0):
+        return _NULL_PHASE
+
+    def add(self, name, seconds=0.0, calls=1, nbytes=0):
+        pass
+
+    def set(self, name, value):
+        pass
+
+    def increment(self, name, value=1):
+        pass
+
+    def add_source(self, source):
+        pass
+
+    def mark(self, status):
+        pass
+
+
+NULL_REPORT = _NullReport()
+
+_state = threading.local()
+_sinks = []
+logger = logging.getLogger(__name__)
+
+
+class _PeriodicWriter(threading.Thread):
+    """运行期间按固定间隔把报告交给指标输出"""
+
+    def __init__(self, report: RunReport, sinks: List, interval: float):
+        super().__init__(name='RunReportMetrics', daemon=True)
+        self.report = report
+        self.sinks = sinks
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            _write_sinks(self.report, self.sinks)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def current():
+    """当前线程正在记录的报告，不在运行中时返回空报告"""
+    return getattr(_state, 'report', NULL_REPORT)
+
+
+def add_sink(sink):
+    """
+    注册指标输出
+
+    Args:
+        sink: 提供 write(report) 方法的对象，运行期间定期调用，运行结束时再调用一次
+    """
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    """取消注册指标输出"""
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def _write_sinks(report: RunReport, sinks: List):
+    """把报告交给各指标输出，单个输出失败不影响运行"""
+    for sink in sinks:
+        try:
+            sink.write(report)
+        except OSError as e:
+            logger.warning(f"写入运行指标失败: {e}")
+
+
+def report_path() -> str:
+    """报告文件路径（与日志文件同一目录）"""
+    return os.path.join(os.path.dirname(os.path.abspath(LOG_FILE)),
+                        RUN_REPORT_FILE)
+
+
+@contextmanager
+def run(kind: str) -> Iterator:
+    """
+    记录一次运行：嵌套调用时沿用外层报告，最外层结束时写出报告并输出指标
+
+    Args:
+        kind: 运行类型
+
+    Yields:
+        RunReport，未启用报告时为空报告
+    """
+    outer = current()
+    if outer.enabled or not (RUN_REPORT_ENABLED or _sinks):
+        yield outer
+        return
+
+    report = RunReport(kind)
+    _state.report = report
+    sinks = list(_sinks)
+    writer = None
+    if sinks and METRICS_INTERVAL > 0:
+        writer = _PeriodicWriter(report, sinks, METRICS_INTERVAL)
+        writer.start()
+    try:
+        yield report
+    except BaseException:
+        report.mark('failed')
+        raise
+    finally:
+        del _state.report
+        report.finish()
+        if writer:
+            writer.stop()
+        if RUN_REPORT_ENABLED:
+            path = report_path()
+            try:
+                report.write(path)
+                logger.info(f"运行报告已写入: {path}")
+            except OSError as e:
+                logger.warning(f"写入运行报告失败: {e}")
+        _write_sinks(report, sinks)
+
+
+def instrumented(kind: str):
+    """装饰器：在 run(kind) 中执行被装饰的方法"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with run(kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,167 @@
+"""
+歌单读取模块
+按块读取歌单文件（大文件使用内存映射）并逐行流式输出，
+歌曲条目使用紧凑的元组记录，不为每一行创建字典
+"""
+import gc
+import os
+import mmap
+import codecs
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, Optional, Tuple
+from config import (SONG_LIST_CHUNK_SIZE, SONG_LIST_MMAP_THRESHOLD,
+                    BEST_QUALITY_MARKER)
+
+
+class SongEntry(NamedTuple):
+    """歌单中的一首歌曲"""
+    title: str               # 歌名（小写）
+    artist: str              # 歌手（小写）
+    original_line: str       # 歌单中的原始行
+    prefer_best: bool = False  # 行尾带有最佳音质标记
+
+
+class ReadStats:
+    """读取统计，由 iter_song_lines 在读取过程中更新"""
+
+    def __init__(self):
+        self.lines_read = 0    # 已读取的行数（含空行和注释行）
+        self.bytes_read = 0    # 已读取的字节数
+        self.used_mmap = False  # 是否使用了内存映射
+
+
+def _iter_blocks(file_path: str, use_mmap: Optional[bool], chunk_size: int,
+                 stats: Optional[ReadStats]) -> Iterator[bytes]:
+    """按块读取文件内容，use_mmap 为 None 时按文件大小自动选择"""
+    with open(file_path, 'rb') as f:
+        if use_mmap is None:
+            use_mmap = os.fstat(f.fileno()).st_size >= SONG_LIST_MMAP_THRESHOLD
+        mapped = None
+        if use_mmap:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # 空文件或文件系统不支持映射时退回普通读取
+                mapped = None
+
+        if mapped is not None:
+            if stats is not None:
+                stats.used_mmap = True
+            with mapped:
+                for start in range(0, len(mapped), chunk_size):
+                    yield mapped[start:start + chunk_size]
+            return
+
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                return
+            yield block
+
+
+def iter_song_lines(file_path: str,
+                    encoding: str = 'utf-8',
+                    use_mmap: Optional[bool] = None,
+                    chunk_size: int = SONG_LIST_CHUNK_SIZE,
+                    stats: Optional[ReadStats] = None
+                    ) -> Iterator[Tuple[int, str]]:
+    """
+    逐行流式读取歌单，跳过空行和注释行
+
+    换行规则与文本模式打开文件相同（\\n、\\r\\n 和 \\r 都视为换行）。
+
+    Args:
+        file_path: 歌单文件路径
+        encoding: 文件编码，解码失败时抛出 UnicodeDecodeError
+        use_mmap: 是否使用内存映射，None 表示超过 SONG_LIST_MMAP_THRESHOLD 时使用
+        chunk_size: 每次读取的字节数
+        stats: 读取统计（可选）
+
+    Yields:
+        (行号, 去除首尾空白的行文本)
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    line_num = 0
+    pending = ''
+
+    def split_lines(text):
+        return text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+    for block in _iter_blocks(file_path, use_mmap, chunk_size, stats):
+        if stats is not None:
+            stats.bytes_read += len(block)
+        text = pending + decoder.decode(block)
+        # 块末尾的 \r 可能与下一块开头的 \n 组成一个换行，留到下一块处理
+        held = ''
+        if text.endswith('\r'):
+            text, held = text[:-1], '\r'
+        lines = split_lines(text)
+        pending = lines.pop() + held
+        for line in lines:
+            line_num += 1
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line_num, line
+        if stats is not None:
+            stats.lines_read = line_num
+
+    lines = split_lines(pending + decoder.decode(b'', final=True))
+    if lines[-1] == '':
+        lines.pop()
+    for line in lines:
+        line_num += 1
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line_num, line
+    if stats is not None:
+        stats.lines_read = line_num
+
+
+def iter_song_entries(file_path: str,
+                      on_invalid: Optional[Callable[[str], None]] = None,
+                      stats: Optional[ReadStats] = None,
+                      **read_options) -> Iterator[SongEntry]:
+    """
+    流式解析 "歌名 - 歌手" 格式的歌单，行尾的最佳音质标记不参与匹配
+
+    Args:
+        file_path: 歌单文件路径
+        on_invalid: 格式不正确的行的回调（可选）
+        stats: 读取统计（可选）
+        **read_options: 传给 iter_song_lines 的编码、内存映射和块大小选项
+
+    Yields:
+        SongEntry
+    """
+    # 直接构造元组，跳过 NamedTuple.__new__ 的参数处理（每行一次，开销明显）
+    new_entry = tuple.__new__
+    marker = BEST_QUALITY_MARKER
+    marker_length = len(marker)
+    for _, line in iter_song_lines(file_path, stats=stats, **read_options):
+        prefer_best = line.lower().endswith(marker)
+        song_text = line[:-marker_length].rstrip() if prefer_best else line
+        parts = song_text.rsplit(' - ', 1)
+        if len(parts) != 2:
+            if on_invalid is not None:
+                on_invalid(line)
+            continue
+        yield new_entry(SongEntry, (parts[0].strip().lower(),
+                                    parts[1].strip().lower(),
+                                    line, prefer_best))
+
+
+@contextmanager
+def gc_paused():
+    """
+    暂停循环垃圾回收
+
+    一次性创建数百万个元组记录时，分代回收会被反复触发并遍历所有已创建的记录；
+    这些记录只包含字符串，不会形成循环引用。
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
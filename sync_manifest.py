@@ -0,0 +1,154 @@
+"""
+增量同步清单模块
+在输出文件夹中记录每个输出文件的来源和状态，重复运行时只复制新增或变化的文件
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from config import SYNC_MANIFEST_FILE
+
+# 清单格式版本
+MANIFEST_VERSION = 1
+
+
+def file_hash(filepath: str, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件的 SHA-1 摘要"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SyncManifest:
+    """输出文件夹同步清单"""
+
+    def __init__(self, output_path: str, use_hash: bool = False):
+        """
+        初始化同步清单
+
+        Args:
+            output_path: 输出文件夹路径
+            use_hash: 是否记录并比较文件摘要（修改时间变化但内容相同时避免重复复制）
+        """
+        self.output_path = output_path
+        self.manifest_path = os.path.join(output_path, SYNC_MANIFEST_FILE)
+        self.use_hash = use_hash
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, Dict] = {}
+        self.unchanged = 0  # 本次运行因未变化而跳过的文件数
+        self._lock = threading.Lock()
+
+    def load(self):
+        """读取清单，文件不存在或损坏时视为空清单"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except FileNotFoundError:
+            self.entries = {}
+        except Exception as e:
+            self.logger.warning(f"读取同步清单失败，将重新建立: {e}")
+            self.entries = {}
+
+    def save(self):
+        """原子写入清单"""
+        temp_path = self.manifest_path + '.tmp'
+        with self._lock:
+            data = {'version': MANIFEST_VERSION, 'entries': self.entries}
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.manifest_path)
+
+    def is_managed(self, filename: str) -> bool:
+        """目标文件是否由清单管理"""
+        with self._lock:
+            return filename in self.entries
+
+    def is_up_to_date(self, filename: str, source: str,
+                      source_stat: os.stat_result) -> bool:
+        """
+        检查目标文件是否已是最新
+
+        Args:
+            filename: 输出文件名
+            source: 源文件路径
+            source_stat: 源文件当前状态
+
+        Returns:
+            来源、大小和修改时间一致（或摘要一致）且目标文件存在时返回True
+        """
+        with self._lock:
+            entry = self.entries.get(filename)
+        # 来源以绝对路径记录，从不同工作目录运行时同样可以比较
+        if not entry or entry.get('source') != os.path.abspath(source):
+            return False
+        if not os.path.lexists(os.path.join(self.output_path, filename)):
+            return False
+        if (entry.get('size') == source_stat.st_size and
+                entry.get('mtime_ns') == source_stat.st_mtime_ns):
+            return True
+
+        # 修改时间变化但内容相同（例如文件被 touch），更新记录即可
+        if (self.use_hash and entry.get('hash') and
+                entry.get('size') == source_stat.st_size and
+                file_hash(source) == entry['hash']):
+            self.record(filename, source, source_stat, entry['hash'])
+            return True
+        return False
+
+    def record(self, filename: str, source: str,
+               source_stat: Optional[os.stat_result] = None,
+               digest: Optional[str] = None):
+        """
+        记录已输出的文件
+
+        Args:
+            filename: 输出文件名
+            source: 源文件路径（记录为绝对路径）
+            source_stat: 源文件状态（省略时重新读取）
+            digest: 文件摘要（启用摘要且省略时重新计算）
+        """
+        if source_stat is None:
+            source_stat = os.stat(source)
+        if self.use_hash and digest is None:
+            digest = file_hash(source)
+        entry = {
+            'source': os.path.abspath(source),
+            'size': source_stat.st_size,
+            'mtime_ns': source_stat.st_mtime_ns,
+        }
+        if digest:
+            entry['hash'] = digest
+        with self._lock:
+            self.entries[filename] = entry
+
+    def prune(self, keep: set) -> List[str]:
+        """
+        删除本次运行不再需要的输出文件
+
+        Args:
+            keep: 本次运行匹配到的输出文件名集合
+
+        Returns:
+            已删除的文件名列表
+        """
+        with self._lock:
+            stale = [name for name in self.entries if name not in keep]
+        removed = []
+        for filename in stale:
+            try:
+                os.remove(os.path.join(self.output_path, filename))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"删除过期文件失败 {filename}: {e}")
+                continue
+            with self._lock:
+                self.entries.pop(filename, None)
+            removed.append(filename)
+        return removed
@@ -0,0 +1,359 @@
+"""
+快速标签读取模块
+只读取文件开头的标签区域，不解析音频帧：
+- MP3：按帧头遍历 ID3v2 标签，只读取标题、艺术家等文本帧，跳过 APIC 封面等其他帧
+- FLAC：按块头遍历元数据块，只读取 STREAMINFO 和 VORBIS_COMMENT 中需要的字段，
+  跳过 PICTURE 等其他块
+- M4A：只读取原子头，解析标签前去掉 covr 封面
+
+读取到的帧和块组成一个很小的内存文件交给 mutagen 解码，结果与完整解析相同。
+MP3 和 M4A 的时长和比特率需要时再由 read_audio_info 读取；遇到不常见的标签结构时
+返回 None，由调用方改用完整解析。
+
+这里用到 mutagen 的内部接口（ID3 帧表、MP4 原子解析、直接构造 MPEGInfo 和
+MP4Info），mutagen 升级后接口变化时同样改用完整解析。
+"""
+import io
+import os
+import struct
+from typing import Any, NamedTuple, Optional, Tuple
+
+# 元数据字段 -> 依次查找的标签键（ID3、Vorbis 注释、MP4）
+FIELD_TAG_KEYS = {
+    'title': ['TIT2', 'TITLE', '\xa9nam'],
+    'artist': ['TPE1', 'ARTIST', '\xa9ART'],
+    'album': ['TALB', 'ALBUM', '\xa9alb'],
+    'albumartist': ['TPE2', 'ALBUMARTIST', 'aART'],
+    'date': ['TDRC', 'DATE', '\xa9day'],
+    'genre': ['TCON', 'GENRE', '\xa9gen'],
+    'track': ['TRCK', 'TRACKNUMBER', 'trkn'],
+}
+
+# 影响上述字段的 ID3 帧：v2.3 的年份、日期、时间帧由 mutagen 合并为 TDRC，
+# v2.2 使用三个字符的帧名
+_ID3_FRAMES = frozenset((
+    'TIT2', 'TPE1', 'TALB', 'TPE2', 'TDRC', 'TCON', 'TRCK',
+    'TYER', 'TDAT', 'TIME'))
+_ID3V22_FRAMES = frozenset((
+    'TT2', 'TP1', 'TAL', 'TP2', 'TYE', 'TDA', 'TIM', 'TCO', 'TRK'))
+# mutagen 在文件末尾这么多字节内查找 ID3v1 标签（可能紧跟在 APEv2 标签之后）
+_ID3V1_TAIL = 128 + 3
+# 判断帧大小格式时最多检查的帧头数，超过时改用完整解析
+_MAX_FRAME_HEADERS = 4096
+
+# 需要保留的 Vorbis 注释键（大写）
+_VORBIS_KEYS = frozenset(
+    key.upper() for keys in FIELD_TAG_KEYS.values() for key in keys
+    if key.isascii())
+_VORBIS_KEY_PREFIX = max(len(key) for key in _VORBIS_KEYS) + 1
+
+_FLAC_STREAMINFO = 0
+_FLAC_VORBIS_COMMENT = 4
+_FLAC_PICTURE = 6
+
+
+class FastTags(NamedTuple):
+    """快速读取的结果"""
+    tags: Any                   # mutagen 标签对象，没有标签时为 None
+    length: Optional[float]     # 时长（秒），未读取时为 None
+    bitrate: Optional[int]      # 比特率，未读取时为 None
+
+
+class _Unsupported(Exception):
+    """标签结构不在快速读取的范围内"""
+
+
+# mutagen 内部接口不存在或签名变化时出现的错误
+_MUTAGEN_API_ERRORS = (ImportError, AttributeError, TypeError)
+
+
+def _syncsafe(value: int) -> int:
+    """ID3 同步安全整数（每字节 7 位，与 mutagen 的 BitPaddedInt 相同）"""
+    return (((value >> 24) & 0x7F) << 21 | ((value >> 16) & 0x7F) << 14 |
+            ((value >> 8) & 0x7F) << 7 | (value & 0x7F))
+
+
+def _to_syncsafe(value: int) -> bytes:
+    return bytes(((value >> 21) & 0x7F, (value >> 14) & 0x7F,
+                  (value >> 7) & 0x7F, value & 0x7F))
+
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise _Unsupported('truncated')
+    return data
+
+
+# ---------------------------------------------------------------- MP3
+
+def _id3v24_sizes_syncsafe(f, tag_end: int) -> bool:
+    """
+    判断 ID3v2.4 帧大小是否为同步安全整数（部分软件写成普通整数）
+
+    规则与 mutagen.id3._tags.determine_bpi 相同，但只读取帧头。
+    """
+    from mutagen.id3 import Frames
+
+    data_size = tag_end - 10
+    results = []
+    for syncsafe in (True, False):
+        offset = found = steps = 0
+        while offset < data_size - 10:
+            steps += 1
+            if steps > _MAX_FRAME_HEADERS:
+                raise _Unsupported('too many frame headers')
+            f.seek(10 + offset)
+            header = f.read(10)
+            if header == b'\x00' * 10:
+                end_offset = -((data_size - offset) % 10)
+                break
+            name, size, _ = struct.unpack('>4sLH', header)
+            offset += 10 + (_syncsafe(size) if syncsafe else size)
+            try:
+                if name.decode('ascii') in Frames:
+                    found += 1
+            except UnicodeDecodeError:
+                continue
+        else:
+            end_offset = offset - data_size
+        results.append((found, end_offset))
+    (as_syncsafe, syncsafe_end), (as_int, int_end) = results
+    return not (as_int > as_syncsafe or (
+        as_int == as_syncsafe and syncsafe_end >= 1 and int_end <= 1))
+
+
+def _read_id3_frames(f, major: int, tag_end: int) -> bytes:
+    """按 mutagen.id3._tags.read_frames 的规则遍历帧头，返回需要的帧"""
+    if major == 2:
+        header_size, wanted = 6, _ID3V22_FRAMES
+    else:
+        header_size, wanted = 10, _ID3_FRAMES
+    syncsafe = major == 4 and _id3v24_sizes_syncsafe(f, tag_end)
+
+    frames = []
+    offset = 10
+    while tag_end - offset >= header_size:
+        f.seek(offset)
+        header = f.read(header_size)
+        if header_size == 6:
+            name, size = header[:3], int.from_bytes(header[3:], 'big')
+        else:
+            name, size, flags = struct.unpack('>4sLH', header)
+            if syncsafe:
+                size = _syncsafe(size)
+        if name.strip(b'\x00') == b'':
+            break
+        offset += header_size + size
+        if size == 0:
+            continue
+        try:
+            name = name.decode('ascii')
+        except UnicodeDecodeError:
+            continue
+        if name.endswith('\x00'):
+            # 使用 v2.2 帧名的 v2.3 帧，mutagen 会按 v2.2 帧处理
+            raise _Unsupported('v2.2 frame name in v2.3 tag')
+        if name not in wanted:
+            continue
+        if offset > tag_end:
+            raise _Unsupported('truncated frame')
+        data = f.read(size)
+        if major == 4:
+            # 统一写成同步安全整数，mutagen 解析内存文件时按同样的方式读取
+            header = name.encode('ascii') + _to_syncsafe(size) + \
+                struct.pack('>H', flags)
+        frames.append(header + data)
+    return b''.join(frames)
+
+
+def _read_mp3(f, size: int) -> FastTags:
+    from mutagen.id3 import ID3
+
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        raise _Unsupported('no ID3v2 tag')
+    major, flags = header[3], header[5]
+    if major not in (2, 3, 4) or any(byte & 0x80 for byte in header[6:10]):
+        raise _Unsupported('ID3v2 version or size')
+    # 扩展头和尾部标记很少使用；v2.4 之前的整体反同步需要先解码整个标签
+    if flags & 0x50 or (major < 4 and flags & 0x80):
+        raise _Unsupported('ID3v2 flags')
+    tag_end = 10 + _syncsafe(int.from_bytes(header[6:10], 'big'))
+    if size < tag_end + _ID3V1_TAIL:
+        raise _Unsupported('file shorter than tag')
+
+    frames = _read_id3_frames(f, major, tag_end)
+    # 文件末尾的 ID3v1 标签也由 mutagen 合并
+    f.seek(size - _ID3V1_TAIL)
+    tail = _read_exact(f, _ID3V1_TAIL)
+    data = header[:6] + _to_syncsafe(len(frames)) + frames + tail
+    return FastTags(ID3(io.BytesIO(data)), None, None)
+
+
+# ---------------------------------------------------------------- FLAC
+
+def _read_vorbis_comment(f) -> bytes:
+    """
+    读取 Vorbis 注释块，只保留需要的字段
+
+    与 mutagen 相同，按注释本身的长度读取（不信任块头中的大小）。
+    """
+    vendor_length = struct.unpack('<I', _read_exact(f, 4))[0]
+    vendor = _read_exact(f, vendor_length)
+    count = struct.unpack('<I', _read_exact(f, 4))[0]
+    comments = []
+    for _ in range(count):
+        length = struct.unpack('<I', _read_exact(f, 4))[0]
+        prefix = _read_exact(f, min(length, _VORBIS_KEY_PREFIX))
+        key = prefix.split(b'=', 1)[0]
+        if (b'=' in prefix and key.isascii() and
+                key.decode('ascii').upper() in _VORBIS_KEYS):
+            comments.append(prefix + _read_exact(f, length - len(prefix)))
+        else:
+            f.seek(length - len(prefix), 1)
+    data = struct.pack('<I', vendor_length) + vendor
+    data += struct.pack('<I', len(comments))
+    for comment in comments:
+        data += struct.pack('<I', len(comment)) + comment
+    return data
+
+
+def _skip_flac_picture(f):
+    """按图片块本身的字段跳过图片数据（与 mutagen 相同，不信任块头中的大小）"""
+    f.seek(4, 1)
+    mime_length = struct.unpack('>I', _read_exact(f, 4))[0]
+    f.seek(mime_length, 1)
+    description_length = struct.unpack('>I', _read_exact(f, 4))[0]
+    f.seek(description_length + 16, 1)
+    data_length = struct.unpack('>I', _read_exact(f, 4))[0]
+    f.seek(data_length, 1)
+
+
+def _flac_block_header(code: int, size: int, last: bool) -> bytes:
+    return bytes(((0x80 if last else 0) | code,)) + size.to_bytes(3, 'big')
+
+
+def _read_flac(f, size: int) -> FastTags:
+    from mutagen.flac import FLAC
+
+    if f.read(4) != b'fLaC':
+        raise _Unsupported('no fLaC marker')
+    streaminfo = vorbis = None
+    last = False
+    while not last:
+        header = _read_exact(f, 4)
+        code, last = header[0] & 0x7F, bool(header[0] & 0x80)
+        block_size = int.from_bytes(header[1:], 'big')
+        if code == _FLAC_VORBIS_COMMENT:
+            comment = _read_vorbis_comment(f)
+            # 有多个注释块时 mutagen 使用第一个
+            if vorbis is None:
+                vorbis = comment
+        elif code == _FLAC_PICTURE:
+            _skip_flac_picture(f)
+        elif code == _FLAC_STREAMINFO and streaminfo is None:
+            streaminfo = _read_exact(f, block_size)
+        else:
+            if f.tell() + block_size > size:
+                raise _Unsupported('truncated block')
+            f.seek(block_size, 1)
+    audio_start = f.tell()
+    if streaminfo is None or len(streaminfo) != 34 or audio_start > size:
+        raise _Unsupported('stream info')
+
+    data = b'fLaC' + _flac_block_header(
+        _FLAC_STREAMINFO, len(streaminfo), vorbis is None) + streaminfo
+    if vorbis is not None:
+        data += _flac_block_header(
+            _FLAC_VORBIS_COMMENT, len(vorbis), True) + vorbis
+    flac = FLAC(io.BytesIO(data))
+    # STREAMINFO 已包含时长；比特率按音频数据大小计算，与 mutagen 相同
+    length = flac.info.length
+    bitrate = int(float(size - audio_start) * 8 / length) if length else 0
+    return FastTags(flac.tags, length, bitrate)
+
+
+# ---------------------------------------------------------------- MP4
+
+def _read_mp4(f, size: int) -> FastTags:
+    from mutagen.mp4 import Atoms, MP4Tags
+
+    if f.read(8)[4:8] != b'ftyp':
+        raise _Unsupported('no ftyp atom')
+    f.seek(0)
+    # 原子树只读取原子头
+    atoms = Atoms(f)
+    if not MP4Tags._can_load(atoms):
+        return FastTags(None, None, None)
+    ilst = atoms.path(b'moov', b'udta', b'meta', b'ilst')[-1]
+    ilst.children = [atom for atom in ilst.children if atom.name != b'covr']
+    return FastTags(MP4Tags(atoms, f), None, None)
+
+
+_READERS = {
+    '.mp3': _read_mp3,
+    '.flac': _read_flac,
+    '.m4a': _read_mp4,
+}
+
+
+def read_tags(filepath: str, size: Optional[int] = None
+              ) -> Optional[FastTags]:
+    """
+    快速读取标签
+
+    Args:
+        filepath: 音乐文件路径
+        size: 文件大小（省略时读取文件状态）
+
+    Returns:
+        FastTags；格式或标签结构不支持快速读取时返回 None（应使用完整解析）
+    """
+    reader = _READERS.get(os.path.splitext(filepath)[1].lower())
+    if reader is None:
+        return None
+    if size is None:
+        size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        try:
+            return reader(f, size)
+        except (_Unsupported, *_MUTAGEN_API_ERRORS):
+            return None
+
+
+def read_audio_info(filepath: str) -> Tuple[Optional[float], Optional[int]]:
+    """
+    读取时长和比特率
+
+    MP3 从 ID3 标签之后解析音频帧，M4A 只读取音频轨道信息，都不读取封面；
+    其他情况使用 mutagen 完整解析。
+
+    Returns:
+        (时长（秒）, 比特率)，无法识别时为 (None, None)
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    with open(filepath, 'rb') as f:
+        header = f.read(10)
+        f.seek(0)
+        try:
+            if ext == '.mp3' and header[:3] == b'ID3':
+                from mutagen.mp3 import MPEGInfo
+                offset = 10 + _syncsafe(int.from_bytes(header[6:10], 'big'))
+                info = MPEGInfo(f, offset)
+                return info.length, info.bitrate
+            if ext == '.m4a' and header[4:8] == b'ftyp':
+                from mutagen.mp4 import Atoms, MP4Info, MP4NoTrackError
+                info = MP4Info()
+                try:
+                    info.load(Atoms(f), f)
+                except MP4NoTrackError:
+                    pass
+                return info.length, info.bitrate
+        except _MUTAGEN_API_ERRORS:
+            pass
+
+    from mutagen import File
+    audio_file = File(filepath)
+    info = getattr(audio_file, 'info', None)
+    return getattr(info, 'length', None), getattr(info, 'bitrate', None)
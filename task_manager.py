@@ -0,0 +1,219 @@
+"""
+后台任务管理模块
+挑选、生成歌单和比较歌单共用一个线程池在后台运行，界面线程不被阻塞。
+每个任务带有取消令牌，由处理模块在循环中检查；任务状态和进度以事件形式
+通知监听者，IO 密集的任务（扫描音乐库、读取标签、复制文件）限制同时运行的数量。
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, NamedTuple, Optional
+from config import TASK_WORKERS, TASK_IO_LIMIT
+
+# 任务状态
+TASK_PENDING = 'pending'        # 已提交，等待线程
+TASK_WAITING = 'waiting'        # 等待其他 IO 密集任务结束
+TASK_RUNNING = 'running'
+TASK_COMPLETED = 'completed'
+TASK_CANCELLED = 'cancelled'
+TASK_FAILED = 'failed'
+FINISHED_STATES = (TASK_COMPLETED, TASK_CANCELLED, TASK_FAILED)
+
+# 等待 IO 名额时检查取消的间隔（秒）
+_SLOT_POLL_INTERVAL = 0.1
+
+
+class CancelToken:
+    """取消令牌：任务取消后 cancelled 为 True，并调用已注册的回调"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """请求取消（可重复调用，回调只调用一次）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """注册取消回调，已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待取消，返回是否已取消"""
+        return self._event.wait(timeout)
+
+
+class TaskEvent(NamedTuple):
+    """任务事件"""
+    task: 'Task'
+    kind: str       # 'state' 或 'progress'
+    value: Any      # 新状态或进度数据
+
+
+class Task:
+    """一个后台任务"""
+
+    def __init__(self, manager: 'TaskManager', name: str,
+                 func: Callable[['Task'], Any], io_heavy: bool):
+        self.name = name
+        self.func = func
+        self.io_heavy = io_heavy
+        self.token = CancelToken()
+        self.state = TASK_PENDING
+        self.progress = None
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self._manager = manager
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self):
+        """请求取消任务"""
+        self.token.cancel()
+
+    def report_progress(self, progress):
+        """报告进度（在任务线程中调用，可直接作为处理模块的进度回调）"""
+        self.progress = progress
+        self._manager._emit(TaskEvent(self, 'progress', progress))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束，返回是否已结束"""
+        return self._done.wait(timeout)
+
+    def _set_state(self, state: str):
+        self.state = state
+        if state in FINISHED_STATES:
+            self._done.set()
+        self._manager._emit(TaskEvent(self, 'state', state))
+
+
+class TaskManager:
+    """后台任务管理器（所有选项卡共用）"""
+
+    def __init__(self, max_workers: int = TASK_WORKERS,
+                 io_limit: int = TASK_IO_LIMIT):
+        """
+        初始化任务管理器
+
+        Args:
+            max_workers: 线程池大小
+            io_limit: 同时运行的 IO 密集任务数
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='MusicPickerTask')
+        self._io_slots = threading.BoundedSemaphore(io_limit)
+        self._listeners: List[Callable[[TaskEvent], None]] = []
+        self._tasks: List[Task] = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def add_listener(self, listener: Callable[[TaskEvent], None]):
+        """
+        注册事件监听者
+
+        监听者在任务线程中调用，需要更新界面时应自行转到界面线程。
+        """
+        self._listeners.append(listener)
+
+    def submit(self, name: str, func: Callable[[Task], Any],
+               io_heavy: bool = True) -> Task:
+        """
+        提交任务
+
+        Args:
+            name: 任务名称
+            func: 任务函数，参数为 Task（通过 task.token 检查取消，
+                  通过 task.report_progress 报告进度）
+            io_heavy: 是否为 IO 密集任务（受 io_limit 限制）
+
+        Returns:
+            Task
+        """
+        task = Task(self, name, func, io_heavy)
+        with self._lock:
+            self._tasks = [item for item in self._tasks if not item.done]
+            self._tasks.append(task)
+        self._emit(TaskEvent(task, 'state', TASK_PENDING))
+        self._executor.submit(self._run, task)
+        return task
+
+    def active_tasks(self) -> List[Task]:
+        """尚未结束的任务"""
+        with self._lock:
+            return [task for task in self._tasks if not task.done]
+
+    def cancel_all(self):
+        """取消所有未结束的任务"""
+        for task in self.active_tasks():
+            task.cancel()
+
+    def shutdown(self, cancel: bool = True, timeout: Optional[float] = None):
+        """
+        关闭任务管理器
+
+        Args:
+            cancel: 是否先取消未结束的任务
+            timeout: 等待每个任务结束的最长秒数，None 表示一直等待
+        """
+        if cancel:
+            self.cancel_all()
+        for task in self.active_tasks():
+            task.wait(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task: Task):
+        """在线程池中运行任务"""
+        if task.io_heavy and not self._io_slots.acquire(blocking=False):
+            # 等待 IO 名额，期间可以取消
+            task._set_state(TASK_WAITING)
+            while not self._io_slots.acquire(timeout=_SLOT_POLL_INTERVAL):
+                if task.cancelled:
+                    task._set_state(TASK_CANCELLED)
+                    return
+        try:
+            if task.cancelled:
+                task._set_state(TASK_CANCELLED)
+                return
+            task._set_state(TASK_RUNNING)
+            try:
+                task.result = task.func(task)
+            except Exception as e:
+                task.error = e
+                self.logger.exception(f"任务 {task.name} 出错")
+                task._set_state(TASK_FAILED)
+                return
+            task._set_state(
+                TASK_CANCELLED if task.cancelled else TASK_COMPLETED)
+        finally:
+            if task.io_heavy:
+                self._io_slots.release()
+
+    def _emit(self, event: TaskEvent):
+        """通知监听者，单个监听者出错不影响任务"""
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                self.logger.exception("任务事件处理出错")
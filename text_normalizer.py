@@ -0,0 +1,110 @@
+"""
+文本标准化模块
+所有匹配器共用的标准化函数：正则预编译，结果缓存在有界 LRU 中
+"""
+import re
+from functools import lru_cache
+from typing import List, NamedTuple
+from config import NORMALIZE_CACHE_SIZE
+
+# 括号内容（如 feat. 信息）
+_PAREN_PATTERN = re.compile(r'\([^)]*\)')
+_BRACKET_PATTERN = re.compile(r'\[[^\]]*\]')
+# 非字母数字字符
+_NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+# 艺术家分隔符
+_ARTIST_SEPARATORS = re.compile(r'[/_]')
+# 艺术家分隔符和空白统一压缩为单个空格
+_SEPARATOR_RUN_PATTERN = re.compile(r'[\s/_]+')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_for_comparison(text: str) -> str:
+    """
+    标准化文本用于比较：小写、去除括号内容和特殊字符、压缩空白
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        标准化后的文本
+    """
+    if not text:
+        return ""
+
+    text = _PAREN_PATTERN.sub('', text.lower().strip())
+    text = _BRACKET_PATTERN.sub('', text)
+    text = _NON_WORD_PATTERN.sub(' ', text)
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_artist_separators(text: str) -> str:
+    """
+    标准化艺术家分隔符：/ 和 _ 视为空格，压缩空白并转小写
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        标准化后的文本
+    """
+    return _SEPARATOR_RUN_PATTERN.sub(' ', text).strip().lower()
+
+
+def split_artists(artist: str) -> List[str]:
+    """
+    按 / 和 _ 拆分多位艺术家
+
+    Args:
+        artist: 艺术家文本
+
+    Returns:
+        小写的艺术家列表（去除空项）
+    """
+    return [part.strip().lower()
+            for part in _ARTIST_SEPARATORS.split(artist.strip())
+            if part.strip()]
+
+
+def make_index_key(text: str) -> str:
+    """
+    生成索引键：小写并去除空白和分隔符
+
+    子串关系在去除同一类字符后依然成立，因此任何能通过
+    文件名匹配的歌曲，其索引键必然是文件索引键的子串。
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        索引键
+    """
+    return _SEPARATOR_RUN_PATTERN.sub('', text.lower())
+
+
+class SongQuery(NamedTuple):
+    """预先标准化的歌单条目，匹配时不再重复处理"""
+    title: str               # 原始标题（小写）
+    artist: str              # 原始艺术家（小写）
+    normalized_title: str
+    normalized_artist: str
+    artists: List[str]       # 拆分后的多位艺术家
+
+
+def prepare_song_query(title: str, artist: str) -> SongQuery:
+    """
+    标准化一条歌单条目
+
+    Args:
+        title: 歌曲标题
+        artist: 歌曲艺术家
+
+    Returns:
+        SongQuery
+    """
+    return SongQuery(
+        title, artist,
+        title.lower().strip(),
+        normalize_artist_separators(artist),
+        split_artists(artist))
@@ -32,6 +32,15 @@ class Translator:
                 # 元数据匹配选项
                 'use_metadata_matching': '使用元数据匹配',
                 'metadata_help_text': '基于歌曲标签信息进行匹配，准确度更高',
+
+                # 输出方式
+                'output_mode_label': '输出方式:',
+                'output_mode_copy': '复制',
+                'output_mode_hardlink': '硬链接',
+                'output_mode_reflink': '写时复制',
+                'output_mode_symlink': '符号链接',
+                'sync_mode_option': '增量同步',
+                'best_quality_option': '最佳音质',
                 'warning': '警告',
 
                 # 对话框标题
@@ -57,10 +66,30 @@ class Translator:
                 'output_folder_created': '已创建输出文件夹: \'{}\'',
                 'create_output_folder_failed': '错误: 无法创建输出文件夹 \'{}\': {}',
                 'starting_search': '开始在 \'{}\' 中搜索歌曲...',
+                'library_indexed': '音乐库索引完成，共 {} 个音频文件。',
+                'early_stop_summary': '所有歌曲均已找到，提前结束扫描：已检查 {} 个音频文件（{} 个目录），跳过 {} 个尚未访问的目录及其子目录。',
+                'best_quality_selected': '最佳音质: \'{}\' -> \'{}\'',
+                'batch_started': '批量处理 {} 个歌单（音乐库只扫描一次）',
+                'batch_duplicate_output': '多个歌单使用了同一个输出文件夹: {}',
+                'batch_list_summary': '{}: 找到 {}/{} 首，输出 {} 个文件 -> {}',
+                'batch_summary': '批量处理完成：{} 个歌单，音乐库 {} 个文件，{} 个文件被多个歌单共用（复制时少读取 {} 次）',
+                'log_lines_omitted': '... 省略了 {} 行日志，完整日志见 {}',
+                'task_waiting': '等待正在运行的扫描任务结束后开始...',
+                'task_failed': '后台任务出错: {}',
                 'file_already_exists': '提示: 文件 \'{}\' 已存在于目标文件夹，跳过复制 (来自: {})。',
                 'found_and_copied': '找到并复制: \'{}\' -> \'{}\'',
+                'found_and_output': '找到并输出({}): \'{}\' -> \'{}\'',
                 'copy_failed': '错误: 复制文件 \'{}\' 到 \'{}\' 失败: {}',
                 'search_complete': '搜索完成。共找到并复制 {} 首不同的歌曲。',
+                'match_time_summary': '匹配用时 {:.2f} 秒。',
+                'copy_throughput_summary': '复制 {} 个文件，共 {:.1f} MB，用时 {:.2f} 秒（{:.1f} MB/s，{:.1f} 文件/s）。',
+                'output_mode_summary': '实际输出方式: {}',
+                'output_progress_summary': '已输出 {} 个文件，共 {:.1f} MB...',
+                'per_file_log_summary': '共 {} 首歌曲，逐个文件的日志改为每 {} 秒汇总一次',
+                'sync_up_to_date': '同步: \'{}\' 未变化，跳过 \'{}\'',
+                'sync_pruned': '同步: 已删除不再需要的文件 \'{}\'',
+                'sync_summary': '同步完成：未变化 {} 个，清理 {} 个。',
+                'sync_manifest_save_failed': '错误: 保存同步清单失败: {}',
                 'unfound_songs_header': '以下歌曲可能未在音乐库中找到（或命名不匹配）：',
                 'parse_warning': '警告: 无法解析行 \'{}\'，跳过。',
                 'file_not_found': '错误: 歌曲列表文件 \'{}\' 未找到。',
@@ -69,6 +98,7 @@ class Translator:
                 'uncaught_error': '处理过程中发生未捕获的错误: {}',
                 # 进度文本
                 'progress_format': '进度: {}/{} ({:.2f}%)',
+                'progress_detail_format': '文件: {}/{}  歌曲: {}/{}  {:.0f} 文件/秒  剩余 {}',
                 'progress_na': '进度: N/A',
                 # v1.2 新功能 - 播放列表生成器
                 'playlist_generator_tab': '播放列表生成器',
@@ -124,6 +154,15 @@ class Translator:
                 # Metadata matching options
                 'use_metadata_matching': 'Use Metadata Matching',
                 'metadata_help_text': 'Match based on song tag information for higher accuracy',
+
+                # Output modes
+                'output_mode_label': 'Output Mode:',
+                'output_mode_copy': 'Copy',
+                'output_mode_hardlink': 'Hard link',
+                'output_mode_reflink': 'Reflink',
+                'output_mode_symlink': 'Symbolic link',
+                'sync_mode_option': 'Incremental Sync',
+                'best_quality_option': 'Prefer Best Quality',
                 'warning': 'Warning',
 
                 # Dialog titles
@@ -149,10 +188,30 @@ class Translator:
                 'output_folder_created': 'Output folder created: \'{}\'',
                 'create_output_folder_failed': 'Error: Cannot create output folder \'{}\': {}',
                 'starting_search': 'Starting search in \'{}\'...',
+                'library_indexed': 'Library indexed: {} audio files.',
+                'early_stop_summary': 'All songs found, scan stopped early: checked {} audio files ({} folders), skipped {} unvisited folders and their subfolders.',
+                'best_quality_selected': 'Best quality: \'{}\' -> \'{}\'',
+                'batch_started': 'Batch processing {} song lists (the library is scanned once)',
+                'batch_duplicate_output': 'Several song lists use the same output folder: {}',
+                'batch_list_summary': '{}: found {}/{} songs, wrote {} files -> {}',
+                'batch_summary': 'Batch complete: {} song lists, {} library files, {} files shared by several lists ({} source reads saved)',
+                'log_lines_omitted': '... {} log lines omitted, see {} for the full log',
+                'task_waiting': 'Waiting for the running scan to finish...',
+                'task_failed': 'Background task failed: {}',
                 'file_already_exists': 'Info: File \'{}\' already exists in target folder, skipping copy (from: {}).',
                 'found_and_copied': 'Found and copied: \'{}\' -> \'{}\'',
+                'found_and_output': 'Found and output ({}): \'{}\' -> \'{}\'',
                 'copy_failed': 'Error: Failed to copy file \'{}\' to \'{}\': {}',
                 'search_complete': 'Search completed. Found and copied {} unique songs.',
+                'match_time_summary': 'Matching took {:.2f} s.',
+                'copy_throughput_summary': 'Copied {} files, {:.1f} MB in {:.2f} s ({:.1f} MB/s, {:.1f} files/s).',
+                'output_mode_summary': 'Output modes used: {}',
+                'output_progress_summary': 'Output {} files so far, {:.1f} MB...',
+                'per_file_log_summary': '{} songs: per-file log lines are replaced by a summary every {} s',
+                'sync_up_to_date': 'Sync: \'{}\' unchanged, skipping \'{}\'',
+                'sync_pruned': 'Sync: removed file no longer needed \'{}\'',
+                'sync_summary': 'Sync finished: {} unchanged, {} removed.',
+                'sync_manifest_save_failed': 'Error: Failed to save sync manifest: {}',
                 'unfound_songs_header': 'The following songs may not be found in the music library (or naming mismatch):',
                 'parse_warning': 'Warning: Cannot parse line \'{}\', skipping.',
                 'file_not_found': 'Error: Song list file \'{}\' not found.',
@@ -161,6 +220,7 @@ class Translator:
                 'uncaught_error': 'Uncaught error occurred during processing: {}',
                 # Progress text
                 'progress_format': 'Progress: {}/{} ({:.2f}%)',
+                'progress_detail_format': 'Files: {}/{}  Songs: {}/{}  {:.0f} files/s  ETA {}',
                 'progress_na': 'Progress: N/A',
                 # v1.2 New Features - Playlist Generator
                 'playlist_generator_tab': 'Playlist Generator',
@@ -1,27 +1,72 @@
 """
 工具函数模块
 """
+import queue
+import atexit
 import logging
-from config import LOG_FILE, LOG_FORMAT
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import LOG_FILE, LOG_FORMAT, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+# 文本标准化已移至 text_normalizer，此处保留导入以兼容旧代码
+from text_normalizer import normalize_for_comparison  # noqa: F401
 
+# 后台写日志的线程（setup_logging 创建）
+_log_listener = None
+
+
+def setup_logging(console=True):
+    """
+    设置日志配置
+
+    记录只放入队列，由后台线程写入文件和控制台，处理线程不等待磁盘；
+    日志文件按大小轮转。
+
+    Args:
+        console: 是否同时输出到控制台（命令行模式下消息已直接打印）
+    """
+    global _log_listener
+    stop_logging()
 
-def setup_logging():
-    """设置日志配置"""
     # 清除现有的handlers，避免重复设置
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+        handler.close()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [RotatingFileHandler(
+        LOG_FILE, mode='a', maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT, encoding='utf-8')]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # 队列处理器只生成消息文本，时间和级别由后台线程格式化
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(logging.INFO)
+    _log_listener = QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+
+
+def stop_logging():
+    """停止后台日志线程：写完队列中剩余的记录并关闭日志文件"""
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is None:
+        return
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
 
-    # 重新配置日志
-    logging.basicConfig(
-        level=logging.INFO,
-        format=LOG_FORMAT,
-        handlers=[
-            logging.FileHandler(LOG_FILE, encoding='utf-8', mode='a'),
-            logging.StreamHandler()
-        ],
-        force=True  # 强制重新配置
-    )
+# 退出时写完队列中的日志（先于 logging 自身的清理执行）
+atexit.register(stop_logging)
 
 
 def is_supported_audio_file(filename, supported_formats):
@@ -35,28 +80,6 @@ def normalize_filename(filename):
     return os.path.splitext(filename)[0].lower()
 
 
-def normalize_for_comparison(text):
-    """标准化文本用于比较"""
-    if not text:
-        return ""
-
-    import re
-    # 转换为小写
-    text = text.lower().strip()
-
-    # 移除常见的括号内容（如feat.等）
-    text = re.sub(r'\([^)]*\)', '', text)
-    text = re.sub(r'\[[^\]]*\]', '', text)
-
-    # 移除特殊字符，只保留字母数字和空格
-    text = re.sub(r'[^\w\s]', ' ', text)
-
-    # 压缩多个空格为单个空格
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    return text
-
-
 def check_mutagen_availability():
     """检查mutagen库是否可用"""
     try: